@@ -2,6 +2,10 @@
 # coding: utf-8
 
 import streamlit as st
+from util import warmup
+from util.editions import EDITION
+
+warmup.start()
 #Remove Extra Padding from all sides of the page and top/bottom of sidebar
 st.markdown("""
             <style>
@@ -29,10 +33,10 @@ hide_st_style = """
 st.markdown(hide_st_style,unsafe_allow_html = True) 
 
 st.write("# Development length calculator")
-st.write("""
+st.write(f"""
 ### Purpose
 - This is a web application that calculates the necessary tension and compression development lengths.
-- All calculations are in accordance with CSA A23.3-19; Cl.12.
+- All calculations are in accordance with CSA A23.3-{EDITION[2:]}; Cl.12.
 
 ### Disclaimer
 Although this calculator has been formally checked for technical correctness, it is not a substitute for engineering judgement, and does not relieve users of their duty to conduct required checking and quality control procedures.
@@ -42,12 +46,14 @@ Although this calculator has been formally checked for technical correctness, it
     - [x] Tension
     - [x] Compression
     - [x] Hooked
+- [x] Bar schedule upload (CSV, all three checks per bar mark)
+- [x] Tension lap splice schedule (Cl. 12.15)
 - [ ] General development length calculation
 
 ### References
 | S. No. | Reference | Year|
 |--------|-----------|-----|
-| 1. | CSA A23.3; Cl.12 | 2019|
+| 1. | CSA A23.3; Cl.12 | {EDITION}|
 
 ### Color reference
 | Color             | Legend                                                                |
@@ -59,7 +65,7 @@ Although this calculator has been formally checked for technical correctness, it
 
 ### Instructions for use
 1. Review all information on the cover sheet
-2. From the side bar, choose one of the 3 pages available [Hooked](Hooked), [Compression](Compression), [Tension](Tension)
+2. From the side bar, choose one of the 5 pages available [Hooked](Hooked), [Compression](Compression), [Tension](Tension), [Schedule](Schedule), [Splices](Splices)
 3. Proceed to calculations by filing in all the values in the side bar.
 4. Review entire workbook after completion
 5. You may collapse the side bar and print the page using `Ctrl+P` to save the calculation as PDF.
@@ -83,3 +89,32 @@ Associated Engineering,<br>
 version: 1.1
 </p>
 """)
+
+def show_statistics():
+    """Writes the cache, result store, design table and rerun statistics; imported and counted only when asked for,
+    so that opening the About page does not load the calculation modules or query the store
+    """
+    from util.custom_streamlit_configs import rerun_stats
+    from util.design_table import get_table
+    from util.handcalc_cache import cache_stats
+    from util.result_store import get_store
+    stats = cache_stats()
+    if stats:
+        st.table(stats)
+    else:
+        st.write("No calculations have been run in this server process yet.")
+    st.write("**Result store** (shared by all sessions, kept across restarts)")
+    st.table([get_store().stats()])
+    table_path = get_table().path
+    st.write(f"**Design table**: memory-mapped from `{table_path}`" if table_path else "**Design table**: built in this server process")
+    st.write("**Reruns** (all sessions of this server process)")
+    reruns = rerun_stats()
+    if reruns:
+        st.table(reruns)
+    else:
+        st.write("No calculation page has been opened yet.")
+
+
+with st.expander("Calculation cache statistics"):
+    if st.button("Load statistics"):
+        show_statistics()
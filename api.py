@@ -0,0 +1,226 @@
+"""Headless HTTP/JSON service for the development length calculations
+
+    python api.py --host 0.0.0.0 --port 8000
+
+Endpoints:
+    GET  /health                  -> {"status": "ok"}
+    POST /tension                 one JSON object  -> one JSON object
+    POST /tension/batch           JSON array       -> JSON array
+    POST /compression[/batch]
+    POST /hooked[/batch]
+
+Request objects use the bar schedule columns (see `util.schedule.schedule_columns`), e.g.
+    {"bar": "25M", "fc": 30, "fy": 400, "ties": true, "coating": "epoxy", "hook": "90"}
+Missing keys take the schedule defaults. Add `?latex=true` to the URL to also return the handcalcs LaTeX.
+
+The server is a single-threaded asyncio HTTP/1.1 server with keep-alive, built on the standard library only.
+Batches are evaluated in one vectorized pass. Use `loadtest_api.py` to measure throughput.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from util.editions import handcalc_f_prime_c
+from util.schedule import compression_results, hooked_results, parse_columns, schedule_columns, tension_results
+
+MAX_HEADER_BYTES = 16_384
+MAX_BODY_BYTES = 64*1024*1024
+
+_reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _round(values):
+    return np.round(values, 1).tolist()
+
+
+def _tension(columns, latex):
+    result = tension_results(columns)
+    output = {'case': result['case'].tolist(), **{k: result[k].tolist() for k in ('k_1', 'k_2', 'k_3', 'k_4')}, 'l_d': _round(result['l_d'])}
+    if latex:
+        from util.handcalc_steps import development_length_case1, development_length_case2
+        output['latex'] = [
+            (development_length_case1 if case == 1 else development_length_case2)(
+                k_1=k_1, k_2=k_2, k_3=k_3, k_4=k_4, f_y=f_y, f_prime_c=f_prime_c, d_b=d_b)[0]
+            for case, k_1, k_2, k_3, k_4, f_y, f_prime_c, d_b in zip(
+                output['case'], output['k_1'], output['k_2'], output['k_3'], output['k_4'],
+                columns['fy'].tolist(), handcalc_f_prime_c(columns['fc']), columns['d_b'].tolist())]
+    return output
+
+
+def _compression(columns, latex):
+    result = compression_results(columns)
+    output = {'l_db': _round(result['l_db']), 'k_1': result['k_1'].tolist(), 'l_d': _round(result['l_d'])}
+    if latex:
+        from util.handcalc_steps import basic_dev_length, compression_development_length
+        output['latex'] = []
+        for d_b, f_y, f_prime_c, k_1 in zip(columns['d_b'].tolist(), columns['fy'].tolist(), handcalc_f_prime_c(columns['fc']), output['k_1']):
+            basic_latex, basic_value = basic_dev_length(d_b=d_b, f_y=f_y, f_prime_c=f_prime_c)
+            output['latex'].append(basic_latex + compression_development_length(l_db=basic_value['l_db'], k_1=k_1)[0])
+    return output
+
+
+def _hooked(columns, latex):
+    if (columns['hook'] == '').any():
+        raise ValueError("`hook` must be 90 or 180 for every hooked bar")
+    result = hooked_results(columns)
+    output = {**{k: result[k].tolist() for k in ('k_1', 'k_2', 'k_3', 'k_4', 'k_1_code', 'k_2_code', 'k_3_code', 'k_4_code')}, 'l_hb': _round(result['l_hb']), 'l_dh': _round(result['l_dh'])}
+    if latex:
+        from util.handcalc_steps import calculation_steps, hooked_development_length
+        output['latex'] = []
+        for k_1, k_2, k_3, k_4, d_b, f_prime_c, f_y in zip(
+                output['k_1'], output['k_2'], output['k_3'], output['k_4'],
+                columns['d_b'].tolist(), handcalc_f_prime_c(columns['fc']), columns['fy'].tolist()):
+            steps_latex, steps_value = calculation_steps(k_1=k_1, k_2=k_2, k_3=k_3, k_4=k_4, d_b=d_b, f_prime_c=f_prime_c, f_y=f_y)
+            output['latex'].append(steps_latex + hooked_development_length(l_hb=steps_value['l_hb'], d_b=d_b)[0])
+    return output
+
+
+clauses = {'tension': _tension, 'compression': _compression, 'hooked': _hooked}
+
+
+def calculate(clause, records, latex=False):
+    """Calculates one clause for a list of request objects
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        records (list): List of dicts keyed by schedule column
+        latex (bool, optional): Include the handcalcs LaTeX per record. Defaults to False.
+
+    Returns:
+        list: One result dict per record, with the input `mark` and `bar` echoed back
+    """
+    if not all(isinstance(record, dict) for record in records):
+        raise ValueError("Every request must be a JSON object")
+    present = {key for record in records for key in record}
+    unknown = present - set(schedule_columns)
+    if unknown:
+        raise ValueError(f"Unknown keys {sorted(unknown)}. Expected any of {list(schedule_columns)}")
+    columns = parse_columns({column: [record.get(column) for record in records] for column in present})
+    output = {'mark': columns['mark'].tolist(), 'bar': columns['bar'].tolist(), **clauses[clause](columns, latex)}
+    keys = list(output)
+    return [dict(zip(keys, row)) for row in zip(*output.values())]
+
+
+def handle(method, target, body):
+    """Routes one request
+
+    Returns:
+        int, object: HTTP status and JSON-serializable payload
+    """
+    path, _, query = target.partition('?')
+    path = path.rstrip('/') or '/'
+    if path == '/health':
+        return 200, {'status': 'ok'}
+    if path == '/':
+        return 200, {'endpoints': [f"/{clause}{suffix}" for clause in clauses for suffix in ('', '/batch')] + ['/health']}
+
+    clause, _, batch = path[1:].partition('/')
+    if clause not in clauses or batch not in ('', 'batch'):
+        return 404, {'error': f"Unknown endpoint `{path}`"}
+    if method != 'POST':
+        return 405, {'error': "Use POST with a JSON body"}
+    latex = parse_qs(query).get('latex', ['false'])[0].lower() in ('1', 'true', 'yes')
+    try:
+        request = json.loads(body or b'null')
+        if batch:
+            if not isinstance(request, list):
+                raise ValueError("Batch endpoints expect a JSON array")
+            return 200, calculate(clause, request, latex)
+        if not isinstance(request, dict):
+            raise ValueError("Expected a JSON object; use the /batch endpoint for arrays")
+        return 200, calculate(clause, [request], latex)[0]
+    except (ValueError, TypeError) as e:
+        return 400, {'error': str(e)}
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    head = (f"HTTP/1.1 {status} {_reasons[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """Minimal HTTP/1.1 server protocol with keep-alive and pipelining; chunked request bodies are not supported"""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = b''
+
+    def data_received(self, data):
+        self.buffer += data
+        while self.buffer:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self._reply(413, {'error': "Header too large"}, False)
+                return
+            lines = self.buffer[:end].decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ', 2)
+            except ValueError:
+                self._reply(400, {'error': "Malformed request line"}, False)
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if 'transfer-encoding' in headers:
+                self._reply(411, {'error': "Send a Content-Length header"}, False)
+                return
+            try:
+                length = int(headers.get('content-length', 0) or 0)
+            except ValueError:
+                self._reply(400, {'error': "Invalid Content-Length"}, False)
+                return
+            if length > MAX_BODY_BYTES:
+                self._reply(413, {'error': f"Body larger than {MAX_BODY_BYTES} bytes"}, False)
+                return
+            if len(self.buffer) < end + 4 + length:
+                return
+            body = self.buffer[end + 4:end + 4 + length]
+            self.buffer = self.buffer[end + 4 + length:]
+
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+            try:
+                status, payload = handle(method, target, body)
+            except Exception as e:
+                status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+            if not self._reply(status, payload, keep_alive):
+                return
+
+    def _reply(self, status, payload, keep_alive):
+        self.transport.write(_response(status, payload, keep_alive))
+        if not keep_alive:
+            self.transport.close()
+            self.buffer = b''
+        return keep_alive
+
+
+async def serve(host, port):
+    server = await asyncio.get_running_loop().create_server(HTTPProtocol, host, port, reuse_address=True, backlog=1024)
+    print(f"Serving development length API on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON service for tension, compression and hooked development length")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Command-line batch runner for bar schedules
+
+Runs the tension (Cl. 12.2), compression (Cl. 12.3) and hooked (Cl. 12.5) calculations for every row of one or more
+CSV, JSON (array of objects) or JSON-lines files. The columns/keys are the same as on the Schedule page. With
+`--splices` the rows are tension lap splices (Cl. 12.15) instead, as on the Splices page.
+
+    python batch.py project_a.csv project_b.jsonl --workers 8 --chunksize 20000
+    python batch.py schedule.csv --output results.jsonl
+    python batch.py slab_splices.csv --splices
+    python batch.py schedule.csv --format parquet      # or xlsx
+
+The main process only splits the inputs into raw text chunks and writes results. Parsing, calculating and formatting
+each chunk happens in a `concurrent.futures` process pool. Results are written in input order as chunks complete, and
+only `workers * 2` chunks are in flight at a time, so memory stays bounded. Development lengths go through the shared
+SQLite result store (`util/result_store.py`) unless `--no-store` is given.
+
+Results can be written as CSV, JSON, JSON lines, Parquet (one row group per chunk, needs `pyarrow`) or XLSX (streamed
+by openpyxl's write-only mode, needs `openpyxl`); every format is appended chunk by chunk, so peak memory does not grow
+with the number of rows. Each row carries the tension k_1..k_4, l_d, l_dc, the hooked h_k_1..h_k_4 behind l_dh, l_dh
+and the governing clause.
+"""
+import argparse
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from util.schedule import calculate_columns, csv_records, result_columns, schedule_columns
+from util.splice import calculate_splices, splice_columns, splice_result_columns
+
+FORMATS = ('.csv', '.json', '.jsonl')
+#Output only: Parquet with one row group per chunk (pyarrow) and XLSX in openpyxl's write-only mode
+OUTPUT_FORMATS = FORMATS + ('.parquet', '.xlsx')
+#Package each output-only format needs; both are in requirements.txt
+OUTPUT_MODULES = {'.parquet': 'pyarrow', '.xlsx': 'openpyxl'}
+#Data rows per XLSX worksheet; Excel's limit is 1,048,576 rows including the header
+XLSX_SHEET_ROWS = 1_048_575
+
+
+def read_raw_chunks(path, chunksize):
+    """Splits a schedule file into chunks without parsing the rows
+
+    Yields:
+        str, object: ("csv", header + rows text), ("jsonl", rows text) or ("records", list of dicts)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.csv', '.jsonl'):
+        with open(path, newline='') as f:
+            #CSV chunks end on record boundaries, so quoted fields with line breaks stay in one chunk
+            records = csv_records(f) if extension == '.csv' else f
+            header = next(records, '') if extension == '.csv' else ''
+            while True:
+                lines = list(islice(records, chunksize))
+                if not lines:
+                    return
+                yield extension[1:], header + ''.join(lines)
+    elif extension == '.json':
+        with open(path) as f:
+            records = json.load(f)
+        if not isinstance(records, list):
+            raise ValueError(f"{path}: expected a JSON array of objects")
+        for start in range(0, len(records), chunksize):
+            yield 'records', records[start:start + chunksize]
+    else:
+        raise ValueError(f"{path}: unsupported file type, expected one of {FORMATS}")
+
+
+def raw_columns(kind, payload):
+    """Converts a chunk from `read_raw_chunks` to raw schedule columns for `util.schedule.parse_columns`
+
+    Returns:
+        dict: Column name to array-like of raw values
+    """
+    if kind == 'csv':
+        from util.schedule import read_schedule
+        chunk = next(read_schedule(io.StringIO(payload), chunksize=None), None)
+        return {} if chunk is None else {column: chunk[column].to_numpy() for column in (*schedule_columns, *splice_columns) if column in chunk}
+    records = [json.loads(line) for line in payload.splitlines() if line.strip()] if kind == 'jsonl' else payload
+    if not all(isinstance(record, dict) for record in records):
+        raise ValueError("Every JSON record must be an object")
+    return {column: [record.get(column) for record in records] for column in {key for record in records for key in record}}
+
+
+def process_chunk(kind, payload, extension, use_store=True, splices=False):
+    """Parses, calculates and formats one chunk; runs in the worker processes
+
+    Args:
+        kind (str): Chunk kind from `read_raw_chunks`
+        payload (str or list): Chunk from `read_raw_chunks`
+        extension (str): Output extension
+        use_store (bool, optional): Use the shared SQLite result store, see `util.result_store`. Defaults to True.
+        splices (bool, optional): Rows are lap splices, see `util.splice.calculate_splices`. Defaults to False.
+
+    Returns:
+        object, int: formatted rows and row count; CSV text without header or JSON lines, a `pyarrow.Table` for
+            Parquet or a list of row tuples for XLSX
+    """
+    store = None
+    if use_store:
+        from util.result_store import get_store
+        store = get_store()
+    result = (calculate_splices if splices else calculate_columns)(raw_columns(kind, payload), store)
+    if extension == '.csv':
+        return result.to_csv(header=False, index=False), len(result)
+    if extension == '.parquet':
+        import pyarrow as pa
+        return pa.Table.from_pandas(result, preserve_index=False), len(result)
+    if extension == '.xlsx':
+        return list(result.astype(object).where(result.notna(), None).itertuples(index=False, name=None)), len(result)
+    return (result.to_json(orient='records', lines=True).strip() + '\n' if len(result) else ''), len(result)
+
+
+def missing_module(extension):
+    """Message for an output format whose package from `OUTPUT_MODULES` is not installed, None when it can be written"""
+    module = OUTPUT_MODULES.get(extension)
+    if module is None or importlib.util.find_spec(module) is not None:
+        return None
+    return f"{extension} output needs `{module}`, which is not installed; run `pip install -r requirements.txt`"
+
+
+class ResultWriter:
+    def __init__(self, path, columns=result_columns):
+        """Appends formatted result chunks to a CSV, JSON, JSON-lines, Parquet or XLSX file
+
+        Only the current chunk is held in memory: Parquet gets one row group per chunk and the XLSX rows are streamed
+        to disk by openpyxl's write-only workbook, continued on a new worksheet every `XLSX_SHEET_ROWS` rows.
+
+        Args:
+            path (str): Output file; the format follows the extension
+            columns (list, optional): Header. Defaults to `util.schedule.result_columns`.
+
+        Raises:
+            ValueError: The extension is not one of `OUTPUT_FORMATS`
+            ImportError: The package in `OUTPUT_MODULES` for the format is not installed, raised before any row is
+                calculated
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.extension = os.path.splitext(path)[1].lower()
+        if self.extension not in OUTPUT_FORMATS:
+            raise ValueError(f"{path}: unsupported file type, expected one of {OUTPUT_FORMATS}")
+        missing = missing_module(self.extension)
+        if missing:
+            raise ImportError(missing)
+        self.rows = 0
+        if self.extension == '.parquet':
+            #Opened with the schema of the first chunk
+            self.file = None
+        elif self.extension == '.xlsx':
+            from openpyxl import Workbook
+            self.file = Workbook(write_only=True)
+            self.sheet = None
+        else:
+            self.file = open(path, 'w', newline='')
+        if self.extension == '.csv':
+            self.file.write(','.join(columns) + '\n')
+        elif self.extension == '.json':
+            self.file.write('[')
+
+    def _append_rows(self, rows):
+        for row in rows:
+            if self.sheet is None or self.sheet_rows == XLSX_SHEET_ROWS:
+                self.sheet = self.file.create_sheet(f"Results {len(self.file.worksheets) + 1}" if self.file.worksheets else "Results")
+                self.sheet.append(self.columns)
+                self.sheet_rows = 0
+            self.sheet.append(row)
+            self.sheet_rows += 1
+
+    def write(self, data, rows):
+        if self.extension == '.parquet':
+            import pyarrow.parquet as pq
+            if self.file is None:
+                self.file = pq.ParquetWriter(self.path, data.schema)
+            self.file.write_table(data.cast(self.file.schema))
+        elif self.extension == '.xlsx':
+            self._append_rows(data)
+        else:
+            if self.extension == '.json' and rows:
+                data = (',\n' if self.rows else '\n') + data.rstrip('\n').replace('\n', ',\n')
+            self.file.write(data)
+        self.rows += rows
+
+    def close(self):
+        if self.extension == '.parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.file is None:
+                #Same schema as a non-empty run: the result of no rows, not untyped columns
+                calculate = calculate_splices if self.columns == list(splice_result_columns) else calculate_columns
+                pq.write_table(pa.Table.from_pandas(calculate({}), preserve_index=False), self.path)
+            else:
+                self.file.close()
+            return
+        if self.extension == '.xlsx':
+            if self.sheet is None:
+                self.sheet = self.file.create_sheet("Results")
+                self.sheet.append(self.columns)
+            self.file.save(self.path)
+            return
+        if self.extension == '.json':
+            self.file.write('\n]\n')
+        self.file.close()
+
+
+def run(path, output, executor, chunksize, workers, use_store=True, splices=False):
+    """Calculates one schedule file; `splices` treats the rows as lap splices
+
+    Returns:
+        int: number of rows written
+    """
+    writer = ResultWriter(output, splice_result_columns if splices else result_columns)
+    try:
+        chunks = read_raw_chunks(path, chunksize)
+        if executor is None:
+            for kind, payload in chunks:
+                writer.write(*process_chunk(kind, payload, writer.extension, use_store, splices))
+        else:
+            pending = deque()
+            for kind, payload in chunks:
+                pending.append(executor.submit(process_chunk, kind, payload, writer.extension, use_store, splices))
+                if len(pending) >= workers*2:
+                    writer.write(*pending.popleft().result())
+            while pending:
+                writer.write(*pending.popleft().result())
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculates tension, compression and hooked development lengths for bar schedule files")
+    parser.add_argument('inputs', nargs='+', help=f"Schedule files ({', '.join(FORMATS)})")
+    parser.add_argument('-o', '--output', help="Output file; only with a single input. Defaults to `<input>_results.csv`")
+    parser.add_argument('--format', choices=[f[1:] for f in OUTPUT_FORMATS], default='csv', help="Output format when --output is not given (default: csv)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="Worker processes; 1 runs in-process (default: all cores)")
+    parser.add_argument('-c', '--chunksize', type=int, default=10_000, help="Rows per chunk (default: 10000)")
+    parser.add_argument('--no-store', action='store_true', help="Do not use the shared SQLite result store")
+    parser.add_argument('--splices', action='store_true', help="Rows are tension lap splices (Cl. 12.15) with provided lengths")
+    args = parser.parse_args()
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output can only be used with a single input")
+    extension = os.path.splitext(args.output)[1].lower() if args.output else f".{args.format}"
+    missing = missing_module(extension)
+    if missing:
+        parser.error(missing)
+
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    failed = []
+    try:
+        for path in args.inputs:
+            output = args.output or f"{os.path.splitext(path)[0]}_results.{args.format}"
+            start = time.perf_counter()
+            try:
+                rows = run(path, output, executor, args.chunksize, args.workers, not args.no_store, args.splices)
+            except (OSError, ValueError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed.append(path)
+                continue
+            print(f"{path} -> {output}: {rows} rows in {time.perf_counter() - start:.2f}s")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Cold-start benchmark for the Streamlit scripts
+
+Every script is executed in a fresh interpreter (streamlit "bare" mode, no server/browser), so each run pays for the
+imports exactly like the first render in a freshly started container. The time to import streamlit, to execute the
+script (i.e. to produce the first render) and the wall time of the whole process are recorded per run.
+
+    python bench_startup.py --runs 5 --budget 1.5 --output startup_bench.csv
+
+Exits with code 1 if the median time-to-first-render of any script exceeds the budget.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import json, runpy, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import streamlit
+imported = time.perf_counter()
+runpy.run_path({script!r}, run_name='__main__')
+rendered = time.perf_counter()
+print('BENCH' + json.dumps({{'streamlit_import_s': imported - start, 'render_s': rendered - imported, 'first_render_s': rendered - start}}))
+"""
+
+
+def scripts():
+    return ['About.py'] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+
+def run_once(script, importtime=False):
+    """Runs `script` in a fresh interpreter and returns its timings
+
+    Args:
+        script (str): Script path relative to the repo root
+        importtime (bool, optional): Also return the 5 slowest imports reported by `-X importtime`. Defaults to False.
+
+    Returns:
+        dict: timings in seconds, plus `slowest_imports` if requested
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD.format(root=ROOT, script=script)]
+    start = time.perf_counter()
+    process = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    lines = [line for line in process.stdout.splitlines() if line.startswith('BENCH')]
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f"{script} failed:\n{process.stderr[-2000:]}")
+    result = json.loads(lines[-1][len('BENCH'):])
+    result['process_s'] = wall
+    if importtime:
+        #Lines look like "import time:   self [us] | cumulative | imported package"
+        imports = []
+        for line in process.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                _, cumulative, name = line[len('import time:'):].split('|')
+                if cumulative.strip().isdigit() and not name.startswith('  '):
+                    imports.append((int(cumulative)/1e6, name.strip()))
+        result['slowest_imports'] = sorted(imports, reverse=True)[:5]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures time-to-first-render of About.py and every page in fresh interpreters")
+    parser.add_argument('--runs', type=int, default=3, help="Runs per script (default: 3)")
+    parser.add_argument('--budget', type=float, default=1.5, help="Max. median time-to-first-render per script in seconds (default: 1.5)")
+    parser.add_argument('--output', help="CSV file the individual runs are appended to")
+    args = parser.parse_args()
+
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    rows, over_budget = [], []
+    for script in scripts():
+        runs = [run_once(script, importtime=(i == 0)) for i in range(args.runs)]
+        median = statistics.median(run['first_render_s'] for run in runs)
+        print(f"{script:<25} first render {median:6.3f}s (median of {args.runs}) | streamlit import {statistics.median(r['streamlit_import_s'] for r in runs):6.3f}s | process {statistics.median(r['process_s'] for r in runs):6.3f}s")
+        for seconds, name in runs[0]['slowest_imports']:
+            print(f"{'':<27}{seconds:6.3f}s  import {name}")
+        if median > args.budget:
+            over_budget.append(script)
+        for i, run in enumerate(runs):
+            rows.append({'timestamp': timestamp, 'script': script, 'run': i,
+                         **{key: round(value, 4) for key, value in run.items() if key != 'slowest_imports'}})
+
+    if args.output:
+        new_file = not os.path.exists(args.output)
+        with open(args.output, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    if over_budget:
+        print(f"Over the {args.budget}s budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,3 @@
 export $(grep -v '^#' EDIT.env | xargs)
-docker build -t ${NAME}:latest .
+docker build --build-arg CSA_EDITION=${CSA_EDITION} -t ${NAME}:latest .
 docker-compose up -d
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""Writes the memory-mapped design table shared by all Streamlit worker processes
+
+    python build_table.py                   # build/design_table.bin, or $DESIGN_TABLE
+    python build_table.py --output table.bin
+
+Run at image build time (see `Dockerfile`). The file holds one fixed-width float64 record per input combination of the
+three pages, in `util.design_table` key order, for the CSA A23.3 edition in $CSA_EDITION. Every worker maps it
+read-only, so lookups are zero-copy; a missing or stale file makes the workers fall back to building the table in memory.
+"""
+import argparse
+import os
+import time
+
+from util.design_table import TABLE_PATH, DesignTable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes the memory-mapped design table file")
+    parser.add_argument('-o', '--output', default=TABLE_PATH, help="Table file (default: $DESIGN_TABLE or build/design_table.bin)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = DesignTable.build()
+    table.write(args.output)
+    DesignTable.open(args.output)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)/1e6:.2f} MB, CSA A23.3-{table.edition}) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Maintenance commands for the shared SQLite result store (see `util/result_store.py`)
+
+    python cache.py warm     # preload every input combination offered by the pages
+    python cache.py stats    # entries, size and hit rate
+    python cache.py evict    # remove expired and least recently used entries
+    python cache.py clear
+
+The store location, TTL and size limit come from the RESULT_STORE, RESULT_STORE_TTL and RESULT_STORE_MAX_ENTRIES
+environment variables (default: `data/results.sqlite`, 30 days, 1,000,000 entries).
+"""
+import argparse
+import time
+
+from util.result_store import ResultStore, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintains the shared development length result store")
+    parser.add_argument('command', choices=('warm', 'stats', 'evict', 'clear'))
+    parser.add_argument('--path', help="Database file (default: $RESULT_STORE or data/results.sqlite)")
+    args = parser.parse_args()
+
+    store = ResultStore(args.path)
+    start = time.perf_counter()
+    if args.command == 'warm':
+        print(f"Stored {warm(store)} results in {time.perf_counter() - start:.1f}s")
+    elif args.command == 'evict':
+        print(f"Removed {store.evict()} entries")
+    elif args.command == 'clear':
+        store.clear()
+        print(f"Cleared {store.path}")
+    if args.command in ('warm', 'stats'):
+        for name, value in store.stats().items():
+            print(f"{name:>16}: {value}")
+
+
+if __name__ == '__main__':
+    main()
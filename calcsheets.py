@@ -0,0 +1,120 @@
+"""Exports a calculation package for every bar mark of a schedule
+
+    python calcsheets.py schedule.csv --output package/ --workers 8
+    python calcsheets.py schedule.csv --format pdf
+
+Every bar mark gets its own sheet with the tension (Cl. 12.2), compression (Cl. 12.3) and, where the row has a hook,
+hooked (Cl. 12.5) calculation: the same handcalcs LaTeX and k-factor justifications as the pages. HTML sheets render the
+LaTeX with KaTeX and print one sheet per page; PDF sheets are typeset with `pdflatex`, which must be on the PATH.
+
+Sheets are rendered in a `concurrent.futures` process pool and written straight to disk by the workers. The main
+process appends each chunk to `index.html` as it completes, so neither the sheets nor the package are held in memory.
+"""
+import argparse
+import html
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import raw_columns, read_raw_chunks
+from util.calcsheet import FORMATS, write_sheets
+
+INDEX_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{font-family: sans-serif}}
+table {{border-collapse: collapse}}
+td, th {{border: 1px solid #ccc; padding: 0.2em 0.6em}}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<table>
+<tr><th>Mark</th><th>Bar</th><th>l_d tension (mm)</th><th>l_d compression (mm)</th><th>l_dh (mm)</th></tr>
+"""
+INDEX_ROW = "<tr><td><a href=\"{0}\">{1}</a></td><td>{2}</td><td>{3}</td><td>{4}</td><td>{5}</td></tr>\n"
+INDEX_TAIL = "</table>\n</body>\n</html>\n"
+
+
+def render_chunk(kind, payload, directory, start, fmt):
+    """Parses one chunk and writes its sheets; runs in the worker processes"""
+    return write_sheets(raw_columns(kind, payload), directory, start, fmt)
+
+
+def export(path, directory, executor, chunksize, workers, fmt):
+    """Writes the calculation package of one schedule file
+
+    Returns:
+        int: number of sheets written
+    """
+    os.makedirs(directory, exist_ok=True)
+    sheets = 0
+    with open(os.path.join(directory, 'index.html'), 'w', encoding='utf-8') as index:
+        index.write(INDEX_HEAD.format(title=html.escape(f"Calculation package | {os.path.basename(path)}")))
+
+        def write(rows):
+            nonlocal sheets
+            for name, mark, bar, l_d, l_dc, l_dh in rows:
+                index.write(INDEX_ROW.format(html.escape(name), html.escape(mark or name), bar, l_d, l_dc, '' if l_dh is None else l_dh))
+            index.flush()
+            sheets += len(rows)
+
+        start = 0
+        if executor is None:
+            for kind, payload in read_raw_chunks(path, chunksize):
+                write(render_chunk(kind, payload, directory, start, fmt))
+                start += chunksize
+        else:
+            pending = deque()
+            for kind, payload in read_raw_chunks(path, chunksize):
+                pending.append(executor.submit(render_chunk, kind, payload, directory, start, fmt))
+                start += chunksize
+                if len(pending) >= workers*2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+        index.write(INDEX_TAIL)
+    return sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports an HTML or PDF calculation sheet for every bar mark of a schedule")
+    parser.add_argument('inputs', nargs='+', help="Schedule files (.csv, .json, .jsonl)")
+    parser.add_argument('-o', '--output', help="Output directory; only with a single input. Defaults to `<input>_calcs`")
+    parser.add_argument('--format', choices=FORMATS, default='html', help="Sheet format (default: html)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="Worker processes; 1 runs in-process (default: all cores)")
+    parser.add_argument('-c', '--chunksize', type=int, default=100, help="Sheets per chunk (default: 100)")
+    args = parser.parse_args()
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output can only be used with a single input")
+    if args.format == 'pdf' and shutil.which('pdflatex') is None:
+        parser.error("--format pdf needs `pdflatex` on the PATH")
+
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    failed = []
+    try:
+        for path in args.inputs:
+            directory = args.output or f"{os.path.splitext(path)[0]}_calcs"
+            start = time.perf_counter()
+            try:
+                sheets = export(path, directory, executor, args.chunksize, args.workers, args.format)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed.append(path)
+                continue
+            print(f"{path} -> {directory}: {sheets} sheets in {time.perf_counter() - start:.2f}s")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""Runs several Streamlit workers behind a local reverse proxy with sticky sessions
+
+    python launcher.py --workers 4 --port 8501 --address 0.0.0.0
+
+Every worker is a `streamlit run About.py` process on its own local port (`--worker-port`, `--worker-port` + 1, ...).
+The proxy pins each browser to one worker with a `devlength_worker` cookie, so that a session's websocket, file uploads
+and reconnects all reach the process holding its session state. New sessions go to the ready worker with the fewest open
+connections. All workers share the memory-mapped design table and the SQLite result store.
+
+Endpoints served by the proxy itself:
+    GET /-/health   liveness: 200 while the launcher runs
+    GET /-/ready    readiness: 200 while at least one worker is ready and the launcher is not draining, 503 otherwise;
+                    the JSON body lists the state, port and open connections of every worker
+
+Signals:
+    SIGTERM, SIGINT graceful drain: readiness turns 503 and requests without a session cookie get 503 with
+                    `Retry-After`; open sessions get up to `--drain-timeout` seconds to finish, then the workers are stopped
+    SIGHUP          rolling restart: the workers are drained and restarted one at a time; new sessions go to the others
+
+Crashed workers are restarted. The proxy works on the raw byte streams after the first request of each connection, so
+websockets and keep-alive connections pass through unchanged.
+
+Unless $JOB_PROCESSES is set, each worker's job queue (`util/jobs.py`) gets cores // workers calculation processes, so
+that background jobs do not oversubscribe the CPU shared with the interactive sessions.
+
+With $RERUN_METRICS_PORT set, worker n serves its rerun metrics (`util/rerun_metrics.py`) on $RERUN_METRICS_PORT + n.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+COOKIE = 'devlength_worker'
+MAX_HEADER_BYTES = 65_536
+#Streamlit's health endpoint moved in later versions; the first one that answers is used
+HEALTH_PATHS = ('/healthz', '/_stcore/health')
+
+_reasons = {200: 'OK', 400: 'Bad Request', 502: 'Bad Gateway', 503: 'Service Unavailable'}
+
+
+def log(message):
+    print(f"[launcher] {message}", file=sys.stderr, flush=True)
+
+
+def _response(status, payload, headers=''):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    head = (f"HTTP/1.1 {status} {_reasons[status]}\r\n"
+            f"{headers}"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Cache-Control: no-store\r\n"
+            f"Connection: close\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def _cookie(headers):
+    """Value of the sticky-session cookie in the raw request headers, or None"""
+    for line in headers.split('\r\n'):
+        name, _, value = line.partition(':')
+        if name.strip().lower() != 'cookie':
+            continue
+        for item in value.split(';'):
+            key, _, cookie = item.strip().partition('=')
+            if key == COOKIE:
+                return cookie
+    return None
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65_536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
+        pass
+
+
+def _close(writer):
+    try:
+        writer.close()
+    except (ConnectionError, OSError, RuntimeError):
+        pass
+
+
+class Worker:
+    def __init__(self, index, port, script, streamlit_args, job_processes=1):
+        """One Streamlit server process
+
+        Args:
+            index (int): Worker number, the value of the sticky-session cookie
+            port (int): Local port
+            script (str): Streamlit script
+            streamlit_args (list): Extra `streamlit run` arguments
+            job_processes (int, optional): Calculation processes of the worker's job queue (`util/jobs.py`) unless
+                $JOB_PROCESSES is set. Defaults to 1.
+        """
+        self.index = index
+        self.port = port
+        self.script = script
+        self.streamlit_args = streamlit_args
+        self.job_processes = job_processes
+        self.process = None
+        #starting -> ready -> draining -> stopped; back to starting when restarted
+        self.state = 'stopped'
+        self.connections = 0
+        self.restarts = 0
+        self.failures = 0
+        self.health_path = HEALTH_PATHS[0]
+
+    async def start(self):
+        env = dict(os.environ)
+        #One rerun metrics port per worker: $RERUN_METRICS_PORT + worker number
+        if int(env.get('RERUN_METRICS_PORT', '') or 0):
+            env['RERUN_METRICS_PORT'] = str(int(env['RERUN_METRICS_PORT']) + self.index)
+        #Every worker has its own job queue; share the cores among them instead of each taking half
+        env.setdefault('JOB_PROCESSES', str(self.job_processes))
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'streamlit', 'run', self.script,
+            f'--server.port={self.port}', '--server.address=127.0.0.1', '--server.headless=true',
+            *self.streamlit_args,
+            cwd=ROOT, env=env, stdin=asyncio.subprocess.DEVNULL)
+        self.state = 'starting'
+        self.failures = 0
+        log(f"worker {self.index} starting on port {self.port} (pid {self.process.pid})")
+
+    async def stop(self, timeout=10):
+        self.state = 'stopped'
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        log(f"worker {self.index} stopped")
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def probe(self, timeout=2):
+        """Returns True if the worker's Streamlit health endpoint answers 200"""
+        for path in (self.health_path, *(path for path in HEALTH_PATHS if path != self.health_path)):
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', self.port), timeout)
+            except (OSError, asyncio.TimeoutError):
+                return False
+            try:
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode())
+                status_line = await asyncio.wait_for(reader.readline(), timeout)
+            except (OSError, asyncio.TimeoutError):
+                return False
+            finally:
+                _close(writer)
+            parts = status_line.split()
+            if len(parts) > 1 and parts[1] == b'200':
+                self.health_path = path
+                return True
+            if len(parts) < 2 or parts[1] != b'404':
+                return False
+        return False
+
+    def status(self):
+        return {'index': self.index, 'port': self.port, 'state': self.state, 'connections': self.connections,
+                'restarts': self.restarts, 'pid': self.process.pid if self.alive else None}
+
+
+class Launcher:
+    def __init__(self, workers, address, port, worker_port, script, drain_timeout, probe_interval, streamlit_args):
+        """Reverse proxy and supervisor of `workers` Streamlit processes; see the module docstring"""
+        job_processes = max((os.cpu_count() or 1)//workers, 1)
+        self.workers = [Worker(i, worker_port + i, script, streamlit_args, job_processes) for i in range(workers)]
+        self.address = address
+        self.port = port
+        self.drain_timeout = drain_timeout
+        self.probe_interval = probe_interval
+        self.draining = False
+        self.stopped = asyncio.Event()
+        self._restarting = None
+
+    # <!-----Routing------>
+    def route(self, cookie):
+        """Worker for a request: the session's worker while it is ready, otherwise the least busy ready worker; while
+        the launcher drains only existing sessions are served, so None for requests without a session"""
+        ready = [worker for worker in self.workers if worker.state == 'ready']
+        if cookie is not None and cookie.isdigit() and int(cookie) < len(self.workers):
+            worker = self.workers[int(cookie)]
+            if worker.state == 'ready':
+                return worker
+        if self.draining:
+            return None
+        return min(ready, key=lambda worker: worker.connections, default=None)
+
+    def health(self, path):
+        ready = not self.draining and any(worker.state == 'ready' for worker in self.workers)
+        if path == '/-/health':
+            return 200, {'status': 'ok'}
+        state = 'draining' if self.draining else 'ready' if ready else 'starting'
+        return (200 if ready else 503), {'status': state, 'workers': [worker.status() for worker in self.workers]}
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            head = await client_reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, OSError):
+            _close(client_writer)
+            return
+        request_line, _, headers = head.decode('latin-1').partition('\r\n')
+        try:
+            method, target, _ = request_line.split(' ', 2)
+        except ValueError:
+            client_writer.write(_response(400, {'error': "Malformed request line"}))
+            _close(client_writer)
+            return
+        path = target.partition('?')[0]
+        if path in ('/-/health', '/-/ready'):
+            client_writer.write(_response(*self.health(path)))
+            _close(client_writer)
+            return
+
+        cookie = _cookie(headers)
+        worker = self.route(cookie)
+        if worker is None and self.draining:
+            client_writer.write(_response(503, {'error': "Shutting down; no new sessions"}, "Retry-After: 5\r\n"))
+            _close(client_writer)
+            return
+        if worker is None:
+            client_writer.write(_response(503, {'error': "No worker is ready"}))
+            _close(client_writer)
+            return
+        try:
+            backend_reader, backend_writer = await asyncio.open_connection('127.0.0.1', worker.port, limit=MAX_HEADER_BYTES)
+        except OSError:
+            client_writer.write(_response(502, {'error': f"Worker {worker.index} is not reachable"}))
+            _close(client_writer)
+            return
+
+        worker.connections += 1
+        peer = client_writer.get_extra_info('peername')
+        forwarded = f"X-Forwarded-For: {peer[0]}\r\n" if peer else ""
+        upstream = asyncio.ensure_future(_pipe(client_reader, backend_writer))
+        try:
+            backend_writer.write(head[:-2] + forwarded.encode('latin-1') + b'\r\n')
+            response = await backend_reader.readuntil(b'\r\n\r\n')
+            if cookie != str(worker.index):
+                set_cookie = f"Set-Cookie: {COOKIE}={worker.index}; Path=/; HttpOnly; SameSite=Lax\r\n"
+                response = response[:-2] + set_cookie.encode('latin-1') + b'\r\n'
+            client_writer.write(response)
+            downstream = asyncio.ensure_future(_pipe(backend_reader, client_writer))
+            await asyncio.wait((upstream, downstream), return_when=asyncio.FIRST_COMPLETED)
+            downstream.cancel()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, OSError):
+            pass
+        finally:
+            upstream.cancel()
+            worker.connections -= 1
+            _close(backend_writer)
+            _close(client_writer)
+
+    # <!-----Supervision------>
+    async def supervise(self):
+        """Probes the workers, marks them ready/unhealthy and restarts crashed ones"""
+        while not self.stopped.is_set():
+            for worker in self.workers:
+                if worker.state in ('stopped', 'draining'):
+                    continue
+                if not worker.alive:
+                    log(f"worker {worker.index} exited with code {worker.process.returncode}; restarting")
+                    worker.restarts += 1
+                    await worker.start()
+                    continue
+                healthy = await worker.probe()
+                if healthy and worker.state == 'starting':
+                    log(f"worker {worker.index} ready on port {worker.port}")
+                    worker.state = 'ready'
+                worker.failures = 0 if healthy else worker.failures + 1
+                if worker.state == 'ready' and worker.failures >= 3:
+                    log(f"worker {worker.index} failed 3 health checks")
+                    worker.state = 'starting'
+            try:
+                await asyncio.wait_for(self.stopped.wait(), self.probe_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self, workers):
+        """Waits until `workers` have no open connections, at most `drain_timeout` seconds"""
+        deadline = time.monotonic() + self.drain_timeout
+        while any(worker.connections for worker in workers) and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+
+    async def rolling_restart(self):
+        for worker in self.workers:
+            if self.draining:
+                return
+            log(f"draining worker {worker.index} for restart")
+            worker.state = 'draining'
+            await self.drain([worker])
+            await worker.stop()
+            worker.restarts += 1
+            await worker.start()
+            deadline = time.monotonic() + 120
+            while worker.state == 'starting' and time.monotonic() < deadline and not self.draining:
+                await asyncio.sleep(self.probe_interval)
+        log("rolling restart complete")
+
+    def restart(self):
+        if self._restarting is None or self._restarting.done():
+            self._restarting = asyncio.ensure_future(self.rolling_restart())
+
+    async def shutdown(self):
+        if self.draining:
+            return
+        self.draining = True
+        log(f"draining: waiting up to {self.drain_timeout}s for {sum(w.connections for w in self.workers)} connections")
+        await self.drain(self.workers)
+        self.stopped.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, lambda: asyncio.ensure_future(self.shutdown()))
+        if hasattr(signal, 'SIGHUP'):
+            loop.add_signal_handler(signal.SIGHUP, self.restart)
+
+        for worker in self.workers:
+            await worker.start()
+        server = await asyncio.start_server(
+            self.handle, self.address, self.port, limit=MAX_HEADER_BYTES, reuse_address=True, backlog=1024)
+        log(f"proxy on http://{self.address}:{self.port} for {len(self.workers)} workers")
+        supervisor = asyncio.ensure_future(self.supervise())
+        try:
+            await self.stopped.wait()
+        finally:
+            server.close()
+            supervisor.cancel()
+            await asyncio.gather(*(worker.stop() for worker in self.workers))
+        log("stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs several Streamlit workers behind a reverse proxy with sticky sessions",
+        epilog="Arguments after `--` are passed to every `streamlit run`")
+    parser.add_argument('-w', '--workers', type=int, default=int(os.environ.get('WORKERS', 0)) or os.cpu_count(),
+                        help="Streamlit processes (default: $WORKERS or all cores)")
+    parser.add_argument('--address', default='127.0.0.1', help="Proxy address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8501, help="Proxy port (default: 8501)")
+    parser.add_argument('--worker-port', type=int, default=8600, help="Port of the first worker (default: 8600)")
+    parser.add_argument('--script', default='About.py', help="Streamlit script (default: About.py)")
+    parser.add_argument('--drain-timeout', type=float, default=30, help="Seconds open sessions get on shutdown/restart (default: 30)")
+    parser.add_argument('--probe-interval', type=float, default=1, help="Seconds between health checks (default: 1)")
+    parser.add_argument('streamlit_args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    streamlit_args = args.streamlit_args[1:] if args.streamlit_args[:1] == ['--'] else args.streamlit_args
+
+    asyncio.run(Launcher(
+        args.workers, args.address, args.port, args.worker_port, args.script, args.drain_timeout,
+        args.probe_interval, streamlit_args).run())
+
+
+if __name__ == '__main__':
+    main()
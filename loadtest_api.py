@@ -0,0 +1,99 @@
+"""Load test for `api.py`
+
+Opens `--connections` keep-alive connections and sends requests back-to-back on each for `--duration` seconds,
+then reports throughput and latency percentiles.
+
+    python api.py --port 8000 &
+    python loadtest_api.py --port 8000 --connections 32 --duration 10 --endpoint /tension
+    python loadtest_api.py --port 8000 --endpoint /hooked/batch --batch 1000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+BARS = ['10M', '15M', '20M', '25M', '30M', '35M', '45M', '55M']
+
+
+def random_request(rng):
+    return {
+        'bar': rng.choice(BARS),
+        'fc': rng.choice(range(20, 65, 5)),
+        'fy': rng.choice(range(300, 550, 50)),
+        'ties': rng.random() < 0.5,
+        'coating': rng.choice(['uncoated', 'epoxy', 'epoxy_low_cover']),
+        'density': rng.choice(['normal', 'semi-low', 'low']),
+        'hook': rng.choice(['90', '180']),
+        'side_cover': rng.random() < 0.5,
+    }
+
+
+def build_request(host, port, endpoint, payload):
+    body = json.dumps(payload).encode()
+    head = (f"POST {endpoint} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def client(host, port, requests, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[i % len(requests)])
+            i += 1
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b' 200 ' not in status_line:
+                errors.append(status_line)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    rng = random.Random(0)
+    if args.batch:
+        requests = [build_request(args.host, args.port, args.endpoint, [random_request(rng) for _ in range(args.batch)]) for _ in range(10)]
+    else:
+        requests = [build_request(args.host, args.port, args.endpoint, random_request(rng)) for _ in range(1000)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(args.host, args.port, requests, deadline, latencies, errors) for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda q: latencies[min(int(q*len(latencies)), len(latencies) - 1)]*1000
+    rows = max(args.batch, 1)
+    print(f"{len(latencies)} requests in {elapsed:.1f}s over {args.connections} connections | errors: {len(errors)}")
+    print(f"throughput: {len(latencies)/elapsed:,.0f} req/s ({len(latencies)*rows/elapsed:,.0f} bars/s)")
+    print(f"latency ms: mean {statistics.mean(latencies)*1000:.2f} | p50 {percentile(0.5):.2f} | p95 {percentile(0.95):.2f} | p99 {percentile(0.99):.2f} | max {latencies[-1]*1000:.2f}")
+    if errors:
+        print(f"first error: {errors[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the development length API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--endpoint', default='/tension')
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--batch', type=int, default=0, help="Requests per batch; use with a /batch endpoint (default: 0, single requests)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
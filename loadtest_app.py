@@ -0,0 +1,276 @@
+"""Load test for the Streamlit app: N concurrent browser sessions driving the calculation pages
+
+Every simulated session opens one page over Streamlit's websocket protocol (the same protobuf `BackMsg`/`ForwardMsg`
+messages the browser sends and receives) and then changes one input per rerun: the f'c/fy sliders, the bar select box,
+the radio buttons or the checkboxes, picked at random. The time from sending a rerun to the server's `script_finished`
+message is one rerun latency.
+
+    python launcher.py --workers 4 &          # or: streamlit run About.py
+    python loadtest_app.py --port 8501 --sessions 1,5,10,20,40 --duration 20
+    python loadtest_app.py --pages Tension --sessions 50 --output sizing.csv
+
+For every session count the run reports reruns, throughput, p50/p95/p99/max rerun latency, errors and the resident
+memory (RSS) of the Streamlit processes: the worker pids listed by the launcher's `/-/ready` endpoint, otherwise every
+local `streamlit run` process. Needs `streamlit` (for the protocol messages) and `tornado` (installed with streamlit).
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import statistics
+import time
+import urllib.request
+
+PAGES = ('Tension', 'Compression', 'Hooked')
+#Websocket endpoint; moved in later Streamlit versions
+STREAM_PATHS = ('/stream', '/_stcore/stream')
+#Widget types changed by the sessions; the sidebar toggle of `input_form` is left alone
+DRIVEN = ('slider', 'selectbox', 'checkbox', 'radio')
+SKIPPED_LABELS = ("Deferred calculation",)
+
+
+# <!-----Process memory------>
+def worker_pids(host, port):
+    """Pids of the Streamlit processes serving `host:port`
+
+    Returns:
+        list: pids from the launcher's readiness endpoint, or of every local `streamlit run` process
+    """
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/-/ready", timeout=2) as response:
+            return [worker['pid'] for worker in json.load(response)['workers'] if worker['pid']]
+    except (OSError, ValueError, KeyError):
+        pass
+    pids = []
+    for pid in filter(str.isdigit, os.listdir('/proc') if os.path.isdir('/proc') else []):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                command = f.read().split(b'\0')
+        except OSError:
+            continue
+        if b'streamlit' in b' '.join(command) and b'run' in command:
+            pids.append(int(pid))
+    return pids
+
+
+def rss_mb(pids):
+    """Total resident memory of `pids` in MB; None where /proc is not available"""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            return None
+    return total/1024
+
+
+# <!-----Session------>
+class Session:
+    def __init__(self, url, page, rng):
+        """One simulated browser tab on `page`
+
+        Args:
+            url (str): Websocket URL of the app stream
+            page (str): Page name as in the sidebar, e.g. "Tension"
+            rng (random.Random): Source of the input changes
+        """
+        self.url = url
+        self.page = page
+        self.rng = rng
+        self.connection = None
+        self.page_script_hash = ''
+        #Widget id -> (type name, proto of the element) from the latest run, and the values sent so far
+        self.widgets = {}
+        self.states = {}
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+        self.connection = await websocket_connect(self.url, max_message_size=256*1024*1024)
+        return await self.rerun(changed=False)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def _change(self):
+        """Changes one driven widget at random; returns False if the page has none"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        candidates = [(id_, kind, element) for id_, (kind, element) in self.widgets.items()
+                      if kind in DRIVEN and element.label not in SKIPPED_LABELS]
+        if not candidates:
+            return False
+        id_, kind, element = self.rng.choice(candidates)
+        state = WidgetState(id=id_)
+        if kind == 'slider':
+            steps = int(round((element.max - element.min)/element.step)) if element.step else 0
+            state.double_array_value.data.append(element.min + self.rng.randint(0, steps)*element.step)
+        elif kind in ('selectbox', 'radio'):
+            state.int_value = self.rng.randrange(max(len(element.options), 1))
+        else:
+            previous = self.states.get(id_)
+            state.bool_value = not (previous.bool_value if previous is not None else element.default)
+        self.states[id_] = state
+        return True
+
+    async def rerun(self, changed=True):
+        """Sends one rerun with the current widget states and waits for the script to finish
+
+        Returns:
+            float, bool: latency in seconds and whether the run finished without a compile error or exception
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        if changed:
+            self._change()
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.query_string = ''
+        client_state.widget_states.widgets.extend(self.states.values())
+        fields = client_state.DESCRIPTOR.fields_by_name
+        if 'page_name' in fields:
+            client_state.page_name = self.page
+        if 'page_script_hash' in fields:
+            client_state.page_script_hash = self.page_script_hash
+
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        widgets, ok = {}, True
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise ConnectionError("Websocket closed by the server")
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'new_session' and hasattr(forward.new_session, 'page_script_hash'):
+                self.page_script_hash = forward.new_session.page_script_hash
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element_type = forward.delta.new_element.WhichOneof('type')
+                element = getattr(forward.delta.new_element, element_type) if element_type else None
+                if element_type == 'exception':
+                    ok = False
+                elif element is not None and 'id' in element.DESCRIPTOR.fields_by_name and element.id:
+                    widgets[element.id] = (element_type, element)
+            elif kind == 'page_not_found':
+                raise ValueError(f"Page `{self.page}` not found")
+            elif kind == 'script_finished':
+                #FINISHED_SUCCESSFULLY = 0, FINISHED_WITH_COMPILE_ERROR = 1
+                ok = ok and forward.script_finished != 1
+                break
+        latency = time.perf_counter() - start
+        #Widget ids change when a label does (e.g. the coating options follow the bar size); drop stale states
+        self.widgets = widgets
+        self.states = {id_: state for id_, state in self.states.items() if id_ in widgets}
+        return latency, ok
+
+
+async def stream_url(host, port):
+    """Websocket URL of the app stream, trying the endpoint of every supported Streamlit version"""
+    from tornado.websocket import websocket_connect
+    for path in STREAM_PATHS:
+        url = f"ws://{host}:{port}{path}"
+        try:
+            connection = await websocket_connect(url)
+        except Exception:
+            continue
+        connection.close()
+        return url
+    raise ConnectionError(f"No Streamlit websocket at {host}:{port}{list(STREAM_PATHS)}")
+
+
+async def session_loop(url, page, seed, deadline, latencies, errors, think):
+    session = Session(url, page, random.Random(seed))
+    try:
+        await session.connect()
+        while time.perf_counter() < deadline:
+            latency, ok = await session.rerun()
+            latencies.append(latency)
+            if not ok:
+                errors.append(f"{page}: script error")
+            if think:
+                await asyncio.sleep(think)
+    except (OSError, ConnectionError, ValueError) as e:
+        errors.append(f"{page}: {e}")
+    finally:
+        session.close()
+
+
+async def step(url, pages, sessions, duration, think, pids):
+    """Runs `sessions` concurrent sessions for `duration` seconds
+
+    Returns:
+        dict: one result row
+    """
+    latencies, errors, memory = [], [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    tasks = [asyncio.ensure_future(session_loop(url, pages[i % len(pages)], i, deadline, latencies, errors, think))
+             for i in range(sessions)]
+    while not all(task.done() for task in tasks):
+        memory.append(rss_mb(pids))
+        await asyncio.sleep(0.5)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda q: latencies[min(int(q*len(latencies)), len(latencies) - 1)]*1000 if latencies else float('nan')
+    memory = [value for value in memory if value is not None]
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'reruns_per_s': round(len(latencies)/elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies)*1000, 1) if latencies else float('nan'),
+        'p50_ms': round(percentile(0.5), 1),
+        'p95_ms': round(percentile(0.95), 1),
+        'p99_ms': round(percentile(0.99), 1),
+        'max_ms': round(latencies[-1]*1000, 1) if latencies else float('nan'),
+        'errors': len(errors),
+        'workers': len(pids),
+        'rss_mb': round(memory[-1], 1) if memory else None,
+        'peak_rss_mb': round(max(memory), 1) if memory else None,
+        'first_error': errors[0] if errors else '',
+    }
+
+
+async def run(args):
+    url = await stream_url(args.host, args.port)
+    pids = worker_pids(args.host, args.port)
+    print(f"{url} | pages: {', '.join(args.pages)} | {len(pids)} Streamlit processes")
+    columns = ('sessions', 'reruns', 'reruns_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'errors', 'rss_mb', 'peak_rss_mb')
+    print(' | '.join(f"{column:>12}" for column in columns))
+    rows = []
+    for sessions in args.sessions:
+        row = await step(url, args.pages, sessions, args.duration, args.think, pids)
+        rows.append(row)
+        print(' | '.join(f"{str(row[column]):>12}" for column in columns), flush=True)
+        if row['first_error']:
+            print(f"first error: {row['first_error']}")
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the Streamlit app with concurrent websocket sessions")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8501)
+    parser.add_argument('--sessions', default='1,5,10,20', help="Comma-separated concurrent session counts, one step each (default: 1,5,10,20)")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds per step (default: 20)")
+    parser.add_argument('--pages', default=','.join(PAGES), help=f"Comma-separated pages, assigned round-robin (default: {','.join(PAGES)})")
+    parser.add_argument('--think', type=float, default=0, help="Pause between reruns of one session in seconds (default: 0)")
+    parser.add_argument('--output', help="Write the results to this CSV file")
+    args = parser.parse_args()
+    try:
+        args.sessions = [int(value) for value in args.sessions.split(',')]
+    except ValueError:
+        parser.error("--sessions must be comma-separated integers")
+    args.pages = [page.strip() for page in args.pages.split(',') if page.strip()]
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
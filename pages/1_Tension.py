@@ -1,8 +1,17 @@
-from this import d
+import math
 import streamlit as st
-from handcalcs.decorator import handcalc
-from math import sqrt
-import pandas as pd
+from util.handcalc_steps import development_length_case1, development_length_case2
+from util.bars import DESIGNATIONS, get_bar
+from util.custom_streamlit_configs import count_rerun, input_form, latex_mode, scenario_manager, submit_inputs, write_latex
+from util.sweep import sweep_chart
+from util.inverse import bar_designations, max_bar, min_f_prime_c, solve_joints, FC_MAX
+from util.design_table import FY, get_table, TABLE_VERSION, ceil_mm, chart_to_html
+from util.result_store import get_store
+from util.editions import FACTORS, factor_latex
+from util.rerun_metrics import rerun_timer
+
+#Phase timings of this rerun; a no-op unless RERUN_METRICS_PORT is set
+timer = rerun_timer('tension')
 
 
 #Remove Extra Padding from all sides of the page and top/bottom of sidebar
@@ -30,6 +39,7 @@ hide_st_style = """
                 </style>
                 """
 st.markdown(hide_st_style,unsafe_allow_html = True) 
+timer.lap('css')
 
 input = {
     'fc': 25,
@@ -49,34 +59,30 @@ input = {
     "density_factor":"Normal-density concrete"
 }
 
-bar_df = pd.DataFrame({
-    'bars': ['10M', '15M', '20M', '25M', '30M', '35M', '45M', '55M'],
-    'size': [11.3, 16, 19.5, 25.2, 29.9, 35.7, 43.7, 56.4],
-    'area': [100, 200, 300, 500, 700, 1000, 1500, 2500],
-    'hook dia': [60, 90, 100, 150, 200, 250, 400, 550]
-    })
 
 # <!-----Functions------>
 
-# <!-----Handcalc functions------>
-@handcalc(precision=1,right="\ mm", scientific_notation=False)
-def basic_dev_length(d_b, f_y, f_prime_c):
-    l_db = max((0.24*d_b*f_y)/sqrt(f_prime_c),0.044*d_b*f_y) #Cl. 12.3.2
-    return locals()
-    
-@handcalc(precision=2, right="\ mm")
-def development_length_case1(k_1, k_2, k_3, k_4, f_y, f_prime_c, d_b):
-    l_d = max(0.45*min(k_1*k_2, 1.7)*k_3*k_4*f_y/sqrt(f_prime_c)*d_b, 300)
-    return locals()
-
-@handcalc(precision=2, right="\ mm")
-def development_length_case2(k_1, k_2, k_3, k_4, f_y, f_prime_c, d_b):
-    l_d = max(0.6*min(k_1*k_2, 1.7)*k_3*k_4*f_y/sqrt(f_prime_c)*d_b, 300)
-    return locals()
 # <!-----Other functions------>
-def update_inputs():
-    for key in input.keys():
-        st.session_state[key] = input[key]
+def get_coating_options(d_b):
+    return (
+        f"Epoxy coated rebat with clear cover < {int(d_b*3)}mm or with clearspcing between bars < {int(d_b*6)}mm",
+        "For all other epoxy-coated reinforcement",
+        "Uncoated reinforcement")
+
+density_options = (
+    "Structural low-density concrete",
+    "Structural semi-low-density concrete",
+    "Normal-density concrete")
+
+def update_inputs(values):
+    values = dict(values)
+    #Scenarios store the radio choices as option index
+    if type(values.get('coating_factor')) == int:
+        values['coating_factor'] = get_coating_options(get_bar(values['bar']).size)[values['coating_factor']]
+    if type(values.get('density_factor')) == int:
+        values['density_factor'] = density_options[values['density_factor']]
+    for key in values.keys():
+        st.session_state[key] = values[key]
 
 # <!-----Heading------>
 st.header("Tension development length | Cl. 12.2")
@@ -87,7 +93,8 @@ for key in input.keys():
     if key not in st.session_state:
         st.session_state[key] = input[key]
 
-left_column, right_column = st.columns(2)
+form = input_form('tension_inputs')
+left_column, right_column = form.columns(2)
 with left_column:
     input['fc'] = st.slider(
         label="Concrete compressive Strength (f'c)", 
@@ -104,13 +111,15 @@ with left_column:
         step=50, 
         key='fy')
 
-    options = tuple(bar_df['bars'])
+    options = DESIGNATIONS
     input['bar'] = st.selectbox(label='Bar size',
                                 options=options,
                                 key='bar')
     if type(input['bar']) == int:
         input['bar'] = options[input['bar']]
-    d_b = bar_df[bar_df['bars']==input['bar']]['size'].iloc[0]
+    timer.lap('widgets')
+    d_b = get_bar(input['bar']).size
+    timer.lap('bar_lookup')
 
     st.write("**Cases**")
     input['ties'] = st.checkbox(
@@ -136,63 +145,36 @@ with right_column:
         key='bar_location_factor')
 
     st.markdown("**Coating Factor (k2)**")
-    coating_options = (
-        f"Epoxy coated rebat with clear cover < {int(d_b*3)}mm or with clearspcing between bars < {int(d_b*6)}mm",
-        "For all other epoxy-coated reinforcement",
-        "Uncoated reinforcement")
+    coating_options = get_coating_options(d_b)
     input['coating_factor'] = st.radio(
         label = "Choose one of the following:",
         options = coating_options,
         key="coating_factor")
 
     st.markdown("**Concrete Density Factor (k3)**")
-    density_options = (
-        "Structural low-density concrete",
-        "Structural semi-low-density concrete",
-        "Normal-density concrete")
     input['density_factor'] = st.radio(
         label = "Choose one of the following:",
         options = density_options,
         key="density_factor")
+submit_inputs(form)
+latex_mode()
+count_rerun('tension', input)
+timer.lap('widgets')
 
 # <!-----Calculations------>
 if input['ties'] or input['stirrups'] or input['case3']:
     case = 1
 else:
     case = 2
-if input['bar_location_factor']:
-    k_1 = 1.3
-    k_1_latex = "k_{1} = 1.3\ (Cl. 12.2.4.a)"
-else:
-    k_1 = 1.0
-    k_1_latex = "k_{1} = 1.0\ (Cl. 12.2.4.a)"
-
-if input['coating_factor'] == coating_options[0]:
-    k_2 = 1.5
-    k_2_latex = "k_{2} = 1.3\ (Cl. 12.2.4.b)"
-elif input['coating_factor'] == coating_options[1]:
-    k_2 = 1.2
-    k_2_latex = "k_{2} = 1.2\ (Cl. 12.2.4.b)"
-elif input['coating_factor'] == coating_options[2]:
-    k_2 = 1.0
-    k_2_latex = "k_{2} = 1.0\ (Cl. 12.2.4.b)"
-
-if input['density_factor'] == density_options[0]:
-    k_3 = 1.3
-    k_3_latex = "k_{3} = 1.3\ (Cl. 12.2.4.c)"
-elif input['density_factor'] == density_options[1]:
-    k_3 = 1.2
-    k_3_latex = "k_{3} = 1.2\ (Cl. 12.2.4.c)"
-elif input['density_factor'] == density_options[2]:
-    k_3 = 1.0
-    k_3_latex = "k_{3} = 1.0\ (Cl. 12.2.4.c)"
-
-if input['bar'] in ['10M', '15M', '20M']:
-    k_4 = 0.8
-    k_4_latex = "k_{4} = 0.8\ (Bar\ size \leq 20M\ |\ Cl. 12.2.4.d)"
-else:
-    k_4 = 1.0
-    k_4_latex = "k_{4} = 1.0\ (Bar\ size > 20M\ |\ Cl. 12.2.4.d)"
+#Option codes of the k-factors; values and justifications come from the active edition's factor tables
+factor_codes = {
+    'k_1': int(input['bar_location_factor']),
+    'k_2': coating_options.index(input['coating_factor']),
+    'k_3': density_options.index(input['density_factor']),
+    'k_4': int(d_b > 20)}
+k_1, k_2, k_3, k_4 = (float(FACTORS['tension'][name].values[code]) for name, code in factor_codes.items())
+k_1_latex, k_2_latex, k_3_latex, k_4_latex = (factor_latex('tension', name, code) for name, code in factor_codes.items())
+timer.lap('k_factors')
 
 if case == 1:
     calc_latex, calc_value = development_length_case1(
@@ -214,19 +196,79 @@ else:
         f_prime_c=input['fc'],
         d_b=d_b
     )
+timer.lap('handcalcs')
+table = get_table()
+table_key = dict(
+    case=case,
+    bar_location=input['bar_location_factor'],
+    coating=factor_codes['k_2'],
+    density=factor_codes['k_3'])
+l_d = float(get_store().lengths('tension', input['fc'], input['fy'], input['bar'], **table_key))
+timer.lap('table_lookup')
+
 # <!-----Results tab------>
 st.subheader("Result")
-st.latex("l_{d}="+ str(int(calc_value['l_d'])) + '\ mm⁺')
+st.latex("l_{d}="+ str(ceil_mm(l_d)) + '\ mm⁺')
 st.write(f"⁺For the bar being developed: min. clear cover = {round(d_b,1)} mm and min. clear spacing = {round(1.4*d_b,1)} mm; per Cl. 12.2.3")
 
 # <!-----Calculations tab------>
 st.subheader("Calculation")
-st.latex(k_1_latex)
-st.latex(k_2_latex)
-st.latex(k_3_latex)
-st.latex(k_4_latex)
-st.latex(calc_latex)
-st.latex("l_{d}="+ str(int(calc_value['l_d'])) + '\ mm')
+write_latex([
+    k_1_latex,
+    k_2_latex,
+    k_3_latex,
+    k_4_latex,
+    calc_latex,
+    "l_{d}="+ str(ceil_mm(calc_value['l_d'])) + '\ mm'])
+timer.lap('latex')
+
+# <!-----Design aid------>
+with st.expander("Design aid"):
+    chart = table.design_aid('tension', input['fy'], **table_key)
+    caption = f"l_d (mm) for fy = {input['fy']} MPa with the cases and modification factors selected above | Table v{TABLE_VERSION}"
+    st.write(caption)
+    st.table(chart)
+    st.download_button(
+        label="Export design aid",
+        file_name=f"Tension_design_aid_fy{input['fy']}.html",
+        mime="text/html",
+        data=chart_to_html(chart, caption))
 
+# <!-----Sweep------>
+with st.expander("Sweep"):
+    sweep_fy = st.multiselect("fy (MPa)", options=FY, default=[input['fy']], key='sweep_fy')
+    st.write("l_d (mm) vs. f'c for every bar size with the factors selected above")
+    st.altair_chart(sweep_chart('tension', sweep_fy, **table_key), use_container_width=True)
 
+# <!-----Inverse------>
+with st.expander("Inverse: minimum f'c / largest bar for an available embedment"):
+    available = st.number_input("Available embedment (mm)", min_value=0.0, value=float(round(l_d)), step=10.0, key='inverse_available')
+    fc_min = float(min_f_prime_c('tension', available, d_b, input['fy'], **table_key))
+    bar_max = str(bar_designations(max_bar('tension', available, input['fc'], input['fy'], **table_key)))
+    st.write(f"Minimum f'c for {input['bar']}: " + (f"{fc_min:.1f} MPa" if not math.isnan(fc_min) else f"none up to {FC_MAX} MPa"))
+    st.write(f"Largest bar at f'c = {input['fc']} MPa: {bar_max or 'none'}")
+    joints = st.file_uploader(
+        "Joints CSV: `available` (mm) and optionally `mark`, `bar`, `fc`, `fy` per joint; other inputs as selected above",
+        type='csv',
+        key='inverse_joints')
+    if joints is not None:
+        try:
+            solved = solve_joints('tension', joints, input['bar'], input['fc'], input['fy'], **table_key)
+        except (ValueError, KeyError) as e:
+            st.error(str(e))
+        else:
+            st.dataframe(solved)
+            st.download_button(
+                label="Download results",
+                file_name="Tension_inverse.csv",
+                mime="text/csv",
+                data=solved.to_csv(index=False))
 
+# <!-----Save/Load------>
+scenario_manager(
+    'tension',
+    {**input, 'coating_factor': table_key['coating'], 'density_factor': table_key['density']},
+    [l_d],
+    update_inputs)
+timer.lap('expanders')
+timer.finish()
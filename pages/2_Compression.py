@@ -1,9 +1,18 @@
+import math
 import streamlit as st
-from handcalcs.decorator import handcalc
-from math import sqrt
-import pandas as pd
-from datetime import datetime
-import json
+from util.handcalc_steps import basic_dev_length, compression_development_length as development_length
+from util.bars import DESIGNATIONS, get_bar
+from util.custom_streamlit_configs import count_rerun, input_form, latex_mode, scenario_manager, submit_inputs, write_latex
+from util.sweep import sweep_chart
+from util.inverse import bar_designations, max_bar, min_f_prime_c, solve_joints, FC_MAX
+from util.design_table import FY, get_table, TABLE_VERSION, ceil_mm, chart_to_html
+from util.result_store import get_store
+from util.editions import FACTORS, factor_latex
+from util.rerun_metrics import rerun_timer
+
+#Phase timings of this rerun; a no-op unless RERUN_METRICS_PORT is set
+timer = rerun_timer('compression')
+
 #Remove Extra Padding from all sides of the page and top/bottom of sidebar
 st.markdown("""
             <style>
@@ -29,6 +38,7 @@ hide_st_style = """
                 </style>
                 """
 st.markdown(hide_st_style,unsafe_allow_html = True) 
+timer.lap('css')
 
 input = {
     'fc': 25,
@@ -38,30 +48,13 @@ input = {
     '10M': False
 }
 
-bar_df = pd.DataFrame({
-    'bars': ['10M', '15M', '20M', '25M', '30M', '35M', '45M', '55M'],
-    'size': [11.3, 16, 19.5, 25.2, 29.9, 35.7, 43.7, 56.4],
-    'area': [100, 200, 300, 500, 700, 1000, 1500, 2500],
-    'hook dia': [60, 90, 100, 150, 200, 250, 400, 550]
-    })
 
 # <!-----Functions------>
 
-# <!-----Handcalc functions------>
-@handcalc(precision=1,right="\ mm", scientific_notation=False)
-def basic_dev_length(d_b, f_y, f_prime_c):
-    l_db = max((0.24*d_b*f_y)/sqrt(f_prime_c),0.044*d_b*f_y) #Cl. 12.3.2
-    return locals()
-    
-@handcalc(precision=2, right="\ mm")
-def development_length(l_db, k_1):
-
-    l_d = max(l_db*k_1, 200)
-    return locals()
 # <!-----Other functions------>
-def update_inputs():
-    for key in input.keys():
-        st.session_state[key] = input[key]
+def update_inputs(values):
+    for key in values.keys():
+        st.session_state[key] = values[key]
 
 # <!-----Heading------>
 st.header("Compression development length | Cl. 12.3")
@@ -72,7 +65,8 @@ for key in input.keys():
     if key not in st.session_state:
         st.session_state[key] = input[key]
 
-input['fc'] = st.slider(
+form = input_form('compression_inputs')
+input['fc'] = form.slider(
     label="Concrete compressive Strength (f'c)", 
     min_value=5, 
     max_value=60, 
@@ -80,51 +74,107 @@ input['fc'] = st.slider(
     help="Clause 12.1.2 limits the max. concrete strength to 64MPa",
     key='fc')
 
-input['fy'] = st.slider(
+input['fy'] = form.slider(
     label="Steel tensile Strength (fy)", 
     min_value=300, 
     max_value=500, 
     step=50, 
     key='fy')
 
-options = tuple(bar_df['bars'])
-input['bar'] = st.selectbox(label='Bar size',
+options = DESIGNATIONS
+input['bar'] = form.selectbox(label='Bar size',
                             options=options,
                             key='bar')
 if type(input['bar']) == int:
     input['bar'] = options[input['bar']]
+timer.lap('widgets')
+d_b = get_bar(input['bar']).size
+timer.lap('bar_lookup')
 
-input['spiral'] = st.checkbox(
+input['spiral'] = form.checkbox(
     label="Reinforcement enclosed within spiral rebar > Ø6mm and <100mm pitch",
     key='spiral')
 
-input['10M'] = st.checkbox(
+input['10M'] = form.checkbox(
     label = "Reinforcement enclosed within 10M ties in compliance with Cl. 7.6.5 and spaced < 100mm",
-    key=['10M'],
+    key='10M',
     help="Cl. 7.6.5 refers to `Ties for compression members`"
 )
+submit_inputs(form)
+latex_mode()
+count_rerun('compression', input)
+timer.lap('widgets')
 # <!-----Calculations------>
-if input['spiral'] or input['10M']:
-    modification_latex = "k_1 = 0.75\ |\ (Modification Factor\ |\ Cl. 12.3.3.b)"
-    k_1 = 0.75
-else:
-    modification_latex = "k_1 = 1.0\ |\ (Modification Factor\ |\ Cl. 12.3.3.b)"
-    k_1 = 1.0
+confined = input['spiral'] or input['10M']
+modification_latex = factor_latex('compression', 'k_1', confined)
+k_1 = float(FACTORS['compression']['k_1'].values[int(confined)])
+timer.lap('k_factors')
 
 # <!-----Results tab------>
 st.subheader("Result")
+timer.lap('latex')
 basic_dev_latex, basic_dev_value = basic_dev_length(
-    d_b=bar_df[bar_df['bars']==input['bar']]['size'].iloc[0],
+    d_b=d_b,
     f_y = input['fy'],
     f_prime_c = input['fc'])
 result_latex, result_value = development_length(
     l_db=basic_dev_value['l_db'],
     k_1 = k_1
 )
-st.latex("l_{d} = " + str(int(result_value['l_d'])) + '\ mm')
+timer.lap('handcalcs')
+table = get_table()
+l_d = float(get_store().lengths('compression', input['fc'], input['fy'], input['bar'], confined=confined))
+timer.lap('table_lookup')
+st.latex("l_{d} = " + str(ceil_mm(l_d)) + '\ mm')
 
 # <!-----Calculations tab------>
 st.subheader("Calculation")
-st.latex(basic_dev_latex)
-st.latex(modification_latex)
-st.latex(result_latex)
+write_latex([basic_dev_latex, modification_latex, result_latex])
+timer.lap('latex')
+
+# <!-----Design aid------>
+with st.expander("Design aid"):
+    chart = table.design_aid('compression', input['fy'], confined=confined)
+    caption = f"l_d (mm) for fy = {input['fy']} MPa with the modification factor selected above | Table v{TABLE_VERSION}"
+    st.write(caption)
+    st.table(chart)
+    st.download_button(
+        label="Export design aid",
+        file_name=f"Compression_design_aid_fy{input['fy']}.html",
+        mime="text/html",
+        data=chart_to_html(chart, caption))
+
+# <!-----Sweep------>
+with st.expander("Sweep"):
+    sweep_fy = st.multiselect("fy (MPa)", options=FY, default=[input['fy']], key='sweep_fy')
+    st.write("l_d (mm) vs. f'c for every bar size with the factors selected above")
+    st.altair_chart(sweep_chart('compression', sweep_fy, confined=confined), use_container_width=True)
+
+# <!-----Inverse------>
+with st.expander("Inverse: minimum f'c / largest bar for an available embedment"):
+    available = st.number_input("Available embedment (mm)", min_value=0.0, value=float(round(l_d)), step=10.0, key='inverse_available')
+    fc_min = float(min_f_prime_c('compression', available, d_b, input['fy'], confined=confined))
+    bar_max = str(bar_designations(max_bar('compression', available, input['fc'], input['fy'], confined=confined)))
+    st.write(f"Minimum f'c for {input['bar']}: " + (f"{fc_min:.1f} MPa" if not math.isnan(fc_min) else f"none up to {FC_MAX} MPa"))
+    st.write(f"Largest bar at f'c = {input['fc']} MPa: {bar_max or 'none'}")
+    joints = st.file_uploader(
+        "Joints CSV: `available` (mm) and optionally `mark`, `bar`, `fc`, `fy` per joint; other inputs as selected above",
+        type='csv',
+        key='inverse_joints')
+    if joints is not None:
+        try:
+            solved = solve_joints('compression', joints, input['bar'], input['fc'], input['fy'], confined=confined)
+        except (ValueError, KeyError) as e:
+            st.error(str(e))
+        else:
+            st.dataframe(solved)
+            st.download_button(
+                label="Download results",
+                file_name="Compression_inverse.csv",
+                mime="text/csv",
+                data=solved.to_csv(index=False))
+
+# <!-----Save/Load------>
+scenario_manager('compression', input, [l_d], update_inputs)
+timer.lap('expanders')
+timer.finish()
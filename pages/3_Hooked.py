@@ -1,9 +1,18 @@
+import math
 import streamlit as st
-from handcalcs.decorator import handcalc
-from math import sqrt
-import pandas as pd
-from datetime import datetime
-import json
+from util.handcalc_steps import calculation_steps, hooked_development_length as development_length
+from util.bars import DESIGNATIONS, get_bar
+from util import hooked
+from util.custom_streamlit_configs import count_rerun, input_form, latex_mode, scenario_manager, submit_inputs, write_latex
+from util.sweep import sweep_chart
+from util.inverse import bar_designations, max_bar, min_f_prime_c, solve_joints, FC_MAX
+from util.design_table import FY, get_table, TABLE_VERSION, ceil_mm, chart_to_html
+from util.result_store import get_store
+from util.editions import factor_latex
+from util.rerun_metrics import rerun_timer
+
+#Phase timings of this rerun; a no-op unless RERUN_METRICS_PORT is set
+timer = rerun_timer('hooked')
 
 #Remove Extra Padding from all sides of the page and top/bottom of sidebar
 st.markdown("""
@@ -30,6 +39,7 @@ hide_st_style = """
                 </style>
                 """
 st.markdown(hide_st_style,unsafe_allow_html = True) 
+timer.lap('css')
 
 input = {
     'fc': 25,
@@ -44,103 +54,13 @@ input = {
 }
 
 
-bar_df = pd.DataFrame({
-    'bars': ['10M', '15M', '20M', '25M', '30M', '35M', '45M', '55M'],
-    'size': [11.3, 16, 19.5, 25.2, 29.9, 35.7, 43.7, 56.4],
-    'area': [100, 200, 300, 500, 700, 1000, 1500, 2500],
-    'hook dia': [60, 90, 100, 150, 200, 250, 400, 550]
-    })
-
 
 # <!-----Functions------>
 
-# <!-----Handcalc functions------>
-@handcalc(precision=1)
-def calculation_steps(k_1,k_2,k_3,k_4,d_b,f_prime_c,f_y):
-    """Generate latex and calculate basic development length
-
-    Args:
-        k_1 (float): Side cover parameter
-        k_2 (float): Stirrup parameter
-        k_3 (float): Concrete density parameter
-        k_4 (float): Reinforcing bar parameter
-        d_b (float): Bar diameter in mm
-        f_prime_c (float): Concrete compressive strength in MPa
-        f_y (float): Rebar tensile strength in MPa
-
-    Returns:
-        latex, local_variables: Returns the latex for the substitution and the local variables for the same
-    """
-    l_hb = k_1*k_2*k_3*k_4*(100*d_b)/sqrt(f_prime_c)*f_y/400
-    return locals()
-
-@handcalc(precision=1)
-def development_length(l_hb, d_b):
-    """Generate latex and calculate hooked development length
-
-    Args:
-        l_hb (float): basic development length in mm
-        d_b (float): Bar diameter in mm
-
-    Returns:
-        latex, local_variables: Returns the latex for the substitution and the local variables for the same
-    """
-    l_dh = max(l_hb, 150, 8*d_b)
-    return locals()
-
 # <!-----Other functions------>
-def k1(input):
-    """Calculates side cover parameter based on inputs
-
-    Args:
-        input (dict): Dict. with all inputs defined
-
-    Returns:
-        float,str: returns the k1 parameter and comment justification
-    """
-    k_1 = 1.0
-    if input['bar'] != "45M" and input['bar'] != "55M":
-        if not input['side_cover']:
-            if input['Hook'] == '90°':
-                if input['tail_cover']:
-                    k_1 = 0.7
-                    comment = "Side cover > 60mm\ |\ 90°\ hook\ |\ Tail\ cover > 50mm"
-                else:
-                    comment = "Tail cover <= 50mm"
-            else:
-                k_1 = 0.7
-                comment = "Side cover > 60mm"
-        else:
-            comment = "Side cover < 60mm"
-    else:
-        comment = "Bar size > 35M"
-    comment += "\ |\ Cl. 12.5.3.b"
-    return k_1, comment
-
-def k2(input):
-    """Calculates stirrup parameter based on inputs
-
-    Args:
-        input (dict): Dict. with all inputs defined
-
-    Returns:
-        float,str: returns the k2 parameter and comment justification
-    """
-    k_2 = 1.0
-    if input['bar'] != "45M" and input['bar'] != "55M":
-        if input['3_stirrups']:
-            k_2 = 0.8
-            comment = "Ties/Stirrup\ requirement\ met"
-        else:
-            comment = "Ties/Stirrup\ requirement\ not\ met"
-    else:
-        comment = "Bar size > 35M"
-    comment += "\ |\ Cl. 12.5.3.c"
-    return k_2, comment
-
-def update_inputs():
-    for key in input.keys():
-        st.session_state[key] = input[key]
+def update_inputs(values):
+    for key in values.keys():
+        st.session_state[key] = values[key]
     return
 
 # <!-----Heading------>
@@ -148,7 +68,8 @@ st.header("Development of standard hooks in tension | Cl. 12.5")
 # <!-----Inputs------>
 st.subheader("Inputs")
 
-left_column, right_column = st.columns(2)
+form = input_form('hooked_inputs')
+left_column, right_column = form.columns(2)
 
 for key in input.keys():
     if key not in st.session_state:
@@ -170,12 +91,15 @@ with left_column:
         step=50, 
         key='fy')
 
-    options = tuple(bar_df['bars'])
+    options = DESIGNATIONS
     input['bar'] = st.selectbox(label='Bar size',
                                 options=options,
                                 key='bar')
     if type(input['bar']) == int:
         input['bar'] = options[input['bar']]
+    timer.lap('widgets')
+    bar = get_bar(input['bar'])
+    timer.lap('bar_lookup')
 
     options = ('180°', '90°')
     input['Hook'] = st.selectbox(label='Hook type',
@@ -193,77 +117,104 @@ with right_column:
                                       help="For 90° hooks, cover on bar extension beyond the hook is not less than 50mm", 
                                       key='tail_cover')
     input['3_stirrups'] = st.checkbox(label="Atleast 3 stirrups or ties", 
-                                      help=f"Hook is enclosed vertically/horizontally within 3 ties/stirrups spaced along a length of > {int(bar_df[bar_df['bars']==input['bar']]['hook dia'].iloc[0])} mm and a spacing <= {round(bar_df[bar_df['bars']==input['bar']]['size'].iloc[0]*3,1)} mm", 
+                                      help=f"Hook is enclosed vertically/horizontally within 3 ties/stirrups spaced along a length of > {int(bar.hook_dia)} mm and a spacing <= {round(bar.size*3,1)} mm", 
                                       key='3_stirrups')
     input['epoxy_bars'] = st.checkbox(label="Epoxy coated bars", 
                                       key='epoxy_bars')
     input['Normal_density'] = st.checkbox(label="Normal-density concrete", 
                                           key='Normal_density')
-    
-    # uploaded_file = st.file_uploader(
-    #     label="Upload variables",
-    #     type = "json",
-    #     help="Import previously used variables",
-    #     accept_multiple_files=False
-    # )
-    # if uploaded_file is not None:
-    #     bytes_data = uploaded_file.getvalue()
-    #     input = json.load(uploaded_file)
+submit_inputs(form)
+latex_mode()
+count_rerun('hooked', input)
+timer.lap('widgets')
 
-    #     st.button(
-    #         label="Update",
-    #         on_click=update_inputs,
-    #         key="update_button"
-    #         )
-        
 # <!-----Calculations------>
-k_1, k_1_comment = k1(input)
-k_2, k_2_comment = k2(input)
-if input['Normal_density']:
-    k_3 = 1.0
-    k_3_comment = "Normal-density\ concrete\ |\ Cl.12.5.3.e"
-else:
-    k_3 = 1.3
-    k_3_comment = "Low-density\ concrete\ |\ Cl.12.5.3.e"
-
-if input['epoxy_bars']:
-    k_4 = 1.2
-    k_4_comment = "Epoxy-coated\ reinforcement\ |\ Cl.12.5.3.f"
-else:
-    k_4 = 1.0
-    k_4_comment = "Normal\ reinforcement\ |\ Cl.12.5.3.f"
+factors = hooked.factors(
+    d_b=bar.size,
+    hook_90=input['Hook'] == '90°',
+    side_cover=input['side_cover'],
+    tail_cover=input['tail_cover'],
+    stirrups_3=input['3_stirrups'],
+    epoxy_bars=input['epoxy_bars'],
+    normal_density=input['Normal_density'])
+k_1, k_2, k_3, k_4 = (float(factors[f'k_{i}']) for i in range(1, 5))
+k_1_latex, k_2_latex, k_3_latex, k_4_latex = (factor_latex('hooked', f'k_{i}', factors[f'k_{i}_code']) for i in range(1, 5))
+timer.lap('k_factors')
 
 # <!-----Results tab------>
 st.subheader("Result")
+timer.lap('latex')
 calculation_latex, calculation_value = calculation_steps(
     k_1=k_1,
     k_2=k_2,
     k_3=k_3,
     k_4=k_4,
-    d_b=bar_df[bar_df['bars']==input['bar']]['size'].iloc[0],
+    d_b=bar.size,
     f_prime_c=input['fc'],
     f_y = input['fy']
     )
-result_latex, result_value = development_length(calculation_value['l_hb'], bar_df[bar_df['bars']==input['bar']]['size'].iloc[0])
-st.latex(result_latex + '\ mm\ |\ (Cl. 12.5.1)')
-st.latex("l_{dh} = " + str(int(result_value['l_dh'])) + '\ mm')
+result_latex, result_value = development_length(calculation_value['l_hb'], bar.size)
+timer.lap('handcalcs')
+table = get_table()
+table_key = dict(
+    hook=input['Hook'],
+    side_cover=input['side_cover'],
+    tail_cover=input['tail_cover'],
+    stirrups_3=input['3_stirrups'],
+    epoxy_bars=input['epoxy_bars'],
+    normal_density=input['Normal_density'])
+l_dh = float(get_store().lengths('hooked', input['fc'], input['fy'], input['bar'], **table_key))
+timer.lap('table_lookup')
+write_latex([result_latex + '\ mm\ |\ (Cl. 12.5.1)', "l_{dh} = " + str(ceil_mm(l_dh)) + '\ mm'])
 
 # <!-----Calculations tab------>
 st.subheader("Calculation")
-st.latex("k_{1} =" + str(k_1) +"\ (" + k_1_comment + ")")
-st.latex("k_{2} =" + str(k_2) +"\ (" + k_2_comment + ")")
-st.latex("k_{3} =" + str(k_3) +"\ (" + k_3_comment + ")")
-st.latex("k_{4} =" + str(k_4) +"\ (" + k_4_comment + ")")
-st.latex(calculation_latex)
-
-# #st.write(st.session_state)
-# _, middle_column,_ = st.columns(3)
-
-
-# with middle_column:
-#     st.download_button(
-#         label="Export Variables",
-#         help="Export the variables for above",
-#         file_name=f"Hooked_dev_length_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json",
-#         mime="application/json",
-#         data=json.dumps(input, indent=4))
+write_latex([k_1_latex, k_2_latex, k_3_latex, k_4_latex, calculation_latex])
+timer.lap('latex')
+
+# <!-----Design aid------>
+with st.expander("Design aid"):
+    chart = table.design_aid('hooked', input['fy'], **table_key)
+    caption = f"l_dh (mm) for fy = {input['fy']} MPa with the hook and options selected above | Table v{TABLE_VERSION}"
+    st.write(caption)
+    st.table(chart)
+    st.download_button(
+        label="Export design aid",
+        file_name=f"Hooked_design_aid_fy{input['fy']}.html",
+        mime="text/html",
+        data=chart_to_html(chart, caption))
+
+# <!-----Sweep------>
+with st.expander("Sweep"):
+    sweep_fy = st.multiselect("fy (MPa)", options=FY, default=[input['fy']], key='sweep_fy')
+    st.write("l_dh (mm) vs. f'c for every bar size with the factors selected above")
+    st.altair_chart(sweep_chart('hooked', sweep_fy, **table_key), use_container_width=True)
+
+# <!-----Inverse------>
+with st.expander("Inverse: minimum f'c / largest bar for an available embedment"):
+    available = st.number_input("Available embedment (mm)", min_value=0.0, value=float(round(l_dh)), step=10.0, key='inverse_available')
+    fc_min = float(min_f_prime_c('hooked', available, bar.size, input['fy'], **table_key))
+    bar_max = str(bar_designations(max_bar('hooked', available, input['fc'], input['fy'], **table_key)))
+    st.write(f"Minimum f'c for {input['bar']}: " + (f"{fc_min:.1f} MPa" if not math.isnan(fc_min) else f"none up to {FC_MAX} MPa"))
+    st.write(f"Largest bar at f'c = {input['fc']} MPa: {bar_max or 'none'}")
+    joints = st.file_uploader(
+        "Joints CSV: `available` (mm) and optionally `mark`, `bar`, `fc`, `fy` per joint; other inputs as selected above",
+        type='csv',
+        key='inverse_joints')
+    if joints is not None:
+        try:
+            solved = solve_joints('hooked', joints, input['bar'], input['fc'], input['fy'], **table_key)
+        except (ValueError, KeyError) as e:
+            st.error(str(e))
+        else:
+            st.dataframe(solved)
+            st.download_button(
+                label="Download results",
+                file_name="Hooked_inverse.csv",
+                mime="text/csv",
+                data=solved.to_csv(index=False))
+
+# <!-----Save/Load------>
+scenario_manager('hooked', input, [l_dh], update_inputs)
+timer.lap('expanders')
+timer.finish()
@@ -0,0 +1,52 @@
+import streamlit as st
+from util.schedule import schedule_columns
+from util.custom_streamlit_configs import job_panel
+
+#Remove Extra Padding from all sides of the page and top/bottom of sidebar
+st.markdown("""
+            <style>
+                .css-12oz5g7 {
+                    padding-top: 0rem;
+                    padding-bottom: 0rem;
+                    padding-left: 0rem;
+                    padding-right: 0rem;
+                }
+                .css-uc76bn{
+                    padding-top: 2rem;
+                    padding-bottom: 2rem;
+                }
+            </style>""", unsafe_allow_html=True)
+
+# ---- HIDE STREAMLIT STYLE ----
+
+hide_st_style = """
+                <style>
+                #MainMenu{visibility: hidden;}
+                footer{visibility: hidden;}
+                header{visibility: hidden;}
+                </style>
+                """
+st.markdown(hide_st_style,unsafe_allow_html = True)
+
+# <!-----Heading------>
+st.header("Bar schedule | Cl. 12.2, 12.3 & 12.5")
+# <!-----Inputs------>
+st.subheader("Inputs")
+st.write("Upload a CSV bar schedule with one bar mark per row. Recognized columns (all optional except `bar`) and their defaults:")
+st.table({'column': list(schedule_columns), 'default': [str(value) for value in schedule_columns.values()]})
+st.write("`coating`: `uncoated`, `epoxy` or `epoxy_low_cover` | `density`: `normal`, `semi-low` or `low` | `hook`: `90`, `180` or blank for straight bars")
+
+uploaded_file = st.file_uploader(
+    label="Upload bar schedule",
+    type="csv",
+    accept_multiple_files=False)
+chunksize = st.select_slider(
+    label="Rows per chunk",
+    options=[1_000, 5_000, 10_000, 50_000, 100_000],
+    value=10_000)
+
+# <!-----Calculations------>
+#Uploads run as background jobs of the server process; the page only submits them and polls their progress, so
+#reruns, reconnects and other users' jobs do not interrupt them
+st.subheader("Result")
+job_panel('schedule', uploaded_file, chunksize)
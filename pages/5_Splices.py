@@ -0,0 +1,83 @@
+import streamlit as st
+from util.schedule import schedule_columns
+from util.splice import splice_columns, splice_summary, CLASS_FACTORS, MIN_LAP
+from util.custom_streamlit_configs import job_panel
+from util.jobs import get_queue
+
+#Remove Extra Padding from all sides of the page and top/bottom of sidebar
+st.markdown("""
+            <style>
+                .css-12oz5g7 {
+                    padding-top: 0rem;
+                    padding-bottom: 0rem;
+                    padding-left: 0rem;
+                    padding-right: 0rem;
+                }
+                .css-uc76bn{
+                    padding-top: 2rem;
+                    padding-bottom: 2rem;
+                }
+            </style>""", unsafe_allow_html=True)
+
+# ---- HIDE STREAMLIT STYLE ----
+
+hide_st_style = """
+                <style>
+                #MainMenu{visibility: hidden;}
+                footer{visibility: hidden;}
+                header{visibility: hidden;}
+                </style>
+                """
+st.markdown(hide_st_style,unsafe_allow_html = True)
+
+#Number of governing (highest utilization) splices kept for display
+WORST_ROWS = 100
+
+# <!-----Heading------>
+st.header("Tension lap splices | Cl. 12.15")
+# <!-----Inputs------>
+st.subheader("Inputs")
+st.write("Upload a CSV splice schedule with one lap splice per row, e.g. every splice of a slab or wall. "
+         "The tension columns of the Schedule page apply, plus:")
+st.table({
+    'column': list(splice_columns),
+    'default': ['blank', '1.0', '1.0', 'blank'],
+    'meaning': [
+        "Lap length provided (mm); blank rows are calculated but not checked",
+        "As provided / As required over the length of the splice",
+        "Fraction of the total reinforcement spliced within the required lap length",
+        "`A`, `B` or blank to classify per Cl. 12.15.2"]})
+st.write(f"Class A: l_s = {CLASS_FACTORS[0]} l_d where area_ratio >= 2 and spliced_fraction <= 0.5 | "
+         f"Class B: l_s = {CLASS_FACTORS[1]} l_d otherwise | l_s >= {MIN_LAP} mm (Cl. 12.15.1)")
+with st.expander("Tension columns"):
+    st.table({'column': list(schedule_columns), 'default': [str(value) for value in schedule_columns.values()]})
+
+uploaded_file = st.file_uploader(
+    label="Upload splice schedule",
+    type="csv",
+    accept_multiple_files=False)
+chunksize = st.select_slider(
+    label="Rows per chunk",
+    options=[1_000, 5_000, 10_000, 50_000, 100_000],
+    value=10_000)
+
+# <!-----Calculations------>
+#Background job as on the Schedule page; the summary of a finished job is read from its result file once per session
+st.subheader("Result")
+jobs = job_panel('splices', uploaded_file, chunksize)
+finished = [job for job in jobs if job['status'] == 'done']
+if finished:
+    job = finished[0]
+    if st.session_state.get('splice_summary', {}).get('id') != job['id']:
+        checked, failed, worst = splice_summary(get_queue().result_path(job['id']), WORST_ROWS)
+        st.session_state['splice_summary'] = {'id': job['id'], 'checked': checked, 'failed': failed, 'worst': worst}
+    summary = st.session_state['splice_summary']
+
+    st.write(f"Latest finished job: {job['name']}")
+    left_column, middle_column, right_column = st.columns(3)
+    left_column.metric("Splices checked", summary['checked'])
+    middle_column.metric("Too short (NG)", summary['failed'])
+    if summary['worst'] is not None and len(summary['worst']):
+        right_column.metric("Max. utilization", f"{summary['worst']['utilization'].iloc[0]:.3f}")
+        st.write(f"Governing splices (up to {WORST_ROWS}), highest required/provided first")
+        st.dataframe(summary['worst'].reset_index(drop=True))
@@ -7,5 +7,5 @@ docker container rm $id
 
 git pull
 
-docker build -t ${NAME}:latest .
+docker build --build-arg CSA_EDITION=${CSA_EDITION} -t ${NAME}:latest .
 docker-compose up -d
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from util import compression, hooked, tension
+from util.editions import SQRT_F_PRIME_C_MAX, handcalc_f_prime_c, sqrt_f_prime_c
+
+
+def test_sqrt_f_prime_c_is_capped_at_8_mpa():
+    np.testing.assert_allclose(sqrt_f_prime_c([25, 64, 100]), [5, SQRT_F_PRIME_C_MAX, SQRT_F_PRIME_C_MAX])
+
+
+@pytest.mark.parametrize("length", [
+    lambda f_prime_c: tension.development_length(f_prime_c, 400, 25.2, 1.0, 1.0, 1.0, 1.0, 2),
+    lambda f_prime_c: compression.basic_development_length(25.2, 400, f_prime_c),
+    lambda f_prime_c: hooked.basic_development_length(0.7, 0.8, 1.0, 1.0, 25.2, f_prime_c, 400),
+], ids=['tension', 'compression', 'hooked'])
+def test_lengths_stop_decreasing_above_64_mpa(length):
+    assert length(100) == pytest.approx(length(64))
+    assert length(25) > length(64)
+
+
+def test_handcalc_f_prime_c_matches_the_capped_engines():
+    f_prime_c = handcalc_f_prime_c([25, 64, 100])
+    assert f_prime_c == [25, 64, 64]
+    assert all(type(value) == float for value in f_prime_c)
+    np.testing.assert_allclose(np.sqrt(f_prime_c), sqrt_f_prime_c([25, 64, 100]))
@@ -0,0 +1,53 @@
+import io
+
+import numpy as np
+import pytest
+
+from util.schedule import calculate_columns, csv_records, hooked_results, parse_columns, result_columns, schedule_columns
+
+
+def test_blank_cells_take_the_defaults():
+    columns = parse_columns({'bar': ['20M', '20M', '20M'], 'fc': ['', None, 30], 'coating': ['', None, 'Epoxy']})
+    np.testing.assert_array_equal(columns['fc'], [schedule_columns['fc'], schedule_columns['fc'], 30])
+    np.testing.assert_array_equal(columns['fy'], [schedule_columns['fy']]*3)
+    np.testing.assert_array_equal(columns['coating'], ['uncoated', 'uncoated', 'epoxy'])
+
+
+def test_missing_columns_take_the_defaults():
+    columns = parse_columns({'bar': ['10M']})
+    assert columns['fc'].tolist() == [schedule_columns['fc']]
+    assert columns['hook'].tolist() == ['']
+
+
+@pytest.mark.parametrize("fc", [0, -25, float('inf'), 'inf', float('nan'), 'nan', 'None', 'abc'])
+def test_rejects_fc_that_is_not_a_positive_number(fc):
+    with pytest.raises(ValueError, match='`fc`'):
+        parse_columns({'bar': ['15M'], 'fc': [fc]})
+
+
+@pytest.mark.parametrize("fc", [[[25, 30]], [{'a': 1}], np.array([[25], [30]])])
+def test_rejects_more_than_one_value_per_row(fc):
+    with pytest.raises(ValueError, match='single value per row'):
+        parse_columns({'fc': fc})
+
+
+@pytest.mark.parametrize("column, value", [('bar', '12M'), ('coating', 'galvanized'), ('density', 'heavy')])
+def test_rejects_unknown_choices(column, value):
+    with pytest.raises(ValueError):
+        parse_columns({column: [value]})
+
+
+def test_csv_records_keep_quoted_line_breaks_in_one_record():
+    text = 'mark,bar\r\n"A\r\nB",15M\r\n"C ""q""\nD",20M\nE,25M\n'
+    records = list(csv_records(io.StringIO(text, newline='')))
+    assert records == ['mark,bar\r\n', '"A\r\nB",15M\r\n', '"C ""q""\nD",20M\n', 'E,25M\n']
+
+
+def test_results_carry_the_hooked_factors_behind_l_dh():
+    raw = {'bar': ['20M', '20M'], 'hook': ['', '90°'], 'side_cover': [False, True]}
+    result = calculate_columns(raw)
+    assert list(result.columns) == result_columns
+    hooked_factors = ['h_k_1', 'h_k_2', 'h_k_3', 'h_k_4']
+    assert result.loc[0, hooked_factors + ['l_dh']].isna().all()
+    expected = hooked_results(parse_columns(raw))
+    assert result.loc[1, hooked_factors].tolist() == [expected[f'k_{i}'][1] for i in range(1, 5)]
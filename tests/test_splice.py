@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from util.splice import calculate_splices, lap_length, parse_splices, splice_class, splice_result_columns
+
+
+def test_class_a_needs_double_area_and_at_most_half_spliced():
+    area_ratio = [2.0, 2.5, 1.9, 2.0]
+    spliced_fraction = [0.5, 0.25, 0.5, 0.6]
+    np.testing.assert_array_equal(splice_class(area_ratio, spliced_fraction), [0, 0, 1, 1])
+
+
+def test_lap_length_is_class_factor_times_l_d_and_at_least_300mm():
+    np.testing.assert_allclose(lap_length([500, 500, 200, 200], [0, 1, 0, 1]), [500, 650, 300, 300])
+
+
+def test_given_class_overrides_the_automatic_class():
+    columns = parse_splices({'area_ratio': [3, 3, 1], 'spliced_fraction': [0.5, 0.5, 1], 'splice_class': ['', 'b', 'A']})
+    np.testing.assert_array_equal(columns['class_code'], [0, 1, 0])
+
+
+@pytest.mark.parametrize("column, value", [
+    ('splice_class', 'C'), ('provided', -1), ('area_ratio', 0), ('spliced_fraction', 0), ('spliced_fraction', 1.5)])
+def test_rejects_invalid_splices(column, value):
+    with pytest.raises(ValueError):
+        parse_splices({column: [value]})
+
+
+def test_status_is_blank_without_a_provided_length():
+    result = calculate_splices({'bar': ['15M', '15M', '15M'], 'provided': ['', 2000, 100]})
+    assert list(result.columns) == splice_result_columns
+    assert result['status'].tolist() == ['', 'OK', 'NG']
+    assert np.isnan(result['utilization'][0])
+    np.testing.assert_allclose(result['l_s'], 1.3*result['l_d'], atol=0.1)
@@ -0,0 +1,65 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+Bar = namedtuple('Bar', ['designation', 'size', 'area', 'hook_dia'])
+Bar.__doc__ = """Reinforcing bar; `size` is the nominal diameter in mm, `area` in mm² and `hook_dia` the standard hook diameter in mm"""
+
+CATALOGUE = (
+    Bar('10M', 11.3, 100, 60),
+    Bar('15M', 16.0, 200, 90),
+    Bar('20M', 19.5, 300, 100),
+    Bar('25M', 25.2, 500, 150),
+    Bar('30M', 29.9, 700, 200),
+    Bar('35M', 35.7, 1000, 250),
+    Bar('45M', 43.7, 1500, 400),
+    Bar('55M', 56.4, 2500, 550),
+)
+
+DESIGNATIONS = tuple(bar.designation for bar in CATALOGUE)
+BY_DESIGNATION = MappingProxyType({bar.designation: bar for bar in CATALOGUE})
+#Integer bar code, i.e. the position of the bar in `CATALOGUE`
+CODES = MappingProxyType({bar.designation: code for code, bar in enumerate(CATALOGUE)})
+
+
+def _read_only(values, dtype):
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+#Per-field arrays indexed by bar code, for vectorized gathers
+SIZES = _read_only([bar.size for bar in CATALOGUE], float)
+AREAS = _read_only([bar.area for bar in CATALOGUE], float)
+HOOK_DIAS = _read_only([bar.hook_dia for bar in CATALOGUE], float)
+
+
+def get_bar(designation):
+    """Returns the catalogue entry for a bar designation
+
+    Args:
+        designation (str): Bar designation, e.g. "15M"
+
+    Returns:
+        Bar: catalogue entry
+    """
+    try:
+        return BY_DESIGNATION[designation]
+    except KeyError:
+        raise KeyError(f"Unknown bar size `{designation}`. Expected one of {list(DESIGNATIONS)}") from None
+
+
+def bar_codes(designations):
+    """Converts an iterable of bar designations to an array of integer bar codes
+
+    Args:
+        designations (iterable of str): Bar designations
+
+    Returns:
+        numpy.ndarray: int8 bar codes, usable as index into `SIZES`, `AREAS` and `HOOK_DIAS`
+    """
+    try:
+        return np.fromiter((CODES[designation] for designation in designations), dtype=np.int8)
+    except KeyError as e:
+        raise ValueError(f"Unknown bar size `{e.args[0]}`. Expected one of {list(DESIGNATIONS)}") from None
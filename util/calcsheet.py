@@ -0,0 +1,231 @@
+import html
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from functools import lru_cache
+from string import Template
+
+from util.design_table import ceil_mm
+from util.editions import EDITION, factor_latex, handcalc_f_prime_c
+from util.latex import math_body
+from util.schedule import (coating_codes, compression_results, density_codes, hooked_results, parse_columns,
+                           tension_results)
+
+FORMATS = ('html', 'pdf')
+
+# <!-----Templates------>
+_html = {
+    'sheet': """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/katex@0.16.4/dist/katex.min.css">
+<script defer src="https://cdn.jsdelivr.net/npm/katex@0.16.4/dist/katex.min.js"></script>
+<script defer src="https://cdn.jsdelivr.net/npm/katex@0.16.4/dist/contrib/auto-render.min.js"
+    onload="renderMathInElement(document.body, {delimiters: [{left: '\\\\[', right: '\\\\]', display: true}]})"></script>
+<style>
+body {font-family: sans-serif; max-width: 50em; margin: auto}
+table {border-collapse: collapse}
+td, th {border: 1px solid #ccc; padding: 0.2em 0.6em; text-align: left}
+.result {font-weight: bold}
+@media print {section {break-inside: avoid}}
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p>Development length per CSA A23.3-$edition Cl. 12</p>
+<table>
+$inputs
+</table>
+$sections
+</body>
+</html>
+""",
+    'input': "<tr><th>$name</th><td>$value</td></tr>",
+    'section': "<section>\n<h2>$title</h2>\n$equations\n<p class=\"result\">$result</p>\n</section>",
+    'equation': "<div>\\[$latex\\]</div>",
+}
+
+_tex = {
+    'sheet': r"""\documentclass[10pt]{article}
+\usepackage[margin=20mm]{geometry}
+\usepackage[T1]{fontenc}
+\usepackage{textcomp}
+\usepackage{amsmath}
+\begin{document}
+\section*{$title}
+Development length per CSA A23.3-$edition Cl. 12
+
+\begin{tabular}{ll}
+$inputs
+\end{tabular}
+$sections
+\end{document}
+""",
+    'input': r"$name & $value \\",
+    'section': "\\subsection*{$title}\n$equations\n\\textbf{$result}\n",
+    'equation': "\\[$latex\\]",
+}
+
+
+@lru_cache(maxsize=None)
+def templates(fmt):
+    """Compiled sheet templates for `fmt` ("html" or "pdf"), built once per process
+
+    Returns:
+        dict: `string.Template` per part: "sheet", "input", "section" and "equation"
+    """
+    return {name: Template(text) for name, text in (_html if fmt == 'html' else _tex).items()}
+
+
+def _tex_escape(text):
+    return re.sub(r'([&%$#_{}])', r'\\\1', str(text)).replace('~', r'\textasciitilde{}')
+
+
+# <!-----Sheet content------>
+def sheet_sections(row):
+    """Calculation steps of one bar mark; the same LaTeX and k-factor justifications as the pages
+
+    Args:
+        row (dict): One row of `parse_columns` output merged with the `tension_`, `compression_` and `hooked_results`
+            (prefixed `t_`, `c_` and `h_`), as Python scalars
+
+    Returns:
+        list: (title, [latex, ...], result) per clause
+    """
+    from util.handcalc_steps import (basic_dev_length, calculation_steps, compression_development_length,
+                                     development_length_case1, development_length_case2, hooked_development_length)
+    d_b, f_y, f_prime_c = row['d_b'], row['fy'], handcalc_f_prime_c(row['fc'])
+
+    k_1, k_2, k_3, k_4 = row['t_k_1'], row['t_k_2'], row['t_k_3'], row['t_k_4']
+    tension_latex, _ = (development_length_case1 if row['t_case'] == 1 else development_length_case2)(
+        k_1=k_1, k_2=k_2, k_3=k_3, k_4=k_4, f_y=f_y, f_prime_c=f_prime_c, d_b=d_b)
+    sections = [(
+        "Tension | Cl. 12.2",
+        [f"Case\\ {row['t_case']}\\ (Cl. 12.2.3)",
+         factor_latex('tension', 'k_1', row['bar_location']),
+         factor_latex('tension', 'k_2', coating_codes[row['coating']]),
+         factor_latex('tension', 'k_3', density_codes[row['density']]),
+         factor_latex('tension', 'k_4', d_b > 20),
+         math_body(tension_latex)],
+        f"l_d = {ceil_mm(row['t_l_d'])} mm")]
+
+    basic_latex, basic_value = basic_dev_length(d_b=d_b, f_y=f_y, f_prime_c=f_prime_c)
+    result_latex, _ = compression_development_length(l_db=basic_value['l_db'], k_1=row['c_k_1'])
+    sections.append((
+        "Compression | Cl. 12.3",
+        [math_body(basic_latex),
+         factor_latex('compression', 'k_1', row['spiral']),
+         math_body(result_latex)],
+        f"l_d = {ceil_mm(row['c_l_d'])} mm"))
+
+    if row['hook']:
+        k = [row[f'h_k_{i}'] for i in range(1, 5)]
+        steps_latex, steps_value = calculation_steps(k_1=k[0], k_2=k[1], k_3=k[2], k_4=k[3], d_b=d_b, f_prime_c=f_prime_c, f_y=f_y)
+        result_latex, _ = hooked_development_length(l_hb=steps_value['l_hb'], d_b=d_b)
+        sections.append((
+            f"Hooked ({row['hook']}) | Cl. 12.5",
+            [factor_latex('hooked', f'k_{i}', row[f'h_k_{i}_code']) for i in range(1, 5)]
+            + [math_body(steps_latex), math_body(result_latex) + "\\ mm\\ |\\ (Cl. 12.5.1)"],
+            f"l_dh = {ceil_mm(row['h_l_dh'])} mm"))
+    return sections
+
+
+_inputs = (('bar', 'Bar'), ('fc', "f'c (MPa)"), ('fy', 'fy (MPa)'), ('ties', 'Ties (Cl. 7.6.5)'),
+           ('stirrups', 'Stirrups (Cl. 11.2.8.2)'), ('case3', 'Slab/wall, spacing > 2d_b'),
+           ('bar_location', 'Top bar'), ('coating', 'Coating'), ('density', 'Concrete density'),
+           ('spiral', 'Spiral/10M ties'), ('hook', 'Hook'), ('side_cover', 'Side cover < 60mm'),
+           ('tail_cover', 'Tail cover >= 50mm'), ('3_stirrups', 'Hook within 3 ties/stirrups'))
+
+
+def _format(value):
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    return f"{value:g}" if isinstance(value, float) else str(value) or '-'
+
+
+def render_sheet(row, fmt='html'):
+    """Renders the calculation sheet of one bar mark
+
+    Args:
+        row (dict): See `sheet_sections`
+        fmt (str, optional): "html" or "pdf" (LaTeX source). Defaults to "html".
+
+    Returns:
+        str: HTML document or LaTeX source
+    """
+    parts = templates(fmt)
+    if fmt == 'html':
+        escape, math = html.escape, html.escape
+    else:
+        escape, math = _tex_escape, lambda latex: latex.replace('°', '^{\\circ}')
+    title = f"Bar mark {row['mark']}" if row['mark'] else f"Bar {row['bar']}"
+    return parts['sheet'].substitute(
+        title=escape(title),
+        edition=EDITION[2:],
+        inputs='\n'.join(parts['input'].substitute(name=escape(name), value=escape(_format(row[key]))) for key, name in _inputs),
+        sections='\n'.join(
+            parts['section'].substitute(
+                title=escape(section_title),
+                equations='\n'.join(parts['equation'].substitute(latex=math(latex)) for latex in equations),
+                result=escape(result))
+            for section_title, equations, result in sheet_sections(row)))
+
+
+# <!-----Package------>
+def sheet_rows(raw):
+    """Parses and calculates raw schedule columns and yields one `sheet_sections` row per bar mark"""
+    columns = parse_columns(raw)
+    results = {'t': tension_results(columns), 'c': compression_results(columns), 'h': hooked_results(columns)}
+    merged = {key: values.tolist() for key, values in columns.items()}
+    for prefix, result in results.items():
+        merged.update({f'{prefix}_{key}': values.tolist() for key, values in result.items()})
+    keys = list(merged)
+    for values in zip(*merged.values()):
+        yield dict(zip(keys, values))
+
+
+def _file_name(number, row):
+    return f"{number:05d}_{re.sub(r'[^A-Za-z0-9.-]+', '_', row['mark'] or row['bar'])}"
+
+
+def _compile_pdf(source, path):
+    with tempfile.TemporaryDirectory() as build:
+        tex = os.path.join(build, 'sheet.tex')
+        with open(tex, 'w', encoding='utf-8') as f:
+            f.write(source)
+        completed = subprocess.run(
+            ['pdflatex', '-interaction=batchmode', '-halt-on-error', '-output-directory', build, tex],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if completed.returncode:
+            raise RuntimeError(f"pdflatex failed for {os.path.basename(path)}")
+        shutil.move(os.path.join(build, 'sheet.pdf'), path)
+
+
+def write_sheets(raw, directory, start=0, fmt='html'):
+    """Renders and writes one sheet file per bar mark of a chunk; runs in the worker processes
+
+    Args:
+        raw (dict): Raw schedule columns, see `parse_columns`
+        directory (str): Output directory
+        start (int, optional): Number of the first row, used for the file names. Defaults to 0.
+        fmt (str, optional): "html" or "pdf"; "pdf" needs `pdflatex` on the PATH. Defaults to "html".
+
+    Returns:
+        list: (file name, mark, bar, l_d, l_dc, l_dh) per sheet; l_dh is None for bars without a hook
+    """
+    index = []
+    for number, row in enumerate(sheet_rows(raw), start=start + 1):
+        path = os.path.join(directory, f"{_file_name(number, row)}.{fmt}")
+        source = render_sheet(row, fmt)
+        if fmt == 'html':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(source)
+        else:
+            _compile_pdf(source, path)
+        index.append((os.path.basename(path), row['mark'], row['bar'], ceil_mm(row['t_l_d']), ceil_mm(row['c_l_d']),
+                      ceil_mm(row['h_l_dh']) if row['hook'] else None))
+    return index
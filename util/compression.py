@@ -0,0 +1,44 @@
+import numpy as np
+
+from util.editions import factor_values, sqrt_f_prime_c
+
+
+def modification_factor(spiral, ties_10M):
+    """Returns the modification factor k_1 per Cl. 12.3.3.b from the active edition's factor table
+
+    Args:
+        spiral (array_like of bool): Reinforcement enclosed within spiral rebar > Ø6mm and <100mm pitch
+        ties_10M (array_like of bool): Reinforcement enclosed within 10M ties per Cl. 7.6.5 and spaced < 100mm
+
+    Returns:
+        numpy.ndarray: k_1 of code 1 (0.75) where either condition is met, of code 0 (1.0) otherwise
+    """
+    return factor_values('compression', 'k_1', np.asarray(spiral, dtype=bool) | np.asarray(ties_10M, dtype=bool))
+
+
+def basic_development_length(d_b, f_y, f_prime_c):
+    """Vectorized basic compression development length per Cl. 12.3.2
+
+    Args:
+        d_b (array_like): Bar diameter in mm
+        f_y (array_like): Rebar tensile strength in MPa
+        f_prime_c (array_like): Concrete compressive strength in MPa
+
+    Returns:
+        numpy.ndarray: l_db in mm
+    """
+    d_b_f_y = np.multiply(d_b, f_y, dtype=float)
+    return np.maximum(0.24*d_b_f_y/sqrt_f_prime_c(f_prime_c), 0.044*d_b_f_y)
+
+
+def development_length(l_db, k_1):
+    """Vectorized compression development length per Cl. 12.3
+
+    Args:
+        l_db (array_like): Basic development length in mm
+        k_1 (array_like): Modification factor, see `modification_factor`
+
+    Returns:
+        numpy.ndarray: l_d in mm, not less than 200mm
+    """
+    return np.maximum(np.multiply(l_db, k_1, dtype=float), 200)
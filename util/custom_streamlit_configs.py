@@ -1,6 +1,12 @@
 import streamlit as st
-import pandas as pd
 import json
+import os
+import threading
+import numpy as np
+from datetime import datetime
+from functools import lru_cache
+from util.latex import math_body
+from util.rerun_metrics import current_timer
 
 
     
@@ -39,16 +45,319 @@ def add_footer(html):
             <p style="font-family:Source Sans Pro;">
     """
     st.markdown(footer + html + '</p></div>',unsafe_allow_html=True)
+
+
+_rerun_stats = {}
+_rerun_lock = threading.Lock()
+
+
+def input_form(key):
+    """Adds the "Deferred calculation" toggle to the sidebar and returns the container for the page inputs
+
+    With the toggle on, the inputs are grouped in an `st.form`, so that changing them does not rerun the page until
+    "Calculate" (see `submit_inputs`) is pressed. The toggle defaults to the DEFERRED_INPUTS environment variable ("1" = on).
+
+    Args:
+        key (str): Form key, unique per page
+
+    Returns:
+        streamlit container: `st.form` or `st.container`
+    """
+    deferred = st.sidebar.checkbox(
+        label="Deferred calculation",
+        value=os.environ.get('DEFERRED_INPUTS', '') == '1',
+        help="Apply input changes only when `Calculate` is pressed",
+        key='deferred_mode')
+    return st.form(key) if deferred else st.container()
+
+
+def submit_inputs(form):
+    """Adds the "Calculate" button to a form from `input_form`; does nothing in live mode"""
+    if st.session_state.get('deferred_mode'):
+        form.form_submit_button("Calculate")
+
+
+def latex_mode():
+    """Adds the "One equation block" toggle to the sidebar; defaults to the SINGLE_LATEX_BLOCK environment variable ("1" = on, the default)
+
+    Returns:
+        bool: True to render the calculation steps as one aligned block, see `write_latex`
+    """
+    return st.sidebar.checkbox(
+        label="One equation block",
+        value=os.environ.get('SINGLE_LATEX_BLOCK', '1') == '1',
+        help="Render the calculation steps as one aligned equation block instead of one block per step",
+        key='single_latex')
+
+
+@lru_cache(maxsize=1024)
+def latex_block(steps):
+    """Joins LaTeX steps into one left-aligned `aligned` environment, one row per step
+
+    Args:
+        steps (tuple of str): LaTeX of each step; the display-math delimiters added by handcalcs are removed
+
+    Returns:
+        str: LaTeX for a single `st.latex` call
+    """
+    return "\\begin{aligned}\n" + " \\\\[6pt]\n".join(f"& {math_body(step)}" for step in steps) + "\n\\end{aligned}"
+
+
+def write_latex(steps, container=st):
+    """Writes the calculation steps as one `st.latex` element, or one element per step with the "One equation block"
+    toggle off
+
+    With one element per page section the browser gets a single delta and a single KaTeX render per rerun. Elements
+    larger than `global.minCachedMessageSize` (see `.streamlit/config.toml`) are cached by the frontend, so an unchanged
+    block is sent as a hash reference only.
+
+    Args:
+        steps (list of str): LaTeX of each step
+        container (streamlit container, optional): Defaults to the main page.
+    """
+    if st.session_state.get('single_latex', True):
+        container.latex(latex_block(tuple(steps)))
+    else:
+        for step in steps:
+            container.latex(step)
+
+
+def count_rerun(page, inputs):
+    """Counts this script run for the session and the server process, and shows the session counts in the sidebar
+
+    A run whose inputs differ from the previous run of the same page is counted as a calculation; the other runs come
+    from widgets that do not change the result (expanders, downloads, ...) or repeated slider positions.
+
+    Args:
+        page (str): Page name
+        inputs (dict): Page inputs of this run
+    """
+    signature = repr(sorted(inputs.items()))
+    if 'rerun_stats' not in st.session_state:
+        st.session_state['rerun_stats'] = {}
+    session = st.session_state['rerun_stats'].setdefault(page, {'reruns': 0, 'calculations': 0, 'inputs': None})
+    changed = session['inputs'] != signature
+    session['reruns'] += 1
+    session['calculations'] += changed
+    session['inputs'] = signature
+    with _rerun_lock:
+        totals = _rerun_stats.setdefault(page, {'reruns': 0, 'calculations': 0})
+        totals['reruns'] += 1
+        totals['calculations'] += changed
+    st.sidebar.caption(
+        f"Reruns: {session['reruns']} | calculations: {session['calculations']} | "
+        f"reruns per calculation: {session['reruns']/max(session['calculations'], 1):.1f}")
+
+
+def rerun_stats():
+    """Reruns and calculations per page for all sessions of this server process
+
+    Returns:
+        list: One dict per page with page, reruns, calculations and reruns_per_calculation
+    """
+    with _rerun_lock:
+        return [{'page': page, **totals, 'reruns_per_calculation': round(totals['reruns']/max(totals['calculations'], 1), 2)}
+                for page, totals in sorted(_rerun_stats.items())]
+
+
+def _job_text(job, position):
+    if job['status'] == 'queued':
+        return f"Queued behind {position} job(s)" if position else "Queued"
+    if job['status'] == 'running':
+        return f"Running: {job['lines']} of {job['total']} rows processed"
+    if job['status'] == 'done':
+        return f"Done: {job['rows']} rows in {job['finished'] - job['started']:.1f}s"
+    if job['status'] == 'cancelled':
+        return f"Cancelled after {job['rows']} rows"
+    return f"Failed: {job['error']}"
+
+
+def job_panel(kind, uploaded_file, chunksize, poll_interval=1.0):
+    """Submits the uploaded CSV as a background job (once per file and chunk size) and shows the jobs of this session
+
+    The calculation runs in the server's `util.jobs.JobQueue`, not in the script, so the page stays responsive and a
+    reconnected tab picks the jobs up again: their ids are kept in the session state and in the URL. While a job is
+    active the page polls its progress every `poll_interval` seconds; any widget interaction interrupts the polling.
+
+    Args:
+        kind (str): One of `util.jobs.KINDS`
+        uploaded_file (UploadedFile): Upload to submit, or None
+        chunksize (int): Rows per chunk
+        poll_interval (float, optional): Seconds between progress updates. Defaults to 1.0.
+
+    Returns:
+        list: States of the jobs shown, newest first, see `util.jobs.JobQueue.status`
+    """
+    import time
+    from util.jobs import ACTIVE, get_queue
+    queue = get_queue()
+    key = f'{kind}_jobs'
+    if key not in st.session_state:
+        st.session_state[key] = []
+    ids = st.session_state[key]
+    params = st.experimental_get_query_params()
+    ids.extend(job_id for job_id in params.get(key, [''])[0].split(',') if job_id and job_id not in ids)
+
+    if uploaded_file is not None:
+        submitted = st.session_state.setdefault(f'{key}_submitted', {})
+        upload_key = f"{uploaded_file.id}_{chunksize}"
+        if upload_key not in submitted:
+            submitted[upload_key] = queue.submit(kind, uploaded_file, uploaded_file.name, chunksize)
+            ids.append(submitted[upload_key])
+    lookup = st.text_input("Follow a job", help="Job id from another tab or device", key=f'{key}_lookup').strip().lower()
+    if lookup and lookup not in ids:
+        try:
+            found = queue.status(lookup)
+        except ValueError:
+            found = None
+        if found is None or found['kind'] != kind:
+            st.warning(f"No {kind} job `{lookup}`")
+        else:
+            ids.append(lookup)
+
+    jobs = [job for job in queue.jobs(ids) if job['kind'] == kind]
+    ids[:] = [job['id'] for job in jobs]
+    if params.get(key, [''])[0] != ','.join(ids):
+        st.experimental_set_query_params(**{key: ','.join(ids)})
+
+    widgets = {}
+    for job in jobs:
+        st.markdown(f"**{job['name']}** | job `{job['id']}`")
+        progress = st.progress(1.0 if job['status'] == 'done' else min(job['lines']/max(job['total'], 1), 1.0))
+        status = st.empty()
+        status.write(_job_text(job, queue.position(job['id'])))
+        widgets[job['id']] = (progress, status)
+        download_column, stop_column = st.columns(2)
+        if job['rows']:
+            label = f"results ({job['rows']} rows)" if job['status'] == 'done' else f"partial results ({job['rows']} rows)"
+            #The result file is only read into the download on request, not on every rerun of every session showing
+            #the job; keyed by status so a partial download is prepared again once the job has finished
+            prepared = f"{key}_{job['id']}_{job['status']}_prepared"
+            if not st.session_state.get(prepared):
+                st.session_state[prepared] = download_column.button(f"Prepare {label}", key=f"{prepared}_button")
+            if st.session_state[prepared] and download_column.download_button(
+                    label=f"Download {label}",
+                    data=queue.read_result(job['id']),
+                    file_name=f"{os.path.splitext(job['name'])[0]}_{'splices' if kind == 'splices' else 'results'}.csv",
+                    mime="text/csv",
+                    key=f"{key}_{job['id']}_download"):
+                queue.mark_downloaded(job['id'])
+                del st.session_state[prepared]
+        if job['status'] in ACTIVE:
+            stop_column.button("Cancel", on_click=queue.cancel, args=(job['id'],), key=f"{key}_{job['id']}_cancel")
+        else:
+            stop_column.button("Remove", on_click=queue.remove, args=(job['id'],), key=f"{key}_{job['id']}_remove")
+
+    #Poll until the active jobs finish, then rerun once to show their final downloads
+    active = [job['id'] for job in jobs if job['status'] in ACTIVE]
+    while active:
+        time.sleep(poll_interval)
+        current = queue.jobs(active)
+        if len(current) < len(active):
+            st.experimental_rerun()
+        for job in current:
+            progress, status = widgets[job['id']]
+            progress.progress(1.0 if job['status'] == 'done' else min(job['lines']/max(job['total'], 1), 1.0))
+            status.write(_job_text(job, queue.position(job['id'])))
+            if job['status'] not in ACTIVE:
+                st.experimental_rerun()
+    return jobs
+
+
+def scenario_manager(page, inputs, results, load):
+    """Adds a "Save / load scenarios" expander that keeps a list of saved scenarios in the session state
+
+    Args:
+        page (str): One of "tension", "compression" or "hooked"
+        inputs (dict): Current page inputs, see `util.scenarios.encode`
+        results (list): Current values of `util.scenarios.RESULTS[page]`
+        load (callable): `on_click` callback taking the inputs dict of a scenario and writing it to `st.session_state`
+    """
+    from util import scenarios
+    key = f'{page}_scenarios'
+    if key not in st.session_state:
+        st.session_state[key] = []
+    rows = st.session_state[key]
+
+    with st.expander("Save / load scenarios"):
+        name_column, add_column = st.columns([3, 1])
+        name = name_column.text_input("Scenario name", value="Scenario", key=f'{key}_name')
+        if add_column.button("Add current", key=f'{key}_add'):
+            rows.append(scenarios.scenario(page, name, inputs, results))
+
+        uploaded_file = st.file_uploader(
+            label="Load scenarios",
+            type="jsonl",
+            help="Scenario file saved from this page; stored results are reused while the inputs and calculation version match",
+            key=f'{key}_file')
+        if uploaded_file is not None and st.session_state.get(f'{key}_file_id') != uploaded_file.id:
+            uploaded_file.seek(0)
+            try:
+                loaded = scenarios.read_scenarios(page, uploaded_file)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                rows.extend(loaded['rows'])
+                st.session_state[f'{key}_file_id'] = uploaded_file.id
+                st.success(f"Loaded {len(loaded['rows'])} scenarios; {loaded['recalculated']} recalculated")
+
+        if rows:
+            st.dataframe(scenarios.scenario_table(page, rows))
+            selected = st.selectbox(
+                label="Scenario",
+                options=range(len(rows)),
+                format_func=lambda i: f"{i + 1}: {rows[i][0]}",
+                key=f'{key}_selected')
+            load_column, save_column, clear_column = st.columns(3)
+            load_column.button(
+                label="Load scenario",
+                on_click=load,
+                args=(scenarios.decode(page, rows[min(selected, len(rows) - 1)][1]),),
+                key=f'{key}_load')
+            save_column.download_button(
+                label="Save scenarios",
+                file_name=f"{page.capitalize()}_scenarios_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.jsonl",
+                mime="application/x-ndjson",
+                data=''.join(scenarios.iter_lines(page, rows)),
+                key=f'{key}_save')
+            clear_column.button(label="Clear list", on_click=rows.clear, key=f'{key}_clear')
     
+CHECKS_TABLE_HEAD = """
+<style>
+    .pass {
+        background-color: #e8f9ed;
+        color: #297d43;
+        }
+    .fail {
+        background-color: #ffecec;
+        color: #96585c;
+        }
+    .warn {
+        background-color: #fffce6;
+        color: #a4832a;
+        }
+</style>
+<table align="center" border="1" cellpadding="1" cellspacing="1" summary="A summary of checks and Utilization %">
+<thead>
+    <tr>
+        <th scope="col">Checks</th>
+        <th scope="col">Util</th>
+    </tr>
+</thead>
+<tbody>
+"""
+
 class Page_layout:
-    def __init__(self, title, default_session_key_values={}):
+    def __init__(self, title, default_session_key_values={}, page_size=100):
         """Sets the Page title and default session state values
 
         Args:
             title (str): Page Title
             default_session_key_values (dict, optional): Dict of startup sessionstate keys and values, Defaults to {}
+            page_size (int, optional): Checks shown per page; longer check tables get pagination, sorting and filtering. Defaults to 100.
         """
         self.title = title
+        self.page_size = page_size
         self.calc_vars={}
         self.set_default_sessionstate_keys(default_session_key_values)
         self.setup_calc_outline()
@@ -81,8 +390,8 @@ class Page_layout:
         self.results_container = st.container()
         with self.results_container:
             self.summary_container, self.checks_container = st.columns(2)
-            self.checks_html = ""
-            self.summary_html = ""
+            self.checks_rows = []
+            self.summary_rows = []
         st.markdown('----')
             
         st.subheader('Calculations')
@@ -131,41 +440,17 @@ class Page_layout:
             status_col.warning(warn_note)
 
     def add_to_checks_container(self, title,utilization):
-        """Takes the Check title and the utilization (can be float, int or "Fail") and adds it to the `.checks_html` attribute, initializes html on first run
+        """Takes the Check title and the utilization (can be float, int or "Fail") and adds it to the `.checks_rows` buffer; rendered once in `final_cleanup`
 
         Args:
             title (str): Check title
-            utilization (float, int, "Fail"): Utilization to display on the table
+            utilization (float, int, "Fail"): Utilization to display on the table; NaN (nothing to check) shows as "N/A"
 
         Returns:
             None: None
         """
-        
-        if self.checks_html == "":
-            self.checks_html = """
-            <style>
-                .pass {
-                    background-color: #e8f9ed;
-                    color: #297d43;
-                    }
-                .fail {
-                    background-color: #ffecec;
-                    color: #96585c;
-                    }
-                .warn {
-                    background-color: #fffce6;
-                    color: #a4832a;
-                    }
-            </style>
-            <table align="center" border="1" cellpadding="1" cellspacing="1" summary="A summary of checks and Utilization %">
-            <thead>
-                <tr>
-                    <th scope="col">Checks</th>
-                    <th scope="col">Util</th>
-                </tr>
-            </thead>
-            <tbody>
-            """
+        if type(utilization) != str and np.isnan(utilization):
+            utilization = "N/A"
         if type(utilization) != str:
             if utilization > 1:
                 tag_class = "fail"
@@ -173,17 +458,28 @@ class Page_layout:
                 tag_class = "pass"
             else:
                 tag_class = "warn"
-            utilization = round(utilization*100,1)
-            self.checks_html += (f'<tr><td>{title}</td><td style="text-align: center;" class="{tag_class}">{utilization}%</td></tr>')
-
         else:
             tag_class = utilization.lower().strip()
-            self.checks_html += (f'<tr><td>{title}</td><td style="text-align: center;" class="{tag_class}">{utilization}</td></tr>')
-        
+        self.checks_rows.append((title, utilization, tag_class))
         return None
 
+    def add_many_to_checks_container(self, titles, utilizations):
+        """Adds a whole batch of checks at once, see `add_to_checks_container`
+
+        Args:
+            titles (iterable of str): Check titles
+            utilizations (iterable of float): Utilizations, same length as `titles`; NaN (nothing to check, e.g. a
+                splice without a provided length) shows as "N/A" rather than "warn"
+        """
+        utilizations = np.asarray(utilizations, dtype=float)
+        unchecked = np.isnan(utilizations)
+        tag_classes = np.select([unchecked, utilizations > 1, utilizations < 1], ["n/a", "fail", "pass"], default="warn")
+        self.checks_rows.extend(
+            (title, "N/A" if tag_class == "n/a" else utilization, tag_class)
+            for title, utilization, tag_class in zip(titles, utilizations.tolist(), tag_classes.tolist()))
+
     def add_to_summary_container(self, title,value):
-        """Takes the Summary Title and value and adds it to the `.summary_html` attribute, initializes html on first run
+        """Takes the Summary Title and value and adds it to the `.summary_rows` buffer; rendered once in `final_cleanup`
 
         Args:
             title (str): left column
@@ -192,14 +488,63 @@ class Page_layout:
         Returns:
             None: None
         """
-        
-        if self.summary_html == "":
-            self.summary_html = """
-            <table align="center" border="1" cellpadding="1" cellspacing="1"><tbody>
-            """
-
-        self.summary_html += (f'<tr><td scope="col">{title}</td><td scope="col">{value}</td></tr>')
+        self.summary_rows.append((title, value))
         return None
+
+    def _visible_checks(self):
+        """Filters, sorts and paginates `.checks_rows` with widgets in the checks container when there is more than one page
+
+        Returns:
+            list: rows to render
+        """
+        rows = self.checks_rows
+        if len(rows) <= self.page_size:
+            return rows
+        key = f"{self.title}_checks"
+        container = self.checks_container
+        filter_col, status_col = container.columns(2)
+        text = filter_col.text_input("Filter checks", key=f"{key}_filter").strip().lower()
+        tag_classes = np.array([row[2] for row in rows])
+        #Any string utilization is its own tag class (e.g. "N/A"), so the options come from the rows
+        options = [tag for tag in ("fail", "warn", "pass") if tag in tag_classes]
+        options += [tag for tag in dict.fromkeys(tag_classes.tolist()) if tag not in options]
+        statuses = status_col.multiselect("Status", options=options, default=options, key=f"{key}_status")
+        order = container.selectbox("Sort by", options=["Input order", "Utilization (high to low)", "Utilization (low to high)", "Check title"], key=f"{key}_sort")
+
+        keep = np.isin(tag_classes, statuses)
+        if text:
+            keep &= np.array([text in str(row[0]).lower() for row in rows])
+        indices = np.flatnonzero(keep)
+        if order.startswith("Utilization"):
+            #"Fail" sorts as the highest, other text utilizations ("N/A") last in either order
+            values = np.array([
+                (np.inf if row[2] == "fail" else np.nan) if type(row[1]) == str else row[1] for row in rows])[indices]
+            indices = indices[np.argsort(-values if order.endswith("(high to low)") else values, kind="stable")]
+        elif order == "Check title":
+            indices = indices[np.argsort(np.array([str(row[0]) for row in rows])[indices], kind="stable")]
+
+        pages = max(-(-len(indices)//self.page_size), 1)
+        page = container.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+        page = min(int(page), pages) - 1
+        shown = indices[page*self.page_size:(page + 1)*self.page_size]
+        container.caption(f"Showing {len(shown)} of {len(indices)} matching checks ({len(rows)} total)")
+        return [rows[i] for i in shown]
+
+    def render_checks(self):
+        """Renders the checks table once, showing only the current page of rows"""
+        cells = []
+        for title, utilization, tag_class in self._visible_checks():
+            if type(utilization) != str:
+                utilization = f"{round(utilization*100,1)}%"
+            cells.append(f'<tr><td>{title}</td><td style="text-align: center;" class="{tag_class}">{utilization}</td></tr>')
+        self.checks_container.write(CHECKS_TABLE_HEAD + ''.join(cells) + "</tbody></table>", unsafe_allow_html=True)
+
+    def render_summary(self):
+        """Renders the summary table once"""
+        cells = ''.join(f'<tr><td scope="col">{title}</td><td scope="col">{value}</td></tr>' for title, value in self.summary_rows)
+        self.summary_container.write(
+            '<table align="center" border="1" cellpadding="1" cellspacing="1"><tbody>' + cells + "</tbody></table>",
+            unsafe_allow_html=True)
     
     @staticmethod
     def hide_streamlit_footer():
@@ -217,33 +562,36 @@ class Page_layout:
         st.markdown(hide_st_style,unsafe_allow_html = True) 
     
     def final_cleanup(self, hide_default_footer=False):
+        timer = current_timer()
         #Display the checks table
-        if self.checks_html != "":
-            self.checks_html += "</tbody></table>"
-            self.checks_container.write(self.checks_html, unsafe_allow_html=True)
+        if self.checks_rows:
+            with timer.phase('checks'):
+                self.render_checks()
         #Display summary_table
-        if self.summary_html != "":
-            self.summary_html += "</tbody></table>"
-            self.summary_container.write(self.summary_html, unsafe_allow_html=True)
+        if self.summary_rows:
+            with timer.phase('checks'):
+                self.render_summary()
             
         #Remove Extra Padding from all sides of the page and top/bottom of sidebar
-        st.markdown("""
-                    <style>
-                        .css-12oz5g7 {
-                            padding-top: 0rem;
-                            padding-bottom: 0rem;
-                            padding-left: 0rem;
-                            padding-right: 0rem;
-                        }
-                        .css-uc76bn{
-                            padding-top: 2rem;
-                            padding-bottom: 2rem;
-                        }
-                    </style>""", unsafe_allow_html=True)
+        with timer.phase('css'):
+            st.markdown("""
+                        <style>
+                            .css-12oz5g7 {
+                                padding-top: 0rem;
+                                padding-bottom: 0rem;
+                                padding-left: 0rem;
+                                padding-right: 0rem;
+                            }
+                            .css-uc76bn{
+                                padding-top: 2rem;
+                                padding-bottom: 2rem;
+                            }
+                        </style>""", unsafe_allow_html=True)
         
         #Hide default streamlit footer and menu
         if hide_default_footer:
-            self.hide_streamlit_footer()
+            with timer.phase('css'):
+                self.hide_streamlit_footer()
 
     @staticmethod
     def write_formula_to_container(container, latex, prefix=None, suffix = None):
@@ -273,16 +621,21 @@ class Page_layout:
         if suffix:
             suffix_col.write(suffix)
         
-        formula_col.latex(latex)
+        with current_timer().phase('latex'):
+            formula_col.latex(latex)
     
+    @staticmethod
+    def write_formulas_to_container(container, latex):
+        """Writes several calculation steps to the passed container at once, see `write_latex`
+
+        Args:
+            container (streamlit container): streamlit container to write the items to
+            latex (list of str): Latex string/formula of each step
+        """
+        with current_timer().phase('latex'):
+            write_latex(latex, container)
+
     def run_handcalc_function(self, function, *vars):
-        self.latex, self.value = function(*vars)
+        with current_timer().phase('handcalcs'):
+            self.latex, self.value = function(*vars)
         self.update_calc_vars(self.value)
-
-            
-bar_df = pd.DataFrame({
-    'bars': ['10M', '15M', '20M', '25M', '30M', '35M', '45M', '55M'],
-    'size': [11.3, 16, 19.5, 25.2, 29.9, 35.7, 43.7, 56.4],
-    'area': [100, 200, 300, 500, 700, 1000, 1500, 2500],
-    'hook dia': [60, 90, 100, 150, 200, 250, 400, 550]
-    })
@@ -0,0 +1,258 @@
+import mmap
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from util import compression, hooked, tension
+from util.bars import CODES, DESIGNATIONS as BARS, SIZES
+from util.editions import EDITION, FACTORS, factor_values
+
+#Bump whenever a formula, factor or axis changes so that saved tables are rebuilt
+TABLE_VERSION = 2
+
+#Discrete input axes, in the same order as the widgets on the pages
+FC = tuple(range(5, 65, 5))
+FY = tuple(range(300, 550, 50))
+HOOKS = ('180°', '90°')
+HOOKS_90 = np.array([hook == '90°' for hook in HOOKS])
+#Coating (k_2) and density (k_3) options for Cl. 12.2.4 of the active edition, in the order of the radio buttons on the Tension page
+COATING_FACTORS = tuple(FACTORS['tension']['k_2'].values.tolist())
+DENSITY_FACTORS = tuple(FACTORS['tension']['k_3'].values.tolist())
+
+#Memory-mapped table file written at image build time (`build_table.py`); override with the DESIGN_TABLE environment variable
+TABLE_PATH = os.environ.get(
+    'DESIGN_TABLE', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'build', 'design_table.bin'))
+#Table file layout: one header record padded to _HEADER_BYTES, then l_d, l_db, l_dc and l_dh as little-endian float64
+#records in key order
+_MAGIC = b'DEVLTBL1'
+_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('edition', 'S4'), ('counts', '<u8', (4,))])
+_HEADER_BYTES = 64
+_ARRAYS = ('l_d', 'l_db', 'l_dc', 'l_dh')
+
+#Radix of every key component; the first entry varies slowest
+TENSION_AXES = (len(FC), len(FY), len(BARS), 2, 2, len(COATING_FACTORS), len(DENSITY_FACTORS))
+COMPRESSION_AXES = (len(FC), len(FY), len(BARS), 2)
+HOOKED_AXES = (len(FC), len(FY), len(BARS), len(HOOKS), 2, 2, 2, 2, 2)
+
+
+def _base_index(fc, fy, bar):
+    if fc not in FC or fy not in FY or bar not in CODES:
+        raise KeyError(f"({fc}, {fy}, {bar}) is outside of the precomputed input space")
+    return (FC.index(fc)*len(FY) + FY.index(fy))*len(BARS) + CODES[bar]
+
+
+def tension_key(fc, fy, bar, case, bar_location, coating, density):
+    """Integer key into the tension table
+
+    Args:
+        fc (int): Concrete compressive strength in MPa, one of `FC`
+        fy (int): Rebar tensile strength in MPa, one of `FY`
+        bar (str): Bar designation, one of `BARS`
+        case (int): Cl. 12.2.3 case, 1 or 2
+        bar_location (bool): More than 300mm of fresh concrete cast below (k_1 = 1.3)
+        coating (int): Index into `COATING_FACTORS`
+        density (int): Index into `DENSITY_FACTORS`
+
+    Returns:
+        int: key
+    """
+    key = _base_index(fc, fy, bar)
+    key = key*2 + (case - 1)
+    key = key*2 + bool(bar_location)
+    key = key*len(COATING_FACTORS) + coating
+    return key*len(DENSITY_FACTORS) + density
+
+
+def compression_key(fc, fy, bar, confined):
+    """Integer key into the compression table
+
+    Args:
+        fc (int): Concrete compressive strength in MPa, one of `FC`
+        fy (int): Rebar tensile strength in MPa, one of `FY`
+        bar (str): Bar designation, one of `BARS`
+        confined (bool): Enclosed within spiral or 10M ties per Cl. 12.3.3.b
+
+    Returns:
+        int: key
+    """
+    return _base_index(fc, fy, bar)*2 + bool(confined)
+
+
+def hooked_key(fc, fy, bar, hook, side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density):
+    """Integer key into the hooked table; boolean arguments match the checkboxes of the Hooked page
+
+    Returns:
+        int: key
+    """
+    key = _base_index(fc, fy, bar)*len(HOOKS) + HOOKS.index(hook)
+    for flag in (side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density):
+        key = key*2 + bool(flag)
+    return key
+
+
+def _grid(axes):
+    """Returns one flattened index array per axis, ordered by key"""
+    return [index.ravel() for index in np.indices(axes)]
+
+
+class DesignTable:
+    def __init__(self, l_d, l_db, l_dc, l_dh, version=TABLE_VERSION, edition=EDITION):
+        """Precomputed development lengths for every discrete input combination of the three pages
+
+        Args:
+            l_d (numpy.ndarray): Tension development length, indexed by `tension_key`
+            l_db (numpy.ndarray): Basic compression development length, indexed by `compression_key`
+            l_dc (numpy.ndarray): Compression development length, indexed by `compression_key`
+            l_dh (numpy.ndarray): Hooked development length, indexed by `hooked_key`
+            version (int, optional): Table version. Defaults to TABLE_VERSION.
+            edition (str, optional): CSA A23.3 edition of the factors. Defaults to the active `util.editions.EDITION`.
+        """
+        self.l_d = l_d
+        self.l_db = l_db
+        self.l_dc = l_dc
+        self.l_dh = l_dh
+        self.version = version
+        self.edition = edition
+        #Table file the arrays are mapped from, see `.open`
+        self.path = None
+
+    @classmethod
+    def build(cls):
+        """Computes the full table with the vectorized engines"""
+        fc_values, fy_values, d_b_values = np.array(FC), np.array(FY), SIZES
+
+        fc, fy, bar, case, bar_location, coating, density = _grid(TENSION_AXES)
+        d_b = d_b_values[bar]
+        l_d = tension.development_length(
+            fc_values[fc], fy_values[fy], d_b,
+            factor_values('tension', 'k_1', bar_location),
+            factor_values('tension', 'k_2', coating),
+            factor_values('tension', 'k_3', density),
+            tension.bar_size_factor(d_b),
+            case + 1)
+
+        fc, fy, bar, confined = _grid(COMPRESSION_AXES)
+        l_db = compression.basic_development_length(d_b_values[bar], fy_values[fy], fc_values[fc])
+        l_dc = compression.development_length(l_db, compression.modification_factor(confined, False))
+
+        fc, fy, bar, hook, side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density = _grid(HOOKED_AXES)
+        l_dh = hooked.evaluate(
+            d_b_values[bar], fc_values[fc], fy_values[fy], HOOKS_90[hook],
+            side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density)['l_dh']
+        return cls(l_d, l_db, l_dc, l_dh)
+
+    def write(self, path):
+        """Writes the table as a fixed-width binary file for `.open`; the file is replaced atomically"""
+        header = np.zeros((), dtype=_HEADER)
+        header['magic'] = _MAGIC
+        header['version'] = self.version
+        header['edition'] = self.edition.encode()
+        header['counts'] = [len(getattr(self, name)) for name in _ARRAYS]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(header.tobytes().ljust(_HEADER_BYTES, b'\0'))
+            for name in _ARRAYS:
+                f.write(np.ascontiguousarray(getattr(self, name), dtype='<f8').tobytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def open(cls, path):
+        """Maps a table file written by `.write` read-only
+
+        The arrays are zero-copy views of the mapping, so every process that opens the same file shares one copy
+        through the page cache.
+
+        Raises:
+            OSError: The file cannot be read
+            ValueError: The file is not a table file, or is from another `TABLE_VERSION`, edition or input space
+
+        Returns:
+            DesignTable: table backed by read-only arrays
+        """
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buffer) < _HEADER_BYTES:
+            raise ValueError(f"{path}: not a design table file")
+        header = np.frombuffer(buffer, dtype=_HEADER, count=1)[0]
+        if header['magic'] != _MAGIC:
+            raise ValueError(f"{path}: not a design table file")
+        edition = header['edition'].decode()
+        if int(header['version']) != TABLE_VERSION or edition != EDITION:
+            raise ValueError(f"{path}: table v{int(header['version'])} ({edition}) is stale")
+        counts = [int(count) for count in header['counts']]
+        if counts != [int(np.prod(axes)) for axes in (TENSION_AXES, COMPRESSION_AXES, COMPRESSION_AXES, HOOKED_AXES)]:
+            raise ValueError(f"{path}: table was built for another input space")
+        if len(buffer) != _HEADER_BYTES + 8*sum(counts):
+            raise ValueError(f"{path}: truncated table file")
+        arrays, offset = [], _HEADER_BYTES
+        for count in counts:
+            arrays.append(np.frombuffer(buffer, dtype='<f8', count=count, offset=offset))
+            offset += 8*count
+        table = cls(*arrays, edition=edition)
+        table.path = path
+        return table
+
+    def design_aid(self, clause, fy, **factors):
+        """Returns a printable design-aid chart of development length (mm) for every bar size (rows) and f'c (columns)
+
+        Args:
+            clause (str): One of "tension", "compression" or "hooked"
+            fy (int): Rebar tensile strength in MPa, one of `FY`
+            **factors: Remaining keyword arguments of `tension_key`, `compression_key` or `hooked_key`
+
+        Returns:
+            dict: Column name to list of values, starting with the `Bar` column; accepted by `st.table`
+        """
+        key, values = {
+            'tension': (tension_key, self.l_d),
+            'compression': (compression_key, self.l_dc),
+            'hooked': (hooked_key, self.l_dh)}[clause]
+        chart = {'Bar': list(BARS)}
+        for fc in FC:
+            chart[f"f'c={fc}"] = [ceil_mm(values[key(fc, fy, bar, **factors)]) for bar in BARS]
+        return chart
+
+
+def ceil_mm(length):
+    """Rounds a required length up to whole mm, the one rounding rule for every length shown or exported; truncating
+    would be unconservative. Float noise below 1e-6 mm is ignored, so e.g. the 300mm minimum stays 300.
+
+    Returns:
+        int: length in mm
+    """
+    return int(np.ceil(np.round(length, 6)))
+
+
+def chart_to_html(chart, caption=""):
+    """Renders a chart returned by `DesignTable.design_aid` as a printable HTML table
+
+    Args:
+        chart (dict): Column name to list of values
+        caption (str, optional): Table caption. Defaults to "".
+
+    Returns:
+        str: HTML document
+    """
+    columns = list(chart)
+    html = f'<table border="1" cellpadding="4" cellspacing="0"><caption>{caption}</caption><thead><tr>'
+    html += ''.join(f'<th scope="col">{column}</th>' for column in columns) + '</tr></thead><tbody>'
+    for row in zip(*chart.values()):
+        html += '<tr>' + ''.join(f'<td style="text-align: center;">{value}</td>' for value in row) + '</tr>'
+    return html + '</tbody></table>'
+
+
+@lru_cache(maxsize=None)
+def get_table():
+    """Returns the process-wide design table: the memory-mapped `TABLE_PATH` when it is current, otherwise built; loaded
+    once at import of this module
+    """
+    try:
+        return DesignTable.open(TABLE_PATH)
+    except (OSError, ValueError):
+        return DesignTable.build()
+
+
+#Load at process start (the pages import this module before their first rerun), so no lookup opens or builds the table
+get_table()
@@ -0,0 +1,154 @@
+import os
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+Option = namedtuple('Option', ['value', 'comment'])
+Option.__doc__ = """One choice of a k-factor; `comment` is the justification, escaped for `st.latex` ("" for none)"""
+
+Factor = namedtuple('Factor', ['clause', 'options'])
+Factor.__doc__ = """Declarative k-factor: clause reference and options; the position of an option is its code"""
+
+FactorTable = namedtuple('FactorTable', ['clause', 'values', 'comments', 'latex'])
+FactorTable.__doc__ = """Compiled k-factor: read-only `values` array and `comments`/`latex` tuples, all indexed by code"""
+
+#Cl. 12.1.2: values of sqrt(f'c) used for the development lengths shall not exceed 8 MPa
+SQRT_F_PRIME_C_MAX = 8.0
+
+# <!-----Factor tables------>
+#Cl. 12 modification factors per CSA A23.3 edition. Codes are fixed across editions (they are the radio/checkbox
+#order of the pages and the codes returned by `util.hooked.factors`); only values, justifications and clauses may differ
+_A23_3_19 = {
+    'tension': {
+        'k_1': Factor("Cl. 12.2.4.a", (
+            Option(1.0, ""),
+            Option(1.3, ""))),
+        'k_2': Factor("Cl. 12.2.4.b", (
+            Option(1.5, ""),
+            Option(1.2, ""),
+            Option(1.0, ""))),
+        'k_3': Factor("Cl. 12.2.4.c", (
+            Option(1.3, ""),
+            Option(1.2, ""),
+            Option(1.0, ""))),
+        'k_4': Factor("Cl. 12.2.4.d", (
+            Option(0.8, "Bar\ size \leq 20M"),
+            Option(1.0, "Bar\ size > 20M"))),
+    },
+    'compression': {
+        'k_1': Factor("Cl. 12.3.3.b", (
+            Option(1.0, "Modification\ Factor"),
+            Option(0.75, "Modification\ Factor"))),
+    },
+    'hooked': {
+        'k_1': Factor("Cl. 12.5.3.b", (
+            Option(1.0, "Bar size > 35M"),
+            Option(1.0, "Side cover < 60mm"),
+            Option(1.0, "Tail cover <= 50mm"),
+            Option(0.7, "Side cover > 60mm\ |\ 90°\ hook\ |\ Tail\ cover > 50mm"),
+            Option(0.7, "Side cover > 60mm"))),
+        'k_2': Factor("Cl. 12.5.3.c", (
+            Option(1.0, "Bar size > 35M"),
+            Option(1.0, "Ties/Stirrup\ requirement\ not\ met"),
+            Option(0.8, "Ties/Stirrup\ requirement\ met"))),
+        'k_3': Factor("Cl.12.5.3.e", (
+            Option(1.3, "Low-density\ concrete"),
+            Option(1.0, "Normal-density\ concrete"))),
+        'k_4': Factor("Cl.12.5.3.f", (
+            Option(1.0, "Normal\ reinforcement"),
+            Option(1.2, "Epoxy-coated\ reinforcement"))),
+    },
+}
+
+#The Cl. 12 factors implemented here did not change between the 2014 and 2019 editions; the 2014 table is declared on
+#its own so that any difference can be entered as data
+_A23_3_14 = {clause: dict(factors) for clause, factors in _A23_3_19.items()}
+
+EDITIONS = MappingProxyType({'2014': _A23_3_14, '2019': _A23_3_19})
+DEFAULT_EDITION = '2019'
+
+
+# <!-----Compilation------>
+def _latex(name, clause, option):
+    symbol = f"k_{{{name[2:]}}}"
+    reference = f"{option.comment}\ |\ {clause}" if option.comment else clause
+    return f"{symbol} = {option.value}\ ({reference})"
+
+
+def _compile(factor, name):
+    values = np.array([option.value for option in factor.options], dtype=float)
+    values.flags.writeable = False
+    return FactorTable(
+        clause=factor.clause,
+        values=values,
+        comments=tuple(option.comment for option in factor.options),
+        latex=tuple(_latex(name, factor.clause, option) for option in factor.options))
+
+
+@lru_cache(maxsize=None)
+def get_factors(edition=None):
+    """Compiled k-factor tables of one edition, built once per process
+
+    Args:
+        edition (str, optional): One of `EDITIONS`. Defaults to `EDITION`.
+
+    Returns:
+        dict: clause ("tension", "compression" or "hooked") to {factor name ("k_1" ..): `FactorTable`}
+    """
+    edition = edition or EDITION
+    if edition not in EDITIONS:
+        raise ValueError(f"Unknown CSA A23.3 edition `{edition}`. Expected one of {list(EDITIONS)}")
+    return MappingProxyType({
+        clause: MappingProxyType({name: _compile(factor, name) for name, factor in factors.items()})
+        for clause, factors in EDITIONS[edition].items()})
+
+
+def factor_values(clause, name, codes):
+    """Gathers k-factor values for whole arrays of codes from the active edition
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        name (str): One of "k_1" .. "k_4"
+        codes (array_like of int): Option codes, see `EDITIONS`
+
+    Returns:
+        numpy.ndarray: k-factor per code
+    """
+    return FACTORS[clause][name].values[np.asarray(codes, dtype=np.intp)]
+
+
+def sqrt_f_prime_c(f_prime_c):
+    """Returns sqrt(f'c) in MPa, limited to 8 MPa per Cl. 12.1.2 (f'c above 64 MPa adds no bond strength)
+
+    Args:
+        f_prime_c (array_like): Concrete compressive strength in MPa
+
+    Returns:
+        numpy.ndarray: sqrt(f'c), not more than SQRT_F_PRIME_C_MAX
+    """
+    return np.minimum(np.sqrt(np.asarray(f_prime_c, dtype=float)), SQRT_F_PRIME_C_MAX)
+
+
+def handcalc_f_prime_c(f_prime_c):
+    """Returns f'c limited to 64 MPa for the handcalcs, so that the shown sqrt(f'c) obeys the same Cl. 12.1.2 limit as
+    `sqrt_f_prime_c` and the steps agree with the engine results
+
+    Args:
+        f_prime_c (array_like): Concrete compressive strength in MPa
+
+    Returns:
+        float or list: f'c in MPa; a list for array input
+    """
+    return np.minimum(np.asarray(f_prime_c, dtype=float), SQRT_F_PRIME_C_MAX**2).tolist()
+
+
+def factor_latex(clause, name, code):
+    """Returns the precompiled `st.latex` line of one k-factor code from the active edition"""
+    return FACTORS[clause][name].latex[int(code)]
+
+
+#Active edition, chosen with the CSA_EDITION environment variable; the tables are compiled once at import
+EDITION = os.environ.get('CSA_EDITION', DEFAULT_EDITION)
+FACTORS = get_factors(EDITION)
@@ -0,0 +1,102 @@
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class LRUCache:
+    def __init__(self, name, maxsize=256):
+        """Thread-safe least-recently-used cache with hit/miss counters
+
+        Args:
+            name (str): Name shown in `cache_stats`
+            maxsize (int, optional): Max. number of entries kept. Defaults to 256.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (True, value) and marks the entry as recently used, or (False, None) on a miss"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+def cached_handcalc(maxsize=256):
+    """Memoizes a `@handcalc` decorated function on its arguments; apply it above `@handcalc`
+
+    Arguments are bound to the function signature, so positional and keyword calls share entries.
+    Page scripts are re-executed on every rerun, which redefines the function each time. The cache is therefore
+    registered per source file and function name, so that it is shared by every rerun and session in the process.
+    It is replaced only when the function body changes.
+
+    Args:
+        maxsize (int, optional): Max. number of argument combinations kept per function. Defaults to 256.
+    """
+    def decorator(function):
+        code = getattr(function, '__wrapped__', function).__code__
+        registry_key = (code.co_filename, function.__qualname__)
+        with _registry_lock:
+            cached_code, cache = _registry.get(registry_key, (None, None))
+            if cached_code != code:
+                cache = LRUCache(f"{os.path.basename(code.co_filename)}:{function.__qualname__}", maxsize)
+                _registry[registry_key] = (code, cache)
+        signature = inspect.signature(function)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            key = tuple(signature.bind(*args, **kwargs).arguments.values())
+            hit, value = cache.get(key)
+            if not hit:
+                value = function(*args, **kwargs)
+                cache.put(key, value)
+            latex, local_variables = value
+            return latex, dict(local_variables)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Returns the hit/miss counts of every handcalc cache in the process
+
+    Returns:
+        list: One dict per cached function with `function`, `hits`, `misses`, `hit_rate` and `size`
+    """
+    with _registry_lock:
+        caches = [cache for _, cache in _registry.values()]
+    return [{
+        'function': cache.name,
+        'hits': cache.hits,
+        'misses': cache.misses,
+        'hit_rate': round(cache.hits/max(cache.hits + cache.misses, 1), 3),
+        'size': len(cache),
+    } for cache in caches]
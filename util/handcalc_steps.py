@@ -0,0 +1,68 @@
+from math import sqrt
+
+from handcalcs.decorator import handcalc
+
+from util.handcalc_cache import cached_handcalc
+
+# <!-----Tension | Cl. 12.2------>
+@cached_handcalc()
+@handcalc(precision=2, right="\ mm")
+def development_length_case1(k_1, k_2, k_3, k_4, f_y, f_prime_c, d_b):
+    l_d = max(0.45*min(k_1*k_2, 1.7)*k_3*k_4*f_y/sqrt(f_prime_c)*d_b, 300)
+    return locals()
+
+@cached_handcalc()
+@handcalc(precision=2, right="\ mm")
+def development_length_case2(k_1, k_2, k_3, k_4, f_y, f_prime_c, d_b):
+    l_d = max(0.6*min(k_1*k_2, 1.7)*k_3*k_4*f_y/sqrt(f_prime_c)*d_b, 300)
+    return locals()
+
+# <!-----Compression | Cl. 12.3------>
+@cached_handcalc()
+@handcalc(precision=1,right="\ mm", scientific_notation=False)
+def basic_dev_length(d_b, f_y, f_prime_c):
+    l_db = max((0.24*d_b*f_y)/sqrt(f_prime_c),0.044*d_b*f_y) #Cl. 12.3.2
+    return locals()
+
+@cached_handcalc()
+@handcalc(precision=2, right="\ mm")
+def compression_development_length(l_db, k_1):
+
+    l_d = max(l_db*k_1, 200)
+    return locals()
+
+# <!-----Hooked | Cl. 12.5------>
+@cached_handcalc()
+@handcalc(precision=1)
+def calculation_steps(k_1,k_2,k_3,k_4,d_b,f_prime_c,f_y):
+    """Generate latex and calculate basic development length
+
+    Args:
+        k_1 (float): Side cover parameter
+        k_2 (float): Stirrup parameter
+        k_3 (float): Concrete density parameter
+        k_4 (float): Reinforcing bar parameter
+        d_b (float): Bar diameter in mm
+        f_prime_c (float): Concrete compressive strength in MPa
+        f_y (float): Rebar tensile strength in MPa
+
+    Returns:
+        latex, local_variables: Returns the latex for the substitution and the local variables for the same
+    """
+    l_hb = k_1*k_2*k_3*k_4*(100*d_b)/sqrt(f_prime_c)*f_y/400
+    return locals()
+
+@cached_handcalc()
+@handcalc(precision=1)
+def hooked_development_length(l_hb, d_b):
+    """Generate latex and calculate hooked development length
+
+    Args:
+        l_hb (float): basic development length in mm
+        d_b (float): Bar diameter in mm
+
+    Returns:
+        latex, local_variables: Returns the latex for the substitution and the local variables for the same
+    """
+    l_dh = max(l_hb, 150, 8*d_b)
+    return locals()
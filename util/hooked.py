@@ -0,0 +1,99 @@
+import numpy as np
+
+from util.bars import CODES, SIZES
+from util.editions import FACTORS, factor_values, sqrt_f_prime_c
+
+
+def factors(d_b, hook_90, side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density):
+    """Evaluates the Cl. 12.5.3 modification factors as boolean masks over whole arrays of hooks
+
+    Args:
+        d_b (array_like): Bar diameter in mm; bars larger than 35M get no k_1/k_2 reduction
+        hook_90 (array_like of bool): 90° hook (otherwise 180°)
+        side_cover (array_like of bool): Side cover (normal to plane of hook) is less than 60mm
+        tail_cover (array_like of bool): For 90° hooks, cover on bar extension beyond the hook is not less than 50mm
+        stirrups_3 (array_like of bool): Hook is enclosed within at least 3 ties/stirrups
+        epoxy_bars (array_like of bool): Epoxy coated bars
+        normal_density (array_like of bool): Normal-density concrete
+
+    Returns:
+        dict: `k_1` .. `k_4` and the matching justification codes `k_1_code` .. `k_4_code`, the option codes of the
+            hooked factor tables in `util.editions`
+    """
+    large_bar = np.asarray(d_b, dtype=float) > SIZES[CODES['35M']]
+    side_cover = np.asarray(side_cover, dtype=bool)
+    hook_90 = np.asarray(hook_90, dtype=bool)
+    k_1_code = np.select(
+        [large_bar, side_cover, hook_90 & ~np.asarray(tail_cover, dtype=bool), hook_90],
+        [0, 1, 2, 3],
+        default=4).astype(np.int8)
+    k_2_code = np.where(large_bar, 0, np.where(stirrups_3, 2, 1)).astype(np.int8)
+    k_3_code = np.asarray(normal_density, dtype=np.int8)
+    k_4_code = np.asarray(epoxy_bars, dtype=np.int8)
+    return {
+        'k_1': factor_values('hooked', 'k_1', k_1_code),
+        'k_2': factor_values('hooked', 'k_2', k_2_code),
+        'k_3': factor_values('hooked', 'k_3', k_3_code),
+        'k_4': factor_values('hooked', 'k_4', k_4_code),
+        'k_1_code': k_1_code,
+        'k_2_code': k_2_code,
+        'k_3_code': k_3_code,
+        'k_4_code': k_4_code,
+    }
+
+
+def comment(factor, code):
+    """Returns the justification of a k-factor code, including the clause reference
+
+    Args:
+        factor (str): One of "k_1" .. "k_4"
+        code (int): Justification code from `factors`
+
+    Returns:
+        str: comment for `st.latex`
+    """
+    table = FACTORS['hooked'][factor]
+    return f"{table.comments[int(code)]}\ |\ {table.clause}"
+
+
+def basic_development_length(k_1, k_2, k_3, k_4, d_b, f_prime_c, f_y):
+    """Vectorized basic development length of a standard hook per Cl. 12.5.2
+
+    Args:
+        k_1 (array_like): Side cover parameter
+        k_2 (array_like): Stirrup parameter
+        k_3 (array_like): Concrete density parameter
+        k_4 (array_like): Reinforcing bar parameter
+        d_b (array_like): Bar diameter in mm
+        f_prime_c (array_like): Concrete compressive strength in MPa
+        f_y (array_like): Rebar tensile strength in MPa
+
+    Returns:
+        numpy.ndarray: l_hb in mm
+    """
+    k = np.multiply(k_1, k_2, dtype=float)*k_3*k_4
+    return k*(100*np.asarray(d_b, dtype=float))/sqrt_f_prime_c(f_prime_c)*f_y/400
+
+def development_length(l_hb, d_b):
+    """Vectorized hooked development length per Cl. 12.5.1
+
+    Args:
+        l_hb (array_like): basic development length in mm
+        d_b (array_like): Bar diameter in mm
+
+    Returns:
+        numpy.ndarray: l_dh in mm, not less than 150mm or 8d_b
+    """
+    return np.maximum(np.maximum(np.asarray(l_hb, dtype=float), 150), 8*np.asarray(d_b, dtype=float))
+
+
+def evaluate(d_b, f_prime_c, f_y, hook_90, side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density):
+    """Evaluates Cl. 12.5 for a whole hook schedule in one pass; see `factors` for the arguments
+
+    Returns:
+        dict: Everything returned by `factors`, plus `l_hb` and `l_dh` = max(l_hb, 150, 8 d_b) in mm
+    """
+    result = factors(d_b, hook_90, side_cover, tail_cover, stirrups_3, epoxy_bars, normal_density)
+    result['l_hb'] = basic_development_length(result['k_1'], result['k_2'], result['k_3'], result['k_4'], d_b, f_prime_c, f_y)
+    result['l_dh'] = development_length(result['l_hb'], d_b)
+    return result
@@ -0,0 +1,111 @@
+import numpy as np
+
+from util.bars import DESIGNATIONS, SIZES
+from util.design_table import FC
+from util.sweep import evaluate
+
+#f'c range offered by the pages
+FC_MIN, FC_MAX = FC[0], FC[-1]
+
+#Every clause has the form l = max(A/sqrt(f'c), F) with A and F independent of f'c; evaluating at a tiny f'c
+#isolates A, evaluating at an infinite f'c isolates the floor F
+_FC_TINY = 1e-6
+#Lengths within this of the available embedment (mm) count as fitting, so round-off does not reject exact fits
+_TOLERANCE = 1e-6
+
+
+def min_f_prime_c(clause, available, d_b, f_y, step=None, **factors):
+    """Minimum concrete strength for which the development length fits in the available embedment
+
+    Closed-form inversion of l = max(A/sqrt(f'c), F): f'c = (A/available)^2, provided the floor F (300mm, 200mm or
+    0.044 d_b fy k_1, 150mm or 8d_b) fits. All arguments broadcast, so thousands of joints are solved in one pass.
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        available (array_like): Available embedment in mm
+        d_b (array_like): Bar diameter in mm
+        f_y (array_like): Rebar tensile strength in MPa
+        step (float, optional): Round f'c up to a multiple of this, e.g. 5 MPa. Defaults to None.
+        **factors: Factor keys of `util.sweep.evaluate`
+
+    Returns:
+        numpy.ndarray: f'c in MPa, not less than FC_MIN; NaN where no f'c up to FC_MAX fits
+    """
+    available = np.asarray(available, dtype=float)
+    coefficient = evaluate(clause, _FC_TINY, f_y, d_b, **factors)*np.sqrt(_FC_TINY)
+    floor = evaluate(clause, np.inf, f_y, d_b, **factors)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_prime_c = np.maximum((coefficient/available)**2, FC_MIN)
+    if step:
+        f_prime_c = np.ceil(np.round(f_prime_c/step, 9))*step
+    return np.where((floor <= available + _TOLERANCE) & (f_prime_c <= FC_MAX), f_prime_c, np.nan)
+
+
+def max_bar(clause, available, f_prime_c, f_y, **factors):
+    """Largest catalogue bar whose development length fits in the available embedment
+
+    Development length is non-decreasing in bar size for every clause (k_4 and the 35M limit of Cl. 12.5.3 only step
+    up), so each joint is solved by bisection over the catalogue index; all joints are bisected together.
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        available (array_like): Available embedment in mm
+        f_prime_c (array_like): Concrete compressive strength in MPa
+        f_y (array_like): Rebar tensile strength in MPa
+        **factors: Factor keys of `util.sweep.evaluate`
+
+    Returns:
+        numpy.ndarray: Catalogue index of the bar (see `util.bars.CODES`); -1 where not even the smallest bar fits
+    """
+    available, f_prime_c, f_y, *values = np.broadcast_arrays(available, f_prime_c, f_y, *factors.values())
+    factors = dict(zip(factors, values))
+    low = np.full(available.shape, -1, dtype=np.int8)
+    high = np.full(available.shape, len(SIZES) - 1, dtype=np.int8)
+    while (low < high).any():
+        middle = np.maximum((low + high + 1)//2, 0)
+        fits = evaluate(clause, f_prime_c, f_y, SIZES[middle], **factors) <= available + _TOLERANCE
+        active = low < high
+        low = np.where(active & fits, middle, low).astype(np.int8)
+        high = np.where(active & ~fits, middle - 1, high).astype(np.int8)
+    return low
+
+
+def bar_designations(codes):
+    """Designations for `max_bar` results, with "" where no bar fits"""
+    return np.array(('',) + DESIGNATIONS)[np.asarray(codes) + 1]
+
+
+def solve_joints(clause, file, bar, f_prime_c, f_y, **factors):
+    """Solves both inverse problems for every joint of a CSV file
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        file (str or file-like): CSV with an `available` column (mm) and optional `mark`, `bar`, `fc` and `fy` columns
+        bar (str): Bar designation for rows without one
+        f_prime_c (float): f'c in MPa for rows without one
+        f_y (float): fy in MPa for rows without one
+        **factors: Factor keys of `util.sweep.evaluate`, scalars applied to every joint
+
+    Returns:
+        pandas.DataFrame: The inputs plus `fc_min` (MPa, rounded up to 1 MPa; blank where none fits) and `max_bar`
+    """
+    import pandas as pd
+    from util.bars import bar_codes
+    from util.schedule import read_schedule
+    joints = next(read_schedule(file, chunksize=None))
+    if 'available' not in joints:
+        raise ValueError("The joints file needs an `available` column")
+    column = lambda name, default: (joints[name].str.strip() if name in joints else pd.Series('', index=joints.index)).replace('', default)
+    try:
+        joints = joints.assign(
+            bar=column('bar', bar).str.upper(),
+            fc=column('fc', str(f_prime_c)).astype(float),
+            fy=column('fy', str(f_y)).astype(float),
+            available=joints['available'].astype(float))
+    except ValueError as e:
+        raise ValueError(f"Non-numeric `available`, `fc` or `fy` value: {e}") from None
+    available, f_prime_c, f_y = joints['available'].to_numpy(), joints['fc'].to_numpy(), joints['fy'].to_numpy()
+    d_b = SIZES[bar_codes(joints['bar'].tolist())]
+    return joints.assign(
+        fc_min=min_f_prime_c(clause, available, d_b, f_y, step=1, **factors),
+        max_bar=bar_designations(max_bar(clause, available, f_prime_c, f_y, **factors)))
@@ -0,0 +1,370 @@
+import io
+import json
+import multiprocessing
+import os
+import secrets
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:
+    #Windows: jobs of other processes are always treated as owned
+    fcntl = None
+
+#Defaults, overridable with the JOBS_DIR, JOB_WORKERS, JOB_PROCESSES, JOB_MAX_AGE and JOB_KEEP_DOWNLOADED (seconds)
+#environment variables. Every server process has its own pool; launcher.py sets JOB_PROCESSES to cores // workers
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'jobs')
+DEFAULT_WORKERS = 2
+DEFAULT_PROCESSES = max((os.cpu_count() or 2)//2, 1)
+DEFAULT_MAX_AGE = 7*24*3600
+DEFAULT_KEEP_DOWNLOADED = 3600
+
+#Job kinds: what the rows of the uploaded CSV are
+KINDS = ('schedule', 'splices')
+ACTIVE = ('queued', 'running')
+
+
+def run_chunk(kind, text):
+    """Calculates one CSV chunk (header + rows); runs in the pool processes
+
+    Returns:
+        str, int: result rows as CSV without header and row count
+    """
+    from util.result_store import get_store
+    from util.schedule import calculate_chunk, read_schedule
+    from util.splice import calculate_splice_chunk
+    chunk = next(read_schedule(io.StringIO(text), chunksize=None))
+    result = (calculate_splice_chunk if kind == 'splices' else calculate_chunk)(chunk, get_store())
+    return result.to_csv(header=False, index=False), len(result)
+
+
+class JobQueue:
+    def __init__(self, directory=None, workers=None, processes=None, max_age=None, keep_downloaded=None):
+        """Background schedule jobs owned by the server process; state and results live on disk under `directory`
+
+        Every job gets an unguessable id and a directory with the uploaded input, the results appended chunk by chunk
+        and a `state.json`. Up to `workers` jobs run at a time, each with one chunk in flight, so queued jobs of
+        several users take turns on the `processes` pool instead of the Streamlit script threads. Any server process
+        sharing the directory can report a job's progress; jobs left behind by a stopped process are resumed from
+        their last complete chunk. Jobs are removed `keep_downloaded` seconds after their results were downloaded,
+        or `max_age` seconds after they were submitted.
+
+        Args:
+            directory (str, optional): Jobs directory. Defaults to JOBS_DIR or `data/jobs`.
+            workers (int, optional): Jobs running at a time. Defaults to JOB_WORKERS or 2.
+            processes (int, optional): Calculation processes shared by all jobs; 0 calculates in the job threads.
+                Defaults to JOB_PROCESSES or half the cores.
+            max_age (float, optional): Defaults to JOB_MAX_AGE or 7 days.
+            keep_downloaded (float, optional): Defaults to JOB_KEEP_DOWNLOADED or 1 hour.
+        """
+        self.directory = directory or os.environ.get('JOBS_DIR', DEFAULT_DIR)
+        workers = workers or int(os.environ.get('JOB_WORKERS', DEFAULT_WORKERS))
+        self.processes = int(os.environ.get('JOB_PROCESSES', DEFAULT_PROCESSES)) if processes is None else processes
+        self.max_age = max_age or float(os.environ.get('JOB_MAX_AGE', DEFAULT_MAX_AGE))
+        self.keep_downloaded = keep_downloaded or float(os.environ.get('JOB_KEEP_DOWNLOADED', DEFAULT_KEEP_DOWNLOADED))
+        os.makedirs(self.directory, exist_ok=True)
+        self._runner = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        #Job id -> open lock file of the active jobs of this process
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.purge()
+        self._resume()
+
+    # <!-----Files------>
+    def _path(self, job_id, name=''):
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            raise ValueError(f"Invalid job id `{job_id}`")
+        return os.path.join(self.directory, job_id, name)
+
+    def input_path(self, job_id):
+        return self._path(job_id, 'input.csv')
+
+    def result_path(self, job_id):
+        return self._path(job_id, 'result.csv')
+
+    def _mark(self, job_id, name):
+        """Creates the empty marker file `name` in the job directory; markers reach the job from any server process"""
+        try:
+            open(self._path(job_id, name), 'a').close()
+        except OSError:
+            pass
+
+    def _marked(self, job_id, name):
+        return os.path.exists(self._path(job_id, name))
+
+    # <!-----Ownership------>
+    #A process owns a job while it holds an exclusive flock on the job's `lock` file. The kernel drops the lock when the
+    #process exits, so unlike a saved pid (reused after a container restart) it cannot make a dead job look alive.
+    def _claim(self, job_id):
+        """Takes the lock of a job for this process
+
+        Returns:
+            bool: False if another process (or this one) already owns the job
+        """
+        if fcntl is None:
+            return True
+        with self._locks_lock:
+            if job_id in self._locks:
+                return False
+            try:
+                f = open(self._path(job_id, 'lock'), 'a')
+            except OSError:
+                return False
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._locks[job_id] = f
+            return True
+
+    def _release(self, job_id):
+        with self._locks_lock:
+            f = self._locks.pop(job_id, None)
+        if f is not None:
+            f.close()
+
+    def _owned(self, job):
+        """Whether a live process, this one included, owns the job"""
+        if fcntl is None:
+            return True
+        if self._claim(job['id']):
+            self._release(job['id'])
+            return False
+        return True
+
+    def _save(self, job):
+        path = self._path(job['id'], 'state.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(job, f)
+        os.replace(path + '.tmp', path)
+
+    def status(self, job_id):
+        """State of a job: id, kind, name, status ("queued", "running", "done", "failed" or "cancelled"), input
+        `lines` done of `total`, result `rows` and bytes (`offset`) written, error and timestamps
+
+        Returns:
+            dict: or None if there is no such job
+        """
+        try:
+            with open(self._path(job_id, 'state.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def jobs(self, job_ids):
+        """States of the existing jobs among `job_ids`, newest first"""
+        found = (self.status(job_id) for job_id in job_ids)
+        return sorted((job for job in found if job is not None), key=lambda job: job['created'], reverse=True)
+
+    def position(self, job_id):
+        """Number of queued jobs submitted before `job_id`, across all users"""
+        job = self.status(job_id)
+        if job is None or job['status'] != 'queued':
+            return 0
+        return sum(1 for other in self._all() if other['status'] == 'queued' and other['created'] < job['created'])
+
+    def _all(self):
+        states = (self.status(name) for name in os.listdir(self.directory)
+                  if all(c in '0123456789abcdef' for c in name))
+        return [job for job in states if job is not None]
+
+    # <!-----Lifecycle------>
+    def submit(self, kind, file, name, chunksize=10_000):
+        """Queues a CSV schedule; the file is copied, so the upload does not need to outlive the request
+
+        Args:
+            kind (str): One of `KINDS`
+            file (file-like): Binary CSV file with a header row
+            name (str): Original file name, for display and the download name
+            chunksize (int, optional): Rows per chunk. Defaults to 10_000.
+
+        Returns:
+            str: Job id
+        """
+        from util.schedule import csv_records
+        if kind not in KINDS:
+            raise ValueError(f"Unknown job kind `{kind}`. Expected one of {list(KINDS)}")
+        self.purge()
+        job_id = secrets.token_hex(12)
+        os.makedirs(self._path(job_id))
+        self._claim(job_id)
+        file.seek(0)
+        with open(self.input_path(job_id), 'wb') as f:
+            shutil.copyfileobj(file, f)
+        with open(self.input_path(job_id), newline='') as f:
+            total = max(sum(1 for _ in csv_records(f)) - 1, 0)
+        job = {
+            'id': job_id, 'kind': kind, 'name': name, 'chunksize': int(chunksize), 'status': 'queued',
+            'lines': 0, 'total': total, 'rows': 0, 'offset': 0, 'error': '', 'created': time.time(), 'started': None,
+            'finished': None, 'downloaded': None, 'pid': os.getpid()}
+        self._save(job)
+        self._runner.submit(self._run, job_id)
+        return job_id
+
+    def cancel(self, job_id):
+        """Stops a queued or running job after its current chunk; the rows done so far stay downloadable
+
+        The request is a `cancel` marker file, so it works from every server process sharing the jobs directory, not
+        only from the one running the job.
+        """
+        job = self.status(job_id)
+        if job is not None and job['status'] in ACTIVE:
+            self._mark(job_id, 'cancel')
+            if job['status'] == 'queued':
+                #Should the owner start the job meanwhile, it stops at the marker before the first chunk
+                job.update(status='cancelled', finished=time.time())
+                self._save(job)
+
+    def mark_downloaded(self, job_id):
+        job = self.status(job_id)
+        if job is not None and job['status'] not in ACTIVE:
+            job['downloaded'] = time.time()
+            self._save(job)
+
+    def remove(self, job_id):
+        """Deletes a job and its files; an active job is cancelled first and deleted by its runner once it stops"""
+        self.cancel(job_id)
+        job = self.status(job_id)
+        if job is not None and job['status'] in ACTIVE:
+            self._mark(job_id, 'remove')
+            #The job may have stopped before it could see the marker
+            job = self.status(job_id)
+        if job is not None and job['status'] not in ACTIVE:
+            shutil.rmtree(self._path(job_id), ignore_errors=True)
+
+    def purge(self):
+        """Deletes finished jobs that were downloaded more than `keep_downloaded` or submitted more than `max_age` seconds ago
+
+        Returns:
+            int: number of jobs deleted
+        """
+        now = time.time()
+        removed = 0
+        for job in self._all():
+            if job['status'] in ACTIVE and self._owned(job):
+                continue
+            if (job['downloaded'] and now - job['downloaded'] > self.keep_downloaded) or now - job['created'] > self.max_age:
+                shutil.rmtree(self._path(job['id']), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _resume(self):
+        """Requeues the jobs of server processes that stopped while the jobs were queued or running"""
+        if fcntl is None:
+            return
+        for job in sorted(self._all(), key=lambda job: job['created']):
+            #Several server processes may start at once; the lock lets only one of them take over the job
+            if job['status'] not in ACTIVE or not self._claim(job['id']):
+                continue
+            #It may have finished between listing and locking
+            current = self.status(job['id'])
+            if current is None or current['status'] not in ACTIVE:
+                self._release(job['id'])
+                continue
+            job = current
+            job.update(status='queued', pid=os.getpid())
+            self._save(job)
+            self._runner.submit(self._run, job['id'])
+
+    # <!-----Execution------>
+    def _calculate(self, kind, text):
+        if not self.processes:
+            return run_chunk(kind, text)
+        with self._pool_lock:
+            if self._pool is None:
+                #Spawned, not forked: the server process runs many threads
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+            pool = self._pool
+        try:
+            return pool.submit(run_chunk, kind, text).result()
+        except BrokenProcessPool:
+            #A killed calculation process breaks the whole pool; start a new one for the next chunk
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    def _chunks(self, job):
+        """Raw CSV text chunks (header + records) of the job input after the records already done; chunks end on record
+        boundaries, so quoted fields with line breaks stay in one chunk
+
+        Yields:
+            str, int: chunk text and number of input records in it
+        """
+        from util.schedule import csv_records
+        with open(self.input_path(job['id']), newline='') as f:
+            records = csv_records(f)
+            header = next(records, '')
+            for _ in islice(records, job['lines']):
+                pass
+            while True:
+                lines = list(islice(records, job['chunksize']))
+                if not lines:
+                    return
+                yield header + ''.join(lines), len(lines)
+
+    def _run(self, job_id):
+        from util.schedule import result_columns
+        from util.splice import splice_result_columns
+        job = self.status(job_id)
+        if job is None or job['status'] != 'queued':
+            self._release(job_id)
+            return
+        job.update(status='running', started=job['started'] or time.time())
+        self._save(job)
+        try:
+            with open(self.result_path(job_id), 'ab') as f:
+                #Drop a chunk that was written but not recorded before a restart
+                f.truncate(job['offset'])
+                if not job['offset']:
+                    columns = splice_result_columns if job['kind'] == 'splices' else result_columns
+                    f.write((','.join(columns) + '\n').encode())
+                    job['offset'] = f.tell()
+                for text, lines in self._chunks(job):
+                    if self._marked(job_id, 'cancel'):
+                        job['status'] = 'cancelled'
+                        break
+                    result, rows = self._calculate(job['kind'], text)
+                    f.write(result.encode())
+                    f.flush()
+                    job.update(lines=job['lines'] + lines, rows=job['rows'] + rows, offset=f.tell())
+                    self._save(job)
+                else:
+                    job['status'] = 'done'
+        except ValueError as e:
+            job.update(status='failed', error=f"{e} | Check rows after row {job['lines']}")
+        except Exception as e:
+            job.update(status='failed', error=f"{type(e).__name__}: {e}")
+        job['finished'] = time.time()
+        self._save(job)
+        self._release(job_id)
+        if self._marked(job_id, 'remove'):
+            shutil.rmtree(self._path(job_id), ignore_errors=True)
+
+    def read_result(self, job_id):
+        """Result CSV bytes up to the last complete chunk, for partial and final downloads"""
+        job = self.status(job_id)
+        if job is None or not job['offset']:
+            return b''
+        with open(self.result_path(job_id), 'rb') as f:
+            return f.read(job['offset'])
+
+    def shutdown(self):
+        self._runner.shutdown(wait=False)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+@lru_cache(maxsize=None)
+def get_queue():
+    """Process-wide `JobQueue` with the default/environment settings"""
+    return JobQueue()
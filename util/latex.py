@@ -0,0 +1,13 @@
+def math_body(latex):
+    """Strips the display-math delimiters that handcalcs adds, so that every equation is wrapped the same way
+
+    Args:
+        latex (str): LaTeX returned by a `@handcalc` function, or any equation
+
+    Returns:
+        str: the equation without the surrounding `\\[ \\]`
+    """
+    latex = latex.strip()
+    if latex.startswith('\\[') and latex.endswith('\\]'):
+        latex = latex[2:-2].strip()
+    return latex
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#Opt-in: set RERUN_METRICS_PORT to time every rerun of the calculation pages and serve the histograms on
+#http://127.0.0.1:<port>/metrics (Prometheus text format). SLOW_RERUN_MS sets the threshold of the slow-rerun log line.
+METRICS_PORT = int(os.environ.get('RERUN_METRICS_PORT', '') or 0)
+SLOW_RERUN_MS = float(os.environ.get('SLOW_RERUN_MS', '') or 500)
+ENABLED = METRICS_PORT > 0
+
+#Histogram upper bounds in seconds; the +Inf bucket is implied
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_histograms = {}
+_slow_reruns = {}
+_lock = threading.Lock()
+_local = threading.local()
+_server = None
+
+
+def _observe(name, labels, seconds):
+    """Adds one observation to the histogram `name` with the `labels` tuple of (label, value) pairs"""
+    histogram = _histograms.setdefault((name, labels), [[0]*len(BUCKETS), 0.0, 0])
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            histogram[0][i] += 1
+    histogram[1] += seconds
+    histogram[2] += 1
+
+
+def _labels(pairs, **extra):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in (*pairs, *extra.items())) + '}'
+
+
+def exposition():
+    """All histograms and counters in Prometheus text format
+
+    Returns:
+        str: `devlength_rerun_seconds` (whole rerun per page), `devlength_rerun_phase_seconds` (per page and phase)
+            and `devlength_slow_reruns_total`
+    """
+    lines = []
+    with _lock:
+        histograms = sorted((key, [list(value[0]), value[1], value[2]]) for key, value in _histograms.items())
+        slow = sorted(_slow_reruns.items())
+    helps = {
+        'devlength_rerun_seconds': "Duration of a page rerun",
+        'devlength_rerun_phase_seconds': "Duration of one phase of a page rerun",
+    }
+    for name, description in helps.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for (histogram_name, labels), (counts, total, count) in histograms:
+            if histogram_name != name:
+                continue
+            for bound, bucket in zip(BUCKETS, counts):
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {bucket}")
+            lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+    lines += ["# HELP devlength_slow_reruns_total Reruns slower than SLOW_RERUN_MS",
+              "# TYPE devlength_slow_reruns_total counter"]
+    lines += [f"devlength_slow_reruns_total{_labels((('page', page),))} {count}" for page, count in slow]
+    return '\n'.join(lines) + '\n'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=METRICS_PORT, address='127.0.0.1'):
+    """Starts the `/metrics` endpoint once per process in a daemon thread; a port in use is logged, not raised
+
+    Returns:
+        ThreadingHTTPServer: the server, or None if the port could not be bound
+    """
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server or None
+        try:
+            _server = ThreadingHTTPServer((address, port), _Handler)
+        except OSError as e:
+            logger.warning(f"Rerun metrics endpoint not started on {address}:{port}: {e}")
+            _server = False
+            return None
+    threading.Thread(target=_server.serve_forever, name='rerun-metrics', daemon=True).start()
+    return _server
+
+
+class RerunTimer:
+    def __init__(self, page):
+        """Splits one rerun of `page` into phases
+
+        `lap(phase)` books the time since the previous lap to `phase`; laps of the same phase add up, so a phase may be
+        split over the script. `phase(name)` times a block, e.g. inside `Page_layout`. Time not booked to any phase is
+        reported as "other".
+
+        Args:
+            page (str): Page name, a metric label
+        """
+        self.page = page
+        self.phases = {}
+        self.start = self._last = time.perf_counter()
+
+    def _add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self._add(phase, now - self._last)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self._add(name, self._last - start)
+
+    def finish(self):
+        """Records the rerun in the histograms and logs it as one JSON line when slower than SLOW_RERUN_MS
+
+        Returns:
+            dict: seconds per phase, including "other"
+        """
+        total = time.perf_counter() - self.start
+        other = total - sum(self.phases.values())
+        if other > 0:
+            self._add('other', other)
+        page = (('page', self.page),)
+        slow = total*1000 >= SLOW_RERUN_MS
+        with _lock:
+            _observe('devlength_rerun_seconds', page, total)
+            for phase, seconds in self.phases.items():
+                _observe('devlength_rerun_phase_seconds', (*page, ('phase', phase)), seconds)
+            if slow:
+                _slow_reruns[self.page] = _slow_reruns.get(self.page, 0) + 1
+        if slow:
+            logger.warning(json.dumps({
+                'event': 'slow_rerun',
+                'page': self.page,
+                'total_ms': round(total*1000, 1),
+                'phases_ms': {phase: round(seconds*1000, 1) for phase, seconds in self.phases.items()},
+                'pid': os.getpid(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }))
+        if getattr(_local, 'timer', None) is self:
+            _local.timer = None
+        return self.phases
+
+
+class _NullTimer:
+    """Stand-in when the metrics are off; every call is a no-op"""
+    page = None
+    phases = {}
+
+    def lap(self, phase):
+        pass
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def finish(self):
+        return {}
+
+
+NULL_TIMER = _NullTimer()
+
+
+def rerun_timer(page):
+    """Starts timing a rerun of `page` on this script thread; the metrics endpoint is started on first use
+
+    Returns:
+        RerunTimer: or a no-op timer when RERUN_METRICS_PORT is not set
+    """
+    if not ENABLED:
+        return NULL_TIMER
+    serve()
+    _local.timer = RerunTimer(page)
+    return _local.timer
+
+
+def current_timer():
+    """The timer of the rerun running on this thread, for code shared by the pages such as `Page_layout`"""
+    return getattr(_local, 'timer', None) or NULL_TIMER
@@ -0,0 +1,278 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from util.bars import SIZES, bar_codes
+from util.design_table import TABLE_VERSION
+from util.editions import EDITION
+from util.sweep import evaluate
+
+#Defaults, overridable with the RESULT_STORE, RESULT_STORE_TTL (seconds) and RESULT_STORE_MAX_ENTRIES environment variables
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'results.sqlite')
+DEFAULT_TTL = 30*24*3600
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+#SQLite limits the number of parameters per statement
+_BATCH = 900
+
+#Lookups only read: `accessed` (for the LRU eviction) is refreshed once it is older than this fraction of the TTL, and
+#the hit/miss totals are kept in memory and written at most every STATS_FLUSH_SECONDS, so that the page reruns of
+#several server processes do not queue on the SQLite write lock
+ACCESS_REFRESH = 0.1
+STATS_FLUSH_SECONDS = 30
+
+
+def result_key(clause, fc, fy, bar, **factors):
+    """Canonical hash of one calculation under the active edition; equal inputs give equal keys whatever their Python/NumPy types
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        fc (float): Concrete compressive strength in MPa
+        fy (float): Rebar tensile strength in MPa
+        bar (str): Bar designation
+        **factors: Factor keys of `util.sweep.evaluate`
+
+    Returns:
+        str: 32 hex characters
+    """
+    canonical = [TABLE_VERSION, EDITION, clause, float(fc), float(fy), str(bar)]
+    for name in sorted(factors):
+        value = factors[name]
+        value = value.item() if isinstance(value, np.generic) else value
+        canonical.append([name, value if isinstance(value, (bool, str)) else float(value)])
+    text = json.dumps(canonical, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class ResultStore:
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        """SQLite-backed development length cache shared by every session, process and container restart
+
+        Entries older than `ttl` are ignored and removed; beyond `max_entries` the least recently used entries are
+        removed. Every thread gets its own connection and the database runs in WAL mode, so the page sessions and
+        batch workers can read and write concurrently.
+
+        Args:
+            path (str, optional): Database file. Defaults to $RESULT_STORE or `data/results.sqlite`.
+            ttl (float, optional): Time to live in seconds. Defaults to $RESULT_STORE_TTL or 30 days.
+            max_entries (int, optional): Max. number of entries. Defaults to $RESULT_STORE_MAX_ENTRIES or 1,000,000.
+        """
+        self.path = path or os.environ.get('RESULT_STORE', DEFAULT_PATH)
+        self.ttl = float(ttl or os.environ.get('RESULT_STORE_TTL', DEFAULT_TTL))
+        self.max_entries = int(max_entries or os.environ.get('RESULT_STORE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._unflushed = [0, 0]
+        self._flushed = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY, clause TEXT NOT NULL, value REAL NOT NULL,
+                    created REAL NOT NULL, accessed REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+                CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0);
+            """)
+        atexit.register(self.flush_stats)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, keys):
+        """Looks up many keys at once
+
+        Args:
+            keys (list): Keys from `result_key`
+
+        Returns:
+            dict: key to value for every key found and not expired
+        """
+        now = time.time()
+        found, refresh = {}, []
+        connection = self._connection()
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            rows = connection.execute(
+                f"SELECT key, value, accessed FROM results WHERE key IN ({','.join('?'*len(batch))}) AND created > ?",
+                (*batch, now - self.ttl))
+            for key, value, accessed in rows:
+                found[key] = value
+                if accessed < now - self.ttl*ACCESS_REFRESH:
+                    refresh.append(key)
+        if refresh:
+            with connection:
+                for start in range(0, len(refresh), _BATCH):
+                    batch = refresh[start:start + _BATCH]
+                    connection.execute(f"UPDATE results SET accessed = ? WHERE key IN ({','.join('?'*len(batch))})", (now, *batch))
+        hits = len(found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+            self._unflushed[0] += hits
+            self._unflushed[1] += len(keys) - hits
+            flush = now - self._flushed >= STATS_FLUSH_SECONDS
+        if flush:
+            self.flush_stats()
+        return found
+
+    def flush_stats(self):
+        """Adds the hits and misses counted since the last flush to the database totals"""
+        with self._lock:
+            hits, misses = self._unflushed
+            self._unflushed = [0, 0]
+            self._flushed = time.time()
+        if hits or misses:
+            with self._connection() as connection:
+                connection.execute(
+                    "UPDATE stats SET value = value + CASE name WHEN 'hits' THEN ? ELSE ? END", (hits, misses))
+
+    def put_many(self, clause, items):
+        """Stores (key, value) pairs of one clause; evicts once enough entries have been added
+
+        Args:
+            clause (str): One of "tension", "compression" or "hooked"
+            items (list): (key, value) pairs
+        """
+        now = time.time()
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                ((key, clause, float(value), now, now) for key, value in items))
+        with self._lock:
+            self._puts += len(items)
+            evict = self._puts >= max(self.max_entries//100, 1000)
+            if evict:
+                self._puts = 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Removes expired entries, then the least recently used entries beyond `max_entries`
+
+        Returns:
+            int: number of entries removed
+        """
+        with self._connection() as connection:
+            removed = connection.execute("DELETE FROM results WHERE created <= ?", (time.time() - self.ttl,)).rowcount
+            excess = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += connection.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                    (excess,)).rowcount
+        return removed
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM results")
+            connection.execute("UPDATE stats SET value = 0")
+        with self._lock:
+            self.hits = self.misses = 0
+            self._unflushed = [0, 0]
+
+    def stats(self):
+        """Hit-rate statistics of this process and of the database since it was created or cleared
+
+        Returns:
+            dict: entries, size_mb, hits, misses, hit_rate, total_hits, total_misses and total_hit_rate
+        """
+        self.flush_stats()
+        connection = self._connection()
+        entries = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        totals = dict(connection.execute("SELECT name, value FROM stats"))
+        rate = lambda hits, misses: round(hits/(hits + misses), 3) if hits + misses else None
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ('', '-wal') if os.path.exists(self.path + suffix))
+        return {
+            'entries': entries,
+            'size_mb': round(size/1e6, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': rate(self.hits, self.misses),
+            'total_hits': totals.get('hits', 0),
+            'total_misses': totals.get('misses', 0),
+            'total_hit_rate': rate(totals.get('hits', 0), totals.get('misses', 0)),
+        }
+
+    def lengths(self, clause, fc, fy, bar, **factors):
+        """Development lengths through the store; misses are calculated in one vectorized pass and stored
+
+        All arguments broadcast, so this works for one page calculation as well as for a whole schedule. Repeated
+        input combinations are looked up once.
+
+        Args:
+            clause (str): One of "tension", "compression" or "hooked"
+            fc (array_like): Concrete compressive strength in MPa
+            fy (array_like): Rebar tensile strength in MPa
+            bar (array_like of str): Bar designation
+            **factors: Factor keys of `util.sweep.evaluate`
+
+        Returns:
+            numpy.ndarray: l_d (tension, compression) or l_dh (hooked) in mm, in the broadcast shape of the arguments
+        """
+        names = list(factors)
+        arrays = np.broadcast_arrays(np.asarray(fc), np.asarray(fy), np.asarray(bar), *(np.asarray(value) for value in factors.values()))
+        records = list(zip(*(array.ravel().tolist() for array in arrays)))
+        keys = {record: result_key(clause, *record[:3], **dict(zip(names, record[3:]))) for record in dict.fromkeys(records)}
+        found = self.get_many(list(keys.values()))
+        missing = [record for record, key in keys.items() if key not in found]
+        if missing:
+            columns = [np.array(column) for column in zip(*missing)]
+            values = evaluate(
+                clause, columns[0].astype(float), columns[1].astype(float), SIZES[bar_codes(columns[2])],
+                **dict(zip(names, columns[3:])))
+            items = [(keys[record], value) for record, value in zip(missing, values.tolist())]
+            self.put_many(clause, items)
+            found.update(items)
+        return np.array([found[keys[record]] for record in records], dtype=float).reshape(arrays[0].shape)
+
+
+def warm(store):
+    """Preloads every input combination the pages offer (the design table grid) into the store
+
+    Args:
+        store (ResultStore): Store to fill
+
+    Returns:
+        int: number of entries written
+    """
+    from util import design_table as dt
+    table = dt.get_table()
+    fc_values, fy_values, bars = np.array(dt.FC), np.array(dt.FY), np.array(dt.BARS)
+    grids = {
+        'tension': (dt.TENSION_AXES, table.l_d, lambda case, bar_location, coating, density: dict(
+            case=case + 1, bar_location=bool(bar_location), coating=coating, density=density)),
+        'compression': (dt.COMPRESSION_AXES, table.l_dc, lambda confined: dict(confined=bool(confined))),
+        'hooked': (dt.HOOKED_AXES, table.l_dh, lambda hook, *flags: dict(
+            hook=dt.HOOKS[hook], **dict(zip(('side_cover', 'tail_cover', 'stirrups_3', 'epoxy_bars', 'normal_density'), map(bool, flags))))),
+    }
+    written = 0
+    for clause, (axes, values, factors) in grids.items():
+        fc, fy, bar, *codes = (index.tolist() for index in dt._grid(axes))
+        items = [
+            (result_key(clause, fc_values[row[0]], fy_values[row[1]], bars[row[2]], **factors(*row[3:])), value)
+            for row, value in zip(zip(fc, fy, bar, *codes), values.tolist())]
+        store.put_many(clause, items)
+        written += len(items)
+    return written
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    """Process-wide `ResultStore` with the default/environment settings"""
+    return ResultStore()
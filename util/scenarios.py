@@ -0,0 +1,194 @@
+import hashlib
+import json
+
+import numpy as np
+
+from util.bars import DESIGNATIONS, SIZES
+from util.design_table import FC, FY, HOOKS, TABLE_VERSION
+from util.editions import EDITION
+from util.sweep import evaluate
+
+SCHEMA = 'devlength-scenarios'
+SCHEMA_VERSION = 1
+
+_bool = (False, True)
+
+#Saved inputs per page: input key and the allowed values. Radio inputs whose option text depends on other inputs
+#are saved as the option index
+FIELDS = {
+    'tension': (
+        ('fc', FC), ('fy', FY), ('bar', DESIGNATIONS), ('ties', _bool), ('stirrups', _bool), ('case3', _bool),
+        ('bar_location_factor', _bool), ('coating_factor', (0, 1, 2)), ('density_factor', (0, 1, 2))),
+    'compression': (
+        ('fc', FC), ('fy', FY), ('bar', DESIGNATIONS), ('spiral', _bool), ('10M', _bool)),
+    'hooked': (
+        ('fc', FC), ('fy', FY), ('bar', DESIGNATIONS), ('Hook', HOOKS), ('side_cover', _bool), ('tail_cover', _bool),
+        ('3_stirrups', _bool), ('epoxy_bars', _bool), ('Normal_density', _bool)),
+}
+RESULTS = {'tension': ('l_d',), 'compression': ('l_d',), 'hooked': ('l_dh',)}
+
+
+def encode(page, inputs):
+    """Converts page inputs to compact codes, the index of each value in its `FIELDS` choices
+
+    Args:
+        page (str): One of "tension", "compression" or "hooked"
+        inputs (dict): Page inputs; keys that are not saved are ignored
+
+    Returns:
+        list: int codes in `FIELDS[page]` order
+    """
+    try:
+        return [choices.index(inputs[key]) for key, choices in FIELDS[page]]
+    except ValueError as e:
+        raise ValueError(f"Cannot save input: {e}") from None
+
+
+def decode(page, codes):
+    """Inverse of `encode`
+
+    Returns:
+        dict: Page inputs
+    """
+    return {key: choices[code] for (key, choices), code in zip(FIELDS[page], codes)}
+
+
+def scenario_hash(page, codes, results):
+    """Hash of a scenario's inputs and results (rounded to 0.1mm), the calculation version and the CSA A23.3 edition;
+    stored results are reused only while it matches, so edited or corrupted results are recalculated
+
+    Returns:
+        str: 16 hex characters
+    """
+    results = [round(float(value), 1) for value in results]
+    text = json.dumps([SCHEMA_VERSION, TABLE_VERSION, EDITION, page, list(codes), results], separators=(',', ':'))
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def calculate(page, codes):
+    """Calculates the results of many scenarios in one vectorized pass
+
+    Args:
+        page (str): One of "tension", "compression" or "hooked"
+        codes (array_like): (n, len(FIELDS[page])) int codes from `encode`
+
+    Returns:
+        numpy.ndarray: (n, len(RESULTS[page])) results in mm, rounded to 0.1mm
+    """
+    codes = np.asarray(codes, dtype=np.int64).reshape(-1, len(FIELDS[page]))
+    columns = {key: np.asarray(choices)[codes[:, i]] for i, (key, choices) in enumerate(FIELDS[page])}
+    if page == 'tension':
+        factors = dict(
+            case=np.where(columns['ties'] | columns['stirrups'] | columns['case3'], 1, 2),
+            bar_location=columns['bar_location_factor'],
+            coating=columns['coating_factor'],
+            density=columns['density_factor'])
+    elif page == 'compression':
+        factors = dict(confined=columns['spiral'] | columns['10M'])
+    else:
+        factors = dict(
+            hook=columns['Hook'],
+            side_cover=columns['side_cover'],
+            tail_cover=columns['tail_cover'],
+            stirrups_3=columns['3_stirrups'],
+            epoxy_bars=columns['epoxy_bars'],
+            normal_density=columns['Normal_density'])
+    d_b = SIZES[codes[:, FIELDS[page].index(('bar', DESIGNATIONS))]]
+    result = evaluate(page, columns['fc'].astype(float), columns['fy'].astype(float), d_b, **factors)
+    return np.round(result, 1).reshape(-1, 1)
+
+
+def scenario(page, name, inputs, results):
+    """Builds one saved scenario row from the current page
+
+    Args:
+        page (str): One of "tension", "compression" or "hooked"
+        name (str): Scenario name
+        inputs (dict): Page inputs, see `encode`
+        results (list): Values of `RESULTS[page]` as shown on the page
+
+    Returns:
+        list: [name, codes, results, hash]
+    """
+    codes = encode(page, inputs)
+    results = [round(float(value), 1) for value in results]
+    return [name, codes, results, scenario_hash(page, codes, results)]
+
+
+def header(page):
+    return {'schema': SCHEMA, 'version': SCHEMA_VERSION, 'page': page,
+            'fields': [key for key, _ in FIELDS[page]], 'results': list(RESULTS[page])}
+
+
+def iter_lines(page, rows):
+    """Yields the lines of a scenario file: a JSON header, then one compact JSON array per scenario
+
+    Args:
+        page (str): One of "tension", "compression" or "hooked"
+        rows (iterable): Rows from `scenario`
+    """
+    yield json.dumps(header(page), separators=(',', ':')) + '\n'
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':'), ensure_ascii=False) + '\n'
+
+
+def read_scenarios(page, lines):
+    """Streams and validates a scenario file; only scenarios whose stored hash no longer matches are recalculated
+
+    Args:
+        page (str): One of "tension", "compression" or "hooked"
+        lines (iterable): Lines of the file, str or bytes
+
+    Returns:
+        dict: `rows` (list of rows as from `scenario`, with up-to-date results and hashes) and `recalculated`
+            (number of rows whose stored results were stale)
+    """
+    lines = iter(lines)
+    try:
+        stored = json.loads(next(lines))
+    except (StopIteration, ValueError):
+        raise ValueError("Not a scenario file: missing header") from None
+    expected = header(page)
+    if not isinstance(stored, dict) or stored.get('schema') != SCHEMA:
+        raise ValueError("Not a scenario file")
+    if stored.get('version') != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported scenario file version {stored.get('version')}; expected {SCHEMA_VERSION}")
+    if stored.get('page') != page:
+        raise ValueError(f"Scenarios were saved on the {stored.get('page')} page")
+    if stored.get('fields') != expected['fields'] or stored.get('results') != expected['results']:
+        raise ValueError("Scenario fields do not match this page")
+
+    limits = tuple(len(choices) for _, choices in FIELDS[page])
+    rows, stale = [], []
+    for number, line in enumerate(lines, start=2):
+        if not line.strip():
+            continue
+        try:
+            name, codes, results, stored_hash = json.loads(line)
+            codes = [int(code) for code in codes]
+            results = [float(value) for value in results]
+            if len(codes) != len(limits) or not all(0 <= code < limit for code, limit in zip(codes, limits)):
+                raise ValueError
+        except (ValueError, TypeError):
+            raise ValueError(f"Line {number}: invalid scenario") from None
+        if len(results) != len(expected['results']) or scenario_hash(page, codes, results) != stored_hash:
+            stale.append(len(rows))
+        rows.append([str(name), codes, results, stored_hash])
+    if stale:
+        recalculated = calculate(page, [rows[i][1] for i in stale])
+        for i, results in zip(stale, recalculated.tolist()):
+            rows[i][2:] = [results, scenario_hash(page, rows[i][1], results)]
+    return {'rows': rows, 'recalculated': len(stale)}
+
+
+def scenario_table(page, rows):
+    """Column view of saved scenarios for `st.dataframe`
+
+    Returns:
+        dict: name, every input and every result
+    """
+    codes = np.array([row[1] for row in rows], dtype=np.int64).reshape(-1, len(FIELDS[page]))
+    table = {'name': [row[0] for row in rows]}
+    table.update({key: np.asarray(choices)[codes[:, i]] for i, (key, choices) in enumerate(FIELDS[page])})
+    table.update({key: [row[2][i] for row in rows] for i, key in enumerate(RESULTS[page])})
+    return table
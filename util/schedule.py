@@ -0,0 +1,313 @@
+import numpy as np
+
+from util import compression, hooked, tension
+from util.bars import SIZES, bar_codes
+from util.editions import factor_values
+
+#Optional schedule columns and the value used when the column is missing or the cell is blank
+schedule_columns = {
+    'mark': '',
+    'bar': '15M',
+    'fc': 25,
+    'fy': 400,
+    'ties': False,
+    'stirrups': False,
+    'case3': False,
+    'bar_location': False,
+    'coating': 'uncoated',
+    'density': 'normal',
+    'spiral': False,
+    'hook': '',
+    'side_cover': False,
+    'tail_cover': True,
+    '3_stirrups': True,
+}
+
+#Accepted spellings for the coating (Cl. 12.2.4.b) and density (Cl. 12.2.4.c) columns and their k_2/k_3 option codes
+coating_codes = {'epoxy_low_cover': 0, 'epoxy': 1, 'uncoated': 2}
+density_codes = {'low': 0, 'semi-low': 1, 'normal': 2}
+
+result_columns = [
+    'mark', 'bar', 'd_b', 'case', 'k_1', 'k_2', 'k_3', 'k_4', 'l_d', 'l_dc', 'h_k_1', 'h_k_2', 'h_k_3', 'h_k_4', 'l_dh',
+    'governing']
+
+_true_values = {'true', 'yes', 'y', '1', 'x'}
+
+
+def _hook(value):
+    value = value.rstrip('°')
+    value = value[:-2] if value.endswith('.0') else value
+    return value + '°' if value in ('90', '180') else ''
+
+
+_scalars = (str, bool, int, float)
+
+
+def _text(raw, known):
+    """Raw columns listed in `known` as string arrays; None cells become blank
+
+    Raises:
+        ValueError: A column is not a flat sequence of scalars, e.g. a JSON list or object in a field
+    """
+    text = {}
+    for column, values in raw.items():
+        if column not in known or values is None:
+            continue
+        try:
+            values = np.asarray(values)
+        except ValueError:
+            values = None
+        if values is None or values.ndim != 1 or (values.dtype == object and not all(
+                value is None or isinstance(value, _scalars) for value in values.tolist())):
+            raise ValueError(f"`{column}` must be a single value per row")
+        if values.dtype == object:
+            values = np.where(values == None, '', values)  # noqa: E711, elementwise
+        text[column] = values if values.dtype.kind == 'U' else values.astype(str)
+    return text
+
+
+def _clean(text, column, length, transform=str.lower, defaults=schedule_columns):
+    """Returns column `column` of `text` as a cleaned array, with blanks replaced by the default in `defaults`
+
+    Only empty cells are blanks; text such as "nan" or "None" is kept and fails validation where it is not a valid
+    value. Columns hold few distinct values, so for large inputs only the distinct values are cleaned and then
+    broadcast back.
+    """
+    default = str(defaults[column])
+    clean = lambda value: transform(value.strip() if value.strip() else default)
+    values = text.get(column)
+    if values is None:
+        return np.full(length, clean(default))
+    if length <= 64:
+        return np.array([clean(value) for value in values.tolist()])
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return np.array([clean(value) for value in uniques.tolist()])[inverse.reshape(-1)]
+
+
+def _as_choice(values, column, choices):
+    unknown = ~np.isin(values, list(choices))
+    if unknown.any():
+        raise ValueError(f"Unknown {column} `{values[unknown][0]}`. Expected one of {list(choices)}")
+    return values
+
+
+def _codes(values, codes):
+    """Option codes of validated `coating`/`density` values"""
+    return np.select([values == key for key in codes], list(codes.values()))
+
+
+def parse_columns(raw):
+    """Validates and converts raw schedule columns to typed arrays
+
+    Args:
+        raw (dict): Column name to array-like of raw values (strings from a CSV, or JSON values); missing columns
+            and blank/None cells take the defaults in `schedule_columns`
+
+    Returns:
+        dict: Typed columns; `bar` and `hook` as strings, `d_b`, `fc`, `fy` as floats, flags as bools and
+            `coating`/`density` as the lower-case keys of `coating_codes`/`density_codes`
+    """
+    length = max((len(values) for values in raw.values()), default=0)
+    text = _text(raw, schedule_columns)
+
+    columns = {'mark': text.get('mark', np.full(length, '')), 'bar': _clean(text, 'bar', length, str.upper)}
+    columns['d_b'] = SIZES[bar_codes(columns['bar'])]
+    for column in ('fc', 'fy'):
+        try:
+            columns[column] = _clean(text, column, length).astype(float)
+        except ValueError as e:
+            raise ValueError(f"`{column}` must be numeric: {e}") from None
+        invalid = ~(np.isfinite(columns[column]) & (columns[column] > 0))
+        if invalid.any():
+            raise ValueError(f"`{column}` must be a positive number, got `{columns[column][invalid][0]}`")
+    for column in ('ties', 'stirrups', 'case3', 'bar_location', 'spiral', 'side_cover', 'tail_cover', '3_stirrups'):
+        columns[column] = _clean(text, column, length, lambda value: value.lower() in _true_values).astype(bool)
+    columns['coating'] = _as_choice(_clean(text, 'coating', length), 'coating', coating_codes)
+    columns['density'] = _as_choice(_clean(text, 'density', length), 'density', density_codes)
+    columns['hook'] = _clean(text, 'hook', length, _hook).astype(str)
+    return columns
+
+
+def tension_results(columns):
+    """Tension development length per Cl. 12.2
+
+    Args:
+        columns (dict): Typed columns from `parse_columns`
+
+    Returns:
+        dict: `case`, `k_1` .. `k_4` and `l_d` arrays
+    """
+    d_b = columns['d_b']
+    case = tension.development_case(columns['ties'], columns['stirrups'], columns['case3'])
+    k_1 = factor_values('tension', 'k_1', columns['bar_location'])
+    k_2 = factor_values('tension', 'k_2', _codes(columns['coating'], coating_codes))
+    k_3 = factor_values('tension', 'k_3', _codes(columns['density'], density_codes))
+    k_4 = tension.bar_size_factor(d_b)
+    l_d = tension.development_length(columns['fc'], columns['fy'], d_b, k_1, k_2, k_3, k_4, case)
+    return {'case': case, 'k_1': k_1, 'k_2': k_2, 'k_3': k_3, 'k_4': k_4, 'l_d': l_d}
+
+
+def compression_results(columns):
+    """Compression development length per Cl. 12.3
+
+    Args:
+        columns (dict): Typed columns from `parse_columns`
+
+    Returns:
+        dict: `l_db`, `k_1` and `l_d` arrays
+    """
+    l_db = compression.basic_development_length(columns['d_b'], columns['fy'], columns['fc'])
+    k_1 = compression.modification_factor(columns['spiral'], False)
+    return {'l_db': l_db, 'k_1': k_1, 'l_d': compression.development_length(l_db, k_1)}
+
+
+def hooked_results(columns):
+    """Development length of standard hooks per Cl. 12.5; rows without a `hook` get NaN
+
+    Args:
+        columns (dict): Typed columns from `parse_columns`
+
+    Returns:
+        dict: `k_1` .. `k_4`, their justification codes `k_1_code` .. `k_4_code` (see `util.editions`), `l_hb` and `l_dh` arrays
+    """
+    result = hooked.evaluate(
+        columns['d_b'], columns['fc'], columns['fy'],
+        hook_90=columns['hook'] == '90°',
+        side_cover=columns['side_cover'],
+        tail_cover=columns['tail_cover'],
+        stirrups_3=columns['3_stirrups'],
+        epoxy_bars=columns['coating'] != 'uncoated',
+        normal_density=columns['density'] == 'normal')
+    result['l_dh'] = np.where(columns['hook'] != '', result['l_dh'], np.nan)
+    return result
+
+
+def read_schedule(file, chunksize=10_000):
+    """Reads a CSV bar schedule in fixed-size chunks, so that only one chunk is held in memory at a time
+
+    Args:
+        file (str or file-like): Path or buffer of the CSV file
+        chunksize (int, optional): Rows per chunk; None reads the whole file as one chunk. Defaults to 10_000.
+
+    Returns:
+        iterator: Iterator of `pandas.DataFrame` chunks with lower-case column names
+    """
+    import pandas as pd
+    reader = pd.read_csv(file, chunksize=chunksize, dtype=str, keep_default_na=False, skipinitialspace=True)
+    for chunk in (reader if chunksize else [reader]):
+        chunk.columns = chunk.columns.str.strip().str.lower()
+        yield chunk
+
+
+def csv_records(file):
+    """Iterates over the records of a CSV file opened as text with `newline=''`, without parsing them
+
+    A quoted field may contain line breaks, so physical lines are joined until the record has an even number of
+    quote characters (an escaped quote `""` counts twice). Used to split large files into chunks on record boundaries.
+
+    Yields:
+        str: One record including its line break(s)
+    """
+    record, quotes = [], 0
+    for line in file:
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield ''.join(record)
+            record, quotes = [], 0
+    if record:
+        yield ''.join(record)
+
+
+def _stored_tension(columns, store):
+    """Tension l_d of every row looked up in / added to a `util.result_store.ResultStore`"""
+    return store.lengths(
+        'tension', columns['fc'], columns['fy'], columns['bar'],
+        case=tension.development_case(columns['ties'], columns['stirrups'], columns['case3']),
+        bar_location=columns['bar_location'],
+        coating=_codes(columns['coating'], coating_codes),
+        density=_codes(columns['density'], density_codes))
+
+
+def _stored_lengths(columns, store):
+    """l_d, l_dc and l_dh of `calculate_columns` looked up in / added to a `util.result_store.ResultStore`"""
+    base = (columns['fc'], columns['fy'], columns['bar'])
+    l_d = _stored_tension(columns, store)
+    l_dc = store.lengths('compression', *base, confined=columns['spiral'])
+    l_dh = np.full(len(l_d), np.nan)
+    hooks = columns['hook'] != ''
+    if hooks.any():
+        l_dh[hooks] = store.lengths(
+            'hooked', *(values[hooks] for values in base),
+            hook=columns['hook'][hooks],
+            side_cover=columns['side_cover'][hooks],
+            tail_cover=columns['tail_cover'][hooks],
+            stirrups_3=columns['3_stirrups'][hooks],
+            epoxy_bars=columns['coating'][hooks] != 'uncoated',
+            normal_density=columns['density'][hooks] == 'normal')
+    return l_d, l_dc, l_dh
+
+
+def governing_clause(l_d, l_dc, l_dh):
+    """Clause of the longest development length of each bar; a hook (Cl. 12.5) takes the place of the straight tension
+    length (Cl. 12.2), and compression (Cl. 12.3) governs only where it is longer
+
+    Args:
+        l_d (numpy.ndarray): Tension development lengths
+        l_dc (numpy.ndarray): Compression development lengths
+        l_dh (numpy.ndarray): Hooked development lengths, NaN for straight bars
+
+    Returns:
+        numpy.ndarray: "12.2", "12.3" or "12.5" per bar
+    """
+    hooked_bar = ~np.isnan(l_dh)
+    anchorage = np.where(hooked_bar, l_dh, l_d)
+    return np.where(l_dc > anchorage, '12.3', np.where(hooked_bar, '12.5', '12.2'))
+
+
+def calculate_columns(raw, store=None):
+    """Calculates the tension (Cl. 12.2), compression (Cl. 12.3) and hooked (Cl. 12.5) development lengths for every row
+
+    Args:
+        raw (dict): Column name to array-like of raw values, see `parse_columns`
+        store (ResultStore, optional): Take the development lengths from this `util.result_store.ResultStore` and add
+            the missing ones to it. Defaults to None.
+
+    Returns:
+        pandas.DataFrame: One row per bar with the columns in `result_columns`; the hooked factors `h_k_1` .. `h_k_4`
+            behind `l_dh` and `l_dh` itself are blank for rows without a hook, and `governing` is the clause of the
+            longest length, see `governing_clause`
+    """
+    import pandas as pd
+    columns = parse_columns(raw)
+    tension_result = tension_results(columns)
+    hooked_result = hooked_results(columns)
+    if store is None:
+        l_d, l_dc, l_dh = tension_result['l_d'], compression_results(columns)['l_d'], hooked_result['l_dh']
+    else:
+        l_d, l_dc, l_dh = _stored_lengths(columns, store)
+    straight = columns['hook'] == ''
+    return pd.DataFrame({
+        'mark': columns['mark'],
+        'bar': columns['bar'],
+        'd_b': columns['d_b'],
+        **{key: tension_result[key] for key in ('case', 'k_1', 'k_2', 'k_3', 'k_4')},
+        'l_d': l_d.round(1),
+        'l_dc': l_dc.round(1),
+        **{f'h_{key}': np.where(straight, np.nan, hooked_result[key]) for key in ('k_1', 'k_2', 'k_3', 'k_4')},
+        'l_dh': l_dh.round(1),
+        'governing': governing_clause(l_d, l_dc, l_dh),
+    }, columns=result_columns)
+
+
+def calculate_chunk(chunk, store=None):
+    """Calculates every row of a schedule chunk, see `calculate_columns`
+
+    Args:
+        chunk (pandas.DataFrame): Schedule chunk as yielded by `read_schedule`
+        store (ResultStore, optional): See `calculate_columns`. Defaults to None.
+
+    Returns:
+        pandas.DataFrame: One row per bar with the columns in `result_columns`
+    """
+    return calculate_columns({column: chunk[column].to_numpy() for column in schedule_columns if column in chunk}, store)
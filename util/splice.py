@@ -0,0 +1,166 @@
+import numpy as np
+
+from util.schedule import _clean, _stored_tension, _text, parse_columns, schedule_columns, tension_results
+
+#Splice columns on top of `util.schedule.schedule_columns` and the value used when the column is missing or blank
+splice_columns = {
+    'provided': float('nan'),
+    'area_ratio': 1.0,
+    'spliced_fraction': 1.0,
+    'splice_class': '',
+}
+
+#Tension lap splice classes and their lap length as a multiple of l_d, Cl. 12.15.1
+CLASSES = ('A', 'B')
+CLASS_FACTORS = np.array([1.0, 1.3])
+CLASS_FACTORS.flags.writeable = False
+MIN_LAP = 300
+
+splice_result_columns = [
+    'mark', 'bar', 'd_b', 'case', 'k_1', 'k_2', 'k_3', 'k_4', 'l_d', 'class', 'l_s', 'provided', 'utilization', 'status']
+
+
+def splice_class(area_ratio, spliced_fraction):
+    """Returns the Cl. 12.15.2 splice class code for each splice; 0 (Class A) only where the area provided is at least
+    twice the area required over the splice and at most half of the reinforcement is spliced within the lap length
+
+    Args:
+        area_ratio (array_like): As provided / As required over the length of the splice
+        spliced_fraction (array_like): Fraction of the total reinforcement spliced within the required lap length
+
+    Returns:
+        numpy.ndarray: int8 array of 0 (Class A) or 1 (Class B), indexes into `CLASSES`
+    """
+    class_a = (np.asarray(area_ratio, dtype=float) >= 2) & (np.asarray(spliced_fraction, dtype=float) <= 0.5)
+    return np.where(class_a, 0, 1).astype(np.int8)
+
+
+def lap_length(l_d, class_code):
+    """Vectorized tension lap splice length per Cl. 12.15.1
+
+    Args:
+        l_d (array_like): Tension development length per Cl. 12.2 in mm
+        class_code (array_like of int): 0 (Class A) or 1 (Class B), see `splice_class`
+
+    Returns:
+        numpy.ndarray: l_s in mm, not less than 300mm
+    """
+    return np.maximum(CLASS_FACTORS[np.asarray(class_code, dtype=np.intp)]*np.asarray(l_d, dtype=float), MIN_LAP)
+
+
+def utilization(required, provided):
+    """Required / provided lap length; NaN where no length is provided, above 1.0 where the lap is too short"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.divide(np.asarray(required, dtype=float), np.asarray(provided, dtype=float))
+
+
+def parse_splices(raw):
+    """Validates and converts raw splice schedule columns to typed arrays
+
+    Args:
+        raw (dict): Column name to array-like of raw values; the `util.schedule.schedule_columns` plus the
+            `splice_columns`. Missing columns and blank/None cells take the defaults.
+
+    Returns:
+        dict: Typed columns of `util.schedule.parse_columns`, plus `provided`, `area_ratio` and `spliced_fraction` as
+            floats and `class_code` as int8 (0 = Class A, 1 = Class B)
+    """
+    columns = parse_columns(raw)
+    length = len(columns['bar'])
+    text = _text(raw, splice_columns)
+    for column in ('provided', 'area_ratio', 'spliced_fraction'):
+        try:
+            columns[column] = _clean(text, column, length, defaults=splice_columns).astype(float)
+        except ValueError as e:
+            raise ValueError(f"`{column}` must be numeric: {e}") from None
+    if (columns['provided'] < 0).any():
+        raise ValueError("`provided` must not be negative")
+    if (columns['area_ratio'] <= 0).any():
+        raise ValueError("`area_ratio` must be positive")
+    if ((columns['spliced_fraction'] <= 0) | (columns['spliced_fraction'] > 1)).any():
+        raise ValueError("`spliced_fraction` must be in (0, 1]")
+
+    given = _clean(text, 'splice_class', length, str.upper, defaults=splice_columns)
+    unknown = ~np.isin(given, CLASSES + ('',))
+    if unknown.any():
+        raise ValueError(f"Unknown splice_class `{given[unknown][0]}`. Expected one of {list(CLASSES)} or blank")
+    columns['class_code'] = np.where(
+        given == '', splice_class(columns['area_ratio'], columns['spliced_fraction']), given == 'B').astype(np.int8)
+    return columns
+
+
+def splice_results(columns, l_d=None):
+    """Tension lap splices per Cl. 12.15 on top of the Cl. 12.2 tension engine
+
+    Args:
+        columns (dict): Typed columns from `parse_splices`
+        l_d (numpy.ndarray, optional): Tension development lengths, e.g. from the result store. Defaults to None, which
+            calculates them with `util.schedule.tension_results`.
+
+    Returns:
+        dict: `case`, `k_1` .. `k_4`, `l_d`, `class_code`, `l_s` (required lap) and `utilization` (required / provided) arrays
+    """
+    result = tension_results(columns)
+    if l_d is not None:
+        result['l_d'] = l_d
+    result['class_code'] = columns['class_code']
+    result['l_s'] = lap_length(result['l_d'], columns['class_code'])
+    result['utilization'] = utilization(result['l_s'], columns['provided'])
+    return result
+
+
+def calculate_splices(raw, store=None):
+    """Calculates every splice of a slab or wall splice schedule in one vectorized pass
+
+    Args:
+        raw (dict): Column name to array-like of raw values, see `parse_splices`
+        store (ResultStore, optional): Take l_d from this `util.result_store.ResultStore` and add the missing ones to
+            it. Defaults to None.
+
+    Returns:
+        pandas.DataFrame: One row per splice with the columns in `splice_result_columns`; `status` is "OK", "NG" or
+            blank where no lap length is provided
+    """
+    import pandas as pd
+    columns = parse_splices(raw)
+    result = splice_results(columns, None if store is None else _stored_tension(columns, store))
+    checked = ~np.isnan(result['utilization'])
+    return pd.DataFrame({
+        'mark': columns['mark'],
+        'bar': columns['bar'],
+        'd_b': columns['d_b'],
+        **{key: result[key] for key in ('case', 'k_1', 'k_2', 'k_3', 'k_4')},
+        'l_d': result['l_d'].round(1),
+        'class': np.asarray(CLASSES)[result['class_code']],
+        'l_s': result['l_s'].round(1),
+        'provided': columns['provided'],
+        'utilization': result['utilization'].round(3),
+        'status': np.select([~checked, result['utilization'] <= 1], ['', 'OK'], 'NG'),
+    }, columns=splice_result_columns)
+
+
+def calculate_splice_chunk(chunk, store=None):
+    """Calculates every splice of a schedule chunk from `util.schedule.read_schedule`, see `calculate_splices`"""
+    return calculate_splices(
+        {column: chunk[column].to_numpy() for column in (*schedule_columns, *splice_columns) if column in chunk}, store)
+
+
+def splice_summary(file, worst_rows=100, chunksize=100_000):
+    """Splices checked, too short (NG) and the governing splices of a results CSV from `calculate_splices`, read in chunks
+
+    Args:
+        file (str or file-like): Results CSV
+        worst_rows (int, optional): Number of highest-utilization splices kept. Defaults to 100.
+        chunksize (int, optional): Rows read at a time. Defaults to 100_000.
+
+    Returns:
+        int, int, pandas.DataFrame: checked, failed and the governing splices, highest utilization first
+    """
+    import pandas as pd
+    checked, failed, worst = 0, 0, None
+    for chunk in pd.read_csv(file, chunksize=chunksize, keep_default_na=False, na_values={'provided': [''], 'utilization': ['']}):
+        chunk = chunk[chunk['status'] != '']
+        checked += len(chunk)
+        failed += int((chunk['status'] == 'NG').sum())
+        worst = pd.concat([worst, chunk.nlargest(worst_rows, 'utilization')]).nlargest(worst_rows, 'utilization')
+    return checked, failed, worst
@@ -0,0 +1,96 @@
+from functools import lru_cache
+
+import numpy as np
+
+from util import compression, hooked, tension
+from util.bars import DESIGNATIONS, SIZES
+from util.design_table import FY
+from util.editions import factor_values
+
+#f'c values of the sweep; finer than the slider steps so that the curves are smooth
+FC_SWEEP = tuple(range(5, 61))
+
+_labels = {'tension': 'l_d', 'compression': 'l_d', 'hooked': 'l_dh'}
+
+
+def evaluate(clause, f_prime_c, f_y, d_b, **factors):
+    """Development length of one clause for the factor keys used by `util.design_table`; all arguments broadcast
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        f_prime_c (array_like): Concrete compressive strength in MPa
+        f_y (array_like): Rebar tensile strength in MPa
+        d_b (array_like): Bar diameter in mm
+        **factors: Same keyword arguments as `tension_key`, `compression_key` or `hooked_key` in `util.design_table`,
+            without fc, fy and bar; scalars or arrays
+
+    Returns:
+        numpy.ndarray: l_d (tension, compression) or l_dh (hooked) in mm
+    """
+    if clause == 'tension':
+        return tension.development_length(
+            f_prime_c, f_y, d_b,
+            factor_values('tension', 'k_1', factors['bar_location']),
+            factor_values('tension', 'k_2', factors['coating']),
+            factor_values('tension', 'k_3', factors['density']),
+            tension.bar_size_factor(d_b),
+            factors['case'])
+    if clause == 'compression':
+        l_db = compression.basic_development_length(d_b, f_y, f_prime_c)
+        return compression.development_length(l_db, compression.modification_factor(factors['confined'], False))
+    if clause == 'hooked':
+        return hooked.evaluate(
+            d_b, f_prime_c, f_y, np.asarray(factors['hook']) == '90°', factors['side_cover'], factors['tail_cover'],
+            factors['stirrups_3'], factors['epoxy_bars'], factors['normal_density'])['l_dh']
+    raise ValueError(f"Unknown clause `{clause}`")
+
+
+@lru_cache(maxsize=128)
+def _sweep(clause, factors):
+    f_prime_c = np.array(FC_SWEEP, dtype=float)[:, None, None]
+    f_y = np.array(FY, dtype=float)[None, :, None]
+    result = evaluate(clause, f_prime_c, f_y, SIZES[None, None, :], **dict(factors))
+    result = np.broadcast_to(result, (len(FC_SWEEP), len(FY), len(SIZES))).copy()
+    result.flags.writeable = False
+    return result
+
+
+def sweep(clause, **factors):
+    """Development length over the full f'c x fy x bar grid, computed in one vectorized pass and cached per factor set
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        **factors: Same keyword arguments as `tension_key`, `compression_key` or `hooked_key` in `util.design_table`,
+            without fc, fy and bar
+
+    Returns:
+        numpy.ndarray: Read-only array of shape (len(FC_SWEEP), len(FY), len(DESIGNATIONS)) in mm
+    """
+    return _sweep(clause, tuple(sorted(factors.items())))
+
+
+def sweep_chart(clause, fy_values, **factors):
+    """Altair line chart of development length vs. f'c; one colour per bar size and one dash style per fy
+
+    Args:
+        clause (str): One of "tension", "compression" or "hooked"
+        fy_values (list): fy values to plot, each one of `FY`
+        **factors: See `sweep`
+
+    Returns:
+        altair.Chart: chart
+    """
+    import altair as alt
+    values = sweep(clause, **factors)
+    label = _labels[clause]
+    records = [
+        {"f'c (MPa)": fc, label: round(float(values[i, FY.index(fy), j]), 1), 'bar': bar, 'fy (MPa)': fy}
+        for fy in fy_values
+        for i, fc in enumerate(FC_SWEEP)
+        for j, bar in enumerate(DESIGNATIONS)]
+    return alt.Chart(alt.Data(values=records)).mark_line().encode(
+        x=alt.X(f"f'c (MPa):Q"),
+        y=alt.Y(f"{label}:Q", title=f"{label} (mm)"),
+        color=alt.Color('bar:N', sort=list(DESIGNATIONS)),
+        strokeDash='fy (MPa):N',
+        tooltip=['bar:N', 'fy (MPa):Q', "f'c (MPa):Q", f"{label}:Q"])
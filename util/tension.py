@@ -0,0 +1,55 @@
+import numpy as np
+
+from util.editions import factor_values, sqrt_f_prime_c
+
+
+def development_case(ties, stirrups, case3):
+    """Returns the Cl. 12.2.3 case (1 or 2) for each bar
+
+    Args:
+        ties (array_like of bool): Member contains minimum ties per Cl. 7.6.5
+        stirrups (array_like of bool): Member contains minimum stirrups within ld per Cl. 11.2.8.2
+        case3 (array_like of bool): Slabs, walls, shells or folded plates w/ clear spacing > 2d_b
+
+    Returns:
+        numpy.ndarray: int8 array of 1 (any condition met) or 2
+    """
+    met = np.asarray(ties, dtype=bool) | np.asarray(stirrups, dtype=bool) | np.asarray(case3, dtype=bool)
+    return np.where(met, 1, 2).astype(np.int8)
+
+
+def bar_size_factor(d_b):
+    """Returns the bar size factor k_4 per Cl. 12.2.4.d from the active edition's factor table; code 0 for 20M and smaller bars
+
+    Args:
+        d_b (array_like): Bar diameter in mm
+
+    Returns:
+        numpy.ndarray: k_4 for each bar
+    """
+    return factor_values('tension', 'k_4', np.asarray(d_b, dtype=float) > 20)
+
+
+def development_length(f_prime_c, f_y, d_b, k_1, k_2, k_3, k_4, case):
+    """Vectorized tension development length per Cl. 12.2.3
+
+    Evaluates the same formula as `development_length_case1`/`development_length_case2` in `pages/1_Tension.py`
+    for whole arrays of bars at once. All arguments are broadcast against each other, so scalars can be mixed with arrays.
+
+    Args:
+        f_prime_c (array_like): Concrete compressive strength in MPa
+        f_y (array_like): Rebar tensile strength in MPa
+        d_b (array_like): Bar diameter in mm
+        k_1 (array_like): Bar location factor
+        k_2 (array_like): Coating factor
+        k_3 (array_like): Concrete density factor
+        k_4 (array_like): Bar size factor
+        case (array_like): 1 or 2, see `development_case`
+
+    Returns:
+        numpy.ndarray: l_d in mm, not less than 300mm
+    """
+    coefficient = np.where(np.asarray(case) == 1, 0.45, 0.6)
+    k_1k_2 = np.minimum(np.multiply(k_1, k_2, dtype=float), 1.7)
+    l_d = coefficient*k_1k_2*np.asarray(k_3, dtype=float)*k_4*np.asarray(f_y, dtype=float)/sqrt_f_prime_c(f_prime_c)*d_b
+    return np.maximum(l_d, 300)
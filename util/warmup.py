@@ -0,0 +1,27 @@
+import threading
+
+_started = False
+_lock = threading.Lock()
+
+
+def preload():
+    """Imports the calculation dependencies, builds the process-wide design table and fills an empty result store"""
+    import handcalcs.decorator  # noqa: F401
+    from util.design_table import get_table
+    from util.result_store import get_store, warm
+    get_table()
+    store = get_store()
+    if not store.stats()['entries']:
+        warm(store)
+
+
+def start():
+    """Runs `preload` once per process in a background thread, so that the first calculation page opened after the
+    About page does not pay for the heavy imports
+    """
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=preload, name='warmup', daemon=True).start()